@@ -1,70 +1,104 @@
-import httpx
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from ..models import Podcast
 from ..utils.sanitize import sanitize_query
+from ..utils.fastjson import loads
 from ..config import settings
+from ..services.resilience import provider_request
+from ..services.provider_cache import provider_cache, search_key
 
 LISTEN_NOTES_BASE = "https://listen-api.listennotes.com/api/v2"
+BATCH_LIMIT = 10
+# Search pages are capped at this many results by the API.
+SEARCH_PAGE_SIZE = 10
 
 headers = {}
 if settings.LISTEN_NOTES_API_KEY:
 	headers["X-ListenAPI-Key"] = settings.LISTEN_NOTES_API_KEY
 
-async def _map_episode_to_podcast(item: Dict[str, Any]) -> Podcast:
-	return Podcast(
+# Provider payloads are trusted: build models with model_construct and skip pydantic validation.
+def _map_episode_to_podcast(item: Dict[str, Any]) -> Podcast:
+	podcast = item.get("podcast") or {}
+	duration = item.get("audio_length_sec")
+	return Podcast.model_construct(
 		id=str(item.get("id")),
-		title=item.get("title") or item.get("podcast", {}).get("title", "Untitled"),
-		description=item.get("description") or item.get("podcast", {}).get("description"),
+		title=item.get("title") or item.get("title_original") or podcast.get("title") or podcast.get("title_original") or "Untitled",
+		description=item.get("description") or item.get("description_original") or podcast.get("description"),
 		audio_url=item.get("audio"),
-		thumbnail=(item.get("thumbnail") or item.get("image") or item.get("podcast", {}).get("thumbnail")),
-		duration=item.get("audio_length_sec"),
+		thumbnail=(item.get("thumbnail") or item.get("image") or podcast.get("thumbnail")),
+		duration=int(duration) if duration is not None else None,
 		source="ListenNotes",
-		publisher=item.get("podcast", {}).get("publisher"),
-		language=item.get("podcast", {}).get("language"),
+		publisher=podcast.get("publisher") or podcast.get("publisher_original"),
+		language=podcast.get("language"),
+		external_url=None,
 	)
 
-async def fetch_trending() -> List[Podcast]:
+def _map_curated_podcast(p: Dict[str, Any]) -> Podcast:
+	return Podcast.model_construct(
+		id=str(p.get("id")),
+		title=p.get("title") or "Untitled",
+		description=p.get("description"),
+		audio_url=None,
+		thumbnail=p.get("thumbnail") or p.get("image"),
+		duration=None,
+		source="ListenNotes",
+		publisher=p.get("publisher"),
+		language=p.get("language"),
+		external_url=None,
+	)
+
+def map_curated(data: Dict[str, Any]) -> List[Podcast]:
+	return [_map_curated_podcast(p) for list_item in data.get("curated_lists", []) for p in list_item.get("podcasts", [])]
+
+def map_search(data: Dict[str, Any]) -> List[Podcast]:
+	return [_map_episode_to_podcast(item) for item in data.get("results", []) if item]
+
+async def fetch_trending(allow_stale: bool = True) -> List[Podcast]:
+	return await provider_cache.get_or_fetch(
+		"listen_notes:trending", "listen_notes", _fetch_trending, ttl=settings.CACHE_TTL_TRENDING, allow_stale=allow_stale
+	)
+
+async def _fetch_trending() -> List[Podcast]:
 	url = f"{LISTEN_NOTES_BASE}/curated_podcasts"
-	try:
-		async with httpx.AsyncClient(timeout=15.0) as client:
-			resp = await client.get(url, headers=headers)
-			resp.raise_for_status()
-			data = resp.json()
-			podcasts: List[Podcast] = []
-			for list_item in data.get("curated_lists", []):
-				for p in list_item.get("podcasts", []):
-					podcasts.append(
-						Podcast(
-							id=str(p.get("id")),
-							title=p.get("title") or "Untitled",
-							description=p.get("description"),
-							audio_url=None,
-							thumbnail=p.get("thumbnail") or p.get("image"),
-							duration=None,
-							source="ListenNotes",
-							publisher=p.get("publisher"),
-							language=p.get("language"),
-						)
-					)
-			return podcasts
-	except Exception:
-		return []
+	resp = await provider_request("listen_notes", "GET", url, headers=headers)
+	resp.raise_for_status()
+	return map_curated(loads(resp.content))
 
-async def search_podcasts(query: str) -> List[Podcast]:
+async def search_podcasts(query: str, offset: int = 0, page_size: int = SEARCH_PAGE_SIZE) -> List[Podcast]:
 	q = sanitize_query(query)
 	if not q:
 		return []
+	page_size = max(1, min(page_size, SEARCH_PAGE_SIZE))
+	return await provider_cache.get_or_fetch(
+		search_key("listen_notes", q, page_size, offset), "listen_notes", lambda: _search_podcasts(q, offset, page_size)
+	)
+
+async def _search_podcasts(q: str, offset: int, page_size: int) -> List[Podcast]:
 	url = f"{LISTEN_NOTES_BASE}/search"
-	params = {"q": q, "type": "episode", "offset": 0, "len_min": 1, "len_max": 300}
-	try:
-		async with httpx.AsyncClient(timeout=15.0) as client:
-			resp = await client.get(url, params=params, headers=headers)
-			resp.raise_for_status()
-			data = resp.json()
-			results = data.get("results", [])
-			podcasts = [await _map_episode_to_podcast(item) for item in results]
-			return podcasts
-	except Exception:
-		return []
+	params = {"q": q, "type": "episode", "offset": offset, "page_size": page_size, "len_min": 1, "len_max": 300}
+	resp = await provider_request("listen_notes", "GET", url, params=params, headers=headers)
+	resp.raise_for_status()
+	return map_search(loads(resp.content))
+
+
+
+async def _fetch_batch(kind: str, ids: List[str]) -> List[Dict[str, Any]]:
+	if len(ids) > BATCH_LIMIT:
+		raise ValueError(f"At most {BATCH_LIMIT} ids per request")
+	resp = await provider_request("listen_notes", "POST", f"{LISTEN_NOTES_BASE}/{kind}", data={"ids": ",".join(ids)}, headers=headers)
+	resp.raise_for_status()
+	return [item for item in loads(resp.content).get(kind) or [] if item and item.get("id")]
 
+async def fetch_by_ids(ids: List[str]) -> Dict[str, Optional[Podcast]]:
+	"""Batch lookup for catalog ids, which may be episodes (from search) or podcasts (from curated lists).
 
+	Episodes are tried first and the remainder as podcasts; ids found in neither map to None.
+	Raises on provider errors, like ``spotify_agent.fetch_episodes``.
+	"""
+	found: Dict[str, Podcast] = {}
+	for item in await _fetch_batch("episodes", ids):
+		found[str(item["id"])] = _map_episode_to_podcast(item)
+	rest = [i for i in ids if i not in found]
+	if rest:
+		for item in await _fetch_batch("podcasts", rest):
+			found[str(item["id"])] = _map_curated_podcast(item)
+	return {i: found.get(i) for i in ids}
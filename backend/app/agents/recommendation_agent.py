@@ -1,9 +1,10 @@
 # recommendation_agent.py
 
 from fastapi import FastAPI, HTTPException
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import requests
 from pymongo import MongoClient
+from ..services.candidate_filter import CandidateBatch, rank_candidates
 
 # MongoDB connection (for storing recommendations history if needed)
 client = MongoClient("mongodb+srv://<username>:<password>@<cluster_url>/")
@@ -29,7 +30,7 @@ def get_user_preferences(user_id: str) -> Dict[str, Any]:
 
 # Recommendation endpoint
 @app.post("/recommend/")
-def recommend(user_id: str, podcasts: List[Dict[str, Any]]):
+def recommend(user_id: str, podcasts: List[Dict[str, Any]], limit: Optional[int] = None):
     """
     podcasts input format:
     [
@@ -42,27 +43,16 @@ def recommend(user_id: str, podcasts: List[Dict[str, Any]]):
         },
         ...
     ]
+
+    Matches come back best first, each with a ``score`` in [0, 1]: the weighted share of the
+    user's topics found in the title (full weight) or description (half weight).
     """
 
     # 1. Get user preferences
     preferences = get_user_preferences(user_id)
 
-    # 2. Apply filtering
-    filtered = []
-    for podcast in podcasts:
-        if preferences["language"].lower() != podcast["language"].lower():
-            continue
-        if podcast["genre"] not in preferences["genres"]:
-            continue
-        if podcast["duration"] > preferences["max_duration"]:
-            continue
-
-        # Simple topic match in description/title
-        if not any(topic.lower() in (podcast["title"] + podcast["description"]).lower()
-                   for topic in preferences["topics"]):
-            continue
-
-        filtered.append(podcast)
+    # 2. Filter on language/genre/duration and rank by topic match
+    filtered = rank_candidates(podcasts, preferences, limit)
 
     # 3. Save recommendation history
     recommendations_collection.insert_one({
@@ -75,3 +65,33 @@ def recommend(user_id: str, podcasts: List[Dict[str, Any]]):
         "count": len(filtered),
         "recommendations": filtered
     }
+
+
+# Batch recommendation endpoint: one candidate list ranked for many users
+@app.post("/recommend/batch/")
+def recommend_batch(user_ids: List[str], podcasts: List[Dict[str, Any]], limit: Optional[int] = None):
+    """
+    Same podcasts input format as /recommend/. The candidate columns are built once and every
+    user's preferences are applied to them, so per-user cost is the masks and the topic scan.
+    """
+
+    # 1. Build the candidate columns once
+    batch = CandidateBatch(podcasts)
+
+    # 2. Rank for each user
+    results = []
+    for user_id in dict.fromkeys(user_ids):
+        filtered = batch.ranked(get_user_preferences(user_id), limit)
+        results.append({
+            "user_id": user_id,
+            "count": len(filtered),
+            "recommendations": filtered
+        })
+
+    # 3. Save recommendation history
+    if results:
+        recommendations_collection.insert_many([
+            {"user_id": r["user_id"], "recommended": r["recommendations"]} for r in results
+        ])
+
+    return {"results": results}
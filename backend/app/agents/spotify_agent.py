@@ -1,93 +1,214 @@
+import asyncio
 import base64
 import time
 from typing import Any, Dict, List, Optional, Set
-import httpx
 from ..models import Podcast
 from ..utils.sanitize import sanitize_query
+from ..utils.fastjson import loads
 from ..config import settings
+from ..services.resilience import ProviderUnavailable, provider_request
+from ..services.provider_cache import provider_cache, search_key
 
 TOKEN_URL = "https://accounts.spotify.com/api/token"
 SEARCH_URL = "https://api.spotify.com/v1/search"
+EPISODES_URL = "https://api.spotify.com/v1/episodes"
+EPISODES_BATCH = 50
 
-_auth_cache: Dict[str, Any] = {"token": None, "expires_at": 0}
+class SpotifyTokenManager:
+	"""Client-credentials token holder with single-flight refresh ahead of expiry."""
 
-async def _get_access_token() -> Optional[str]:
-	client_id = settings.SPOTIFY_CLIENT_ID
-	client_secret = settings.SPOTIFY_CLIENT_SECRET
-	if not client_id or not client_secret:
-		return None
-	if _auth_cache["token"] and time.time() < _auth_cache["expires_at"] - 30:
-		return _auth_cache["token"]
-	basic = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
-	headers = {"Authorization": f"Basic {basic}", "Content-Type": "application/x-www-form-urlencoded"}
-	data = {"grant_type": "client_credentials"}
-	try:
-		async with httpx.AsyncClient(timeout=15.0) as client:
-			resp = await client.post(TOKEN_URL, data=data, headers=headers)
+	def __init__(self) -> None:
+		self.token: Optional[str] = None
+		self.expires_at: float = 0
+		self.lifetime: float = 0
+		self.failures = 0
+		self.next_attempt_at: float = 0
+		self._inflight: Optional[asyncio.Task] = None
+		self._background: Optional[asyncio.Task] = None
+
+	def _credentials(self) -> Optional[str]:
+		client_id = settings.SPOTIFY_CLIENT_ID
+		client_secret = settings.SPOTIFY_CLIENT_SECRET
+		if not client_id or not client_secret:
+			return None
+		return base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
+
+	def _valid(self) -> bool:
+		return bool(self.token) and time.time() < self.expires_at - min(30, self.lifetime / 4)
+
+	async def get_token(self) -> Optional[str]:
+		if self._valid():
+			return self.token
+		if time.time() < self.next_attempt_at:
+			return None
+		return await self.refresh()
+
+	async def refresh(self) -> Optional[str]:
+		if self._inflight is None or self._inflight.done():
+			self._inflight = asyncio.create_task(self._fetch())
+		return await asyncio.shield(self._inflight)
+
+	async def _fetch(self) -> Optional[str]:
+		basic = self._credentials()
+		if not basic:
+			return None
+		headers = {"Authorization": f"Basic {basic}", "Content-Type": "application/x-www-form-urlencoded"}
+		data = {"grant_type": "client_credentials"}
+		try:
+			resp = await provider_request("spotify", "POST", TOKEN_URL, data=data, headers=headers)
 			resp.raise_for_status()
 			payload = resp.json()
 			access_token = payload.get("access_token")
-			expires_in = int(payload.get("expires_in", 3600))
-			_auth_cache["token"] = access_token
-			_auth_cache["expires_at"] = time.time() + expires_in
-			return access_token
-	except Exception:
-		return None
-
-async def search_episodes(query: str, limit: int = 12) -> List[Podcast]:
+			if not access_token:
+				raise ValueError("token response without access_token")
+			self.token = access_token
+			self.lifetime = int(payload.get("expires_in", 3600))
+			self.expires_at = time.time() + self.lifetime
+			self.failures = 0
+			self.next_attempt_at = 0
+		except Exception:
+			self.failures += 1
+			backoff = min(settings.SPOTIFY_TOKEN_BACKOFF_BASE * 2 ** (self.failures - 1), settings.SPOTIFY_TOKEN_BACKOFF_MAX)
+			self.next_attempt_at = time.time() + backoff
+		return self.token if self._valid() else None
+
+	def _next_refresh_delay(self) -> float:
+		now = time.time()
+		if self.next_attempt_at > now:
+			return self.next_attempt_at - now
+		if not self.token:
+			return 0
+		margin = min(settings.SPOTIFY_TOKEN_REFRESH_MARGIN, self.lifetime / 2)
+		return max(self.expires_at - margin - now, 0)
+
+	async def _run(self) -> None:
+		while True:
+			await asyncio.sleep(self._next_refresh_delay())
+			await self.refresh()
+
+	async def start(self) -> None:
+		if self._credentials() and self._background is None:
+			self._background = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		tasks = [t for t in (self._background, self._inflight) if t is not None and not t.done()]
+		self._background = None
+		for task in tasks:
+			task.cancel()
+		await asyncio.gather(*tasks, return_exceptions=True)
+
+token_manager = SpotifyTokenManager()
+
+async def _get_access_token() -> Optional[str]:
+	return await token_manager.get_token()
+
+# Provider payloads are trusted: build models with model_construct and skip pydantic validation.
+def _map_episode(item: Dict[str, Any]) -> Podcast:
+	pid = item.get("id")
+	images = item.get("images")
+	duration_ms = item.get("duration_ms")
+	return Podcast.model_construct(
+		id=pid,
+		title=item.get("name") or "Untitled",
+		description=item.get("description"),
+		# Client-credentials tokens only expose the 30s preview clip, when there is one.
+		audio_url=item.get("audio_preview_url") or None,
+		thumbnail=(images[0].get("url") if images else None),
+		duration=int(duration_ms / 1000) if duration_ms else None,
+		source="Spotify",
+		publisher=(item.get("show") or {}).get("publisher"),
+		language=None,
+		external_url=(f"https://open.spotify.com/episode/{pid}" if pid else None),
+	)
+
+def map_search(data: Dict[str, Any]) -> List[Podcast]:
+	return [_map_episode(item) for item in (data.get("episodes") or {}).get("items", []) if item]
+
+async def search_episodes(query: str, limit: int = 12, offset: int = 0) -> List[Podcast]:
 	q = sanitize_query(query)
 	if not q:
 		return []
+	return await provider_cache.get_or_fetch(
+		search_key("spotify", q, limit, offset), "spotify", lambda: _search_episodes(q, limit, offset)
+	)
+
+async def _search_episodes(q: str, limit: int, offset: int) -> List[Podcast]:
 	token = await _get_access_token()
 	if not token:
-		return []
+		raise ProviderUnavailable("spotify", "no access token")
 	headers = {"Authorization": f"Bearer {token}"}
-	params = {"q": q, "type": "episode", "limit": limit}
-	try:
-		async with httpx.AsyncClient(timeout=15.0) as client:
-			resp = await client.get(SEARCH_URL, params=params, headers=headers)
-			resp.raise_for_status()
-			data = resp.json()
-			items = data.get("episodes", {}).get("items", [])
-			podcasts: List[Podcast] = []
-			for item in items:
-				pid = item.get("id")
-				# Try to get audio preview URL if available
-				audio_url = None
-				if item.get("audio_preview_url"):
-					audio_url = item.get("audio_preview_url")
-				
-				podcasts.append(
-					Podcast(
-						id=pid,
-						title=item.get("name") or "Untitled",
-						description=item.get("description"),
-						audio_url=audio_url,  # Use preview URL if available
-						thumbnail=(item.get("images", [{}])[0].get("url") if item.get("images") else None),
-						duration=int(item.get("duration_ms", 0) / 1000) if item.get("duration_ms") else None,
-						source="Spotify",
-						publisher=(item.get("show", {}).get("publisher")),
-						language=None,
-						external_url=(f"https://open.spotify.com/episode/{pid}" if pid else None),
-					)
-				)
-			return podcasts
-	except Exception:
-		return []
+	params = {"q": q, "type": "episode", "limit": limit, "offset": offset}
+	resp = await provider_request("spotify", "GET", SEARCH_URL, params=params, headers=headers)
+	resp.raise_for_status()
+	return map_search(loads(resp.content))
 
-async def trending_episodes() -> List[Podcast]:
-	queries = ["top podcast", "trending", "news", "daily"]
+async def fetch_episodes(ids: List[str]) -> Dict[str, Optional[Podcast]]:
+	"""Look up up to ``EPISODES_BATCH`` episodes by id; ids Spotify no longer knows map to None.
+
+	Unlike the search helpers this raises on provider errors, so callers can tell a failed
+	lookup from a missing episode.
+	"""
+	if len(ids) > EPISODES_BATCH:
+		raise ValueError(f"At most {EPISODES_BATCH} ids per request")
+	token = await _get_access_token()
+	if not token:
+		raise ProviderUnavailable("spotify", "no access token")
+	headers = {"Authorization": f"Bearer {token}"}
+	params = {"ids": ",".join(ids), "market": settings.SPOTIFY_MARKET}
+	resp = await provider_request("spotify", "GET", EPISODES_URL, params=params, headers=headers)
+	resp.raise_for_status()
+	found = {item["id"]: _map_episode(item) for item in loads(resp.content).get("episodes") or [] if item and item.get("id")}
+	return {i: found.get(i) for i in ids}
+
+def _merge_batches(batches: List[List[Podcast]], target: int) -> List[Podcast]:
 	seen: Set[str] = set()
 	results: List[Podcast] = []
-	for q in queries:
-		batch = await search_episodes(q, limit=8)
+	for batch in batches:
 		for p in batch:
 			pid = p.id or f"{p.title}:{p.publisher}"
 			if pid and pid not in seen:
 				seen.add(pid)
 				results.append(p)
-				if len(results) >= 18:
+				if len(results) >= target:
 					return results
 	return results
 
+async def trending_episodes(target: int = 18, allow_stale: bool = True) -> List[Podcast]:
+	return await provider_cache.get_or_fetch(
+		f"spotify:trending:{target}", "spotify", lambda: _trending_episodes(target),
+		ttl=settings.CACHE_TTL_TRENDING, allow_stale=allow_stale,
+	)
 
+async def _trending_episodes(target: int) -> List[Podcast]:
+	queries = settings.SPOTIFY_TRENDING_SEEDS
+	if not queries:
+		return []
+	semaphore = asyncio.Semaphore(max(settings.SPOTIFY_TRENDING_CONCURRENCY, 1))
+
+	async def run_seed(q: str) -> List[Podcast]:
+		async with semaphore:
+			return await search_episodes(q, limit=settings.SPOTIFY_TRENDING_SEED_LIMIT)
+
+	tasks = [asyncio.create_task(run_seed(q)) for q in queries]
+	loop = asyncio.get_running_loop()
+	deadline = loop.time() + settings.SPOTIFY_TRENDING_DEADLINE
+	pending = set(tasks)
+	try:
+		while pending:
+			remaining = deadline - loop.time()
+			if remaining <= 0:
+				break
+			_, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+			# Seeds are merged in priority order, so only the completed prefix can be final.
+			prefix: List[List[Podcast]] = []
+			for task in tasks:
+				if not task.done():
+					break
+				prefix.append(task.result() if task.exception() is None else [])
+			if len(_merge_batches(prefix, target)) >= target:
+				break
+	finally:
+		for task in pending:
+			task.cancel()
+	batches = [task.result() for task in tasks if task.done() and not task.cancelled() and task.exception() is None]
+	return _merge_batches(batches, target)
@@ -7,5 +7,98 @@ class Settings:
 	SPOTIFY_CLIENT_SECRET: str = os.getenv("SPOTIFY_CLIENT_SECRET", "bd434fc651ea4b57b6cd204da21050e3")
 	JWT_SECRET: str = os.getenv("JWT_SECRET", "dev-secret-change-me")
 	JWT_EXPIRE_MINUTES: int = int(os.getenv("JWT_EXPIRE_MINUTES", "60"))
+	PROVIDER_TIMEOUT: float = float(os.getenv("PROVIDER_TIMEOUT", "15"))
+	PROVIDER_HTTP2: bool = os.getenv("PROVIDER_HTTP2", "true").lower() in ("1", "true", "yes")
+	PROVIDER_KEEPALIVE_EXPIRY: float = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY", "30"))
+	PROVIDER_SIMULATOR: str = os.getenv("PROVIDER_SIMULATOR", "")
+	SPOTIFY_MAX_CONNECTIONS: int = int(os.getenv("SPOTIFY_MAX_CONNECTIONS", "20"))
+	SPOTIFY_MAX_KEEPALIVE: int = int(os.getenv("SPOTIFY_MAX_KEEPALIVE", "10"))
+	LISTEN_NOTES_MAX_CONNECTIONS: int = int(os.getenv("LISTEN_NOTES_MAX_CONNECTIONS", "10"))
+	LISTEN_NOTES_MAX_KEEPALIVE: int = int(os.getenv("LISTEN_NOTES_MAX_KEEPALIVE", "5"))
+	SPOTIFY_RATE: float = float(os.getenv("SPOTIFY_RATE", "10"))
+	SPOTIFY_BURST: float = float(os.getenv("SPOTIFY_BURST", "20"))
+	LISTEN_NOTES_RATE: float = float(os.getenv("LISTEN_NOTES_RATE", "5"))
+	LISTEN_NOTES_BURST: float = float(os.getenv("LISTEN_NOTES_BURST", "10"))
+	PROVIDER_MAX_QUEUE_WAIT: float = float(os.getenv("PROVIDER_MAX_QUEUE_WAIT", "1"))
+	RETRY_AFTER_DEFAULT: float = float(os.getenv("RETRY_AFTER_DEFAULT", "5"))
+	RETRY_AFTER_MAX: float = float(os.getenv("RETRY_AFTER_MAX", "300"))
+	BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+	BREAKER_RESET_TIMEOUT: float = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+	SPOTIFY_BUDGET: float = float(os.getenv("SPOTIFY_BUDGET", "3"))
+	LISTEN_NOTES_BUDGET: float = float(os.getenv("LISTEN_NOTES_BUDGET", "3"))
+	CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+	CACHE_TTL_SPOTIFY: float = float(os.getenv("CACHE_TTL_SPOTIFY", "600"))
+	CACHE_TTL_LISTEN_NOTES: float = float(os.getenv("CACHE_TTL_LISTEN_NOTES", "1800"))
+	CACHE_NEGATIVE_TTL: float = float(os.getenv("CACHE_NEGATIVE_TTL", "60"))
+	CACHE_STALE_TTL: float = float(os.getenv("CACHE_STALE_TTL", "3600"))
+	CACHE_TTL_TRENDING: float = float(os.getenv("CACHE_TTL_TRENDING", "900"))
+	CACHE_L2_BACKEND: str = os.getenv("CACHE_L2_BACKEND", "mongo").lower()
+	CACHE_L2_PATH: str = os.getenv("CACHE_L2_PATH", "provider_cache.sqlite3")
+	CATALOG_BULK_BATCH: int = int(os.getenv("CATALOG_BULK_BATCH", "1000"))
+	WRITE_BEHIND_BATCH: int = int(os.getenv("WRITE_BEHIND_BATCH", "500"))
+	WRITE_BEHIND_INTERVAL: float = float(os.getenv("WRITE_BEHIND_INTERVAL", "2"))
+	WRITE_BEHIND_MAX_PENDING: int = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000"))
+	WRITE_BEHIND_MAX_WAIT: float = float(os.getenv("WRITE_BEHIND_MAX_WAIT", "0.5"))
+	SEARCH_INDEX_ENABLED: bool = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+	SEARCH_INDEX_REBUILD_INTERVAL: float = float(os.getenv("SEARCH_INDEX_REBUILD_INTERVAL", "3600"))
+	SEARCH_INDEX_RETRY_INTERVAL: float = float(os.getenv("SEARCH_INDEX_RETRY_INTERVAL", "60"))
+	SIMILAR_ENABLED: bool = os.getenv("SIMILAR_ENABLED", "true").lower() in ("1", "true", "yes")
+	SIMILAR_TOP_K: int = int(os.getenv("SIMILAR_TOP_K", "20"))
+	SIMILAR_FEATURES: int = int(os.getenv("SIMILAR_FEATURES", str(2 ** 18)))
+	SIMILAR_MAX_DF: float = float(os.getenv("SIMILAR_MAX_DF", "0.1"))
+	SIMILAR_QUERY_TERMS: int = int(os.getenv("SIMILAR_QUERY_TERMS", "25"))
+	SIMILAR_BATCH: int = int(os.getenv("SIMILAR_BATCH", "512"))
+	SIMILAR_REBUILD_INTERVAL: float = float(os.getenv("SIMILAR_REBUILD_INTERVAL", "21600"))
+	ANN_INDEX_PATH: str = os.getenv("ANN_INDEX_PATH", "ann_index")
+	ANN_DIM: int = int(os.getenv("ANN_DIM", "256"))
+	ANN_TABLES: int = int(os.getenv("ANN_TABLES", "32"))
+	ANN_BITS: int = int(os.getenv("ANN_BITS", "12"))
+	ANN_PROBES: int = int(os.getenv("ANN_PROBES", "4"))
+	ANN_RELOAD_INTERVAL: float = float(os.getenv("ANN_RELOAD_INTERVAL", "10"))
+	SUGGEST_LIMIT: int = int(os.getenv("SUGGEST_LIMIT", "20"))
+	SUGGEST_MIN_USERS: int = int(os.getenv("SUGGEST_MIN_USERS", "2"))
+	SUGGEST_WINDOW_DAYS: int = int(os.getenv("SUGGEST_WINDOW_DAYS", "90"))
+	SUGGEST_HALF_LIFE_DAYS: float = float(os.getenv("SUGGEST_HALF_LIFE_DAYS", "14"))
+	SUGGEST_REFRESH_INTERVAL: float = float(os.getenv("SUGGEST_REFRESH_INTERVAL", "300"))
+	SUGGEST_USER_MAX: int = int(os.getenv("SUGGEST_USER_MAX", "200"))
+	TRENDING_REFRESH_INTERVAL: float = float(os.getenv("TRENDING_REFRESH_INTERVAL", "3600"))
+	TRENDING_JITTER: float = float(os.getenv("TRENDING_JITTER", "0.1"))
+	TRENDING_RETRY_INTERVAL: float = float(os.getenv("TRENDING_RETRY_INTERVAL", "60"))
+	CATALOG_STALE_AFTER_DAYS: float = float(os.getenv("CATALOG_STALE_AFTER_DAYS", "7"))
+	CATALOG_REFRESH_INTERVAL: float = float(os.getenv("CATALOG_REFRESH_INTERVAL", "0"))
+	CATALOG_REFRESH_LIMIT: int = int(os.getenv("CATALOG_REFRESH_LIMIT", "5000"))
+	CATALOG_REFRESH_CONCURRENCY: int = int(os.getenv("CATALOG_REFRESH_CONCURRENCY", "4"))
+	SPOTIFY_MARKET: str = os.getenv("SPOTIFY_MARKET", "US")
+	DEDUP_ENABLED: bool = os.getenv("DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+	DEDUP_PERMUTATIONS: int = int(os.getenv("DEDUP_PERMUTATIONS", "32"))
+	DEDUP_BANDS: int = int(os.getenv("DEDUP_BANDS", "8"))
+	DEDUP_THRESHOLD: float = float(os.getenv("DEDUP_THRESHOLD", "0.7"))
+	DEDUP_BACKFILL: bool = os.getenv("DEDUP_BACKFILL", "false").lower() in ("1", "true", "yes")
+	RECOMMENDATIONS_DEADLINE: float = float(os.getenv("RECOMMENDATIONS_DEADLINE", "3"))
+	RECOMMENDATIONS_CACHE_TTL: float = float(os.getenv("RECOMMENDATIONS_CACHE_TTL", "1800"))
+	RECOMMENDATIONS_CACHE_USERS: int = int(os.getenv("RECOMMENDATIONS_CACHE_USERS", "10000"))
+	RECOMMENDATIONS_PRECOMPUTE_INTERVAL: float = float(os.getenv("RECOMMENDATIONS_PRECOMPUTE_INTERVAL", "0"))
+	RECOMMENDATIONS_PRECOMPUTE_CONCURRENCY: int = int(os.getenv("RECOMMENDATIONS_PRECOMPUTE_CONCURRENCY", "8"))
+	RECOMMENDATIONS_PRECOMPUTE_MAX_AGE: float = float(os.getenv("RECOMMENDATIONS_PRECOMPUTE_MAX_AGE", "86400"))
+	RECOMMENDATIONS_ACTIVE_DAYS: int = int(os.getenv("RECOMMENDATIONS_ACTIVE_DAYS", "7"))
+	ITEMCF_ENABLED: bool = os.getenv("ITEMCF_ENABLED", "true").lower() in ("1", "true", "yes")
+	ITEMCF_TOP_K: int = int(os.getenv("ITEMCF_TOP_K", "20"))
+	ITEMCF_MAX_USER_ITEMS: int = int(os.getenv("ITEMCF_MAX_USER_ITEMS", "500"))
+	ITEMCF_BLOCK: int = int(os.getenv("ITEMCF_BLOCK", "2048"))
+	ITEMCF_REFRESH_INTERVAL: float = float(os.getenv("ITEMCF_REFRESH_INTERVAL", "600"))
+	ITEMCF_REBUILD_INTERVAL: float = float(os.getenv("ITEMCF_REBUILD_INTERVAL", "86400"))
+	ALS_MODEL_PATH: str = os.getenv("ALS_MODEL_PATH", "als_model")
+	ALS_FACTORS: int = int(os.getenv("ALS_FACTORS", "64"))
+	ALS_ITERATIONS: int = int(os.getenv("ALS_ITERATIONS", "10"))
+	ALS_REGULARIZATION: float = float(os.getenv("ALS_REGULARIZATION", "0.05"))
+	ALS_ALPHA: float = float(os.getenv("ALS_ALPHA", "20"))
+	ALS_RELOAD_INTERVAL: float = float(os.getenv("ALS_RELOAD_INTERVAL", "10"))
+	SPOTIFY_TOKEN_REFRESH_MARGIN: float = float(os.getenv("SPOTIFY_TOKEN_REFRESH_MARGIN", "300"))
+	SPOTIFY_TOKEN_BACKOFF_BASE: float = float(os.getenv("SPOTIFY_TOKEN_BACKOFF_BASE", "1"))
+	SPOTIFY_TOKEN_BACKOFF_MAX: float = float(os.getenv("SPOTIFY_TOKEN_BACKOFF_MAX", "60"))
+	SPOTIFY_TRENDING_SEEDS: list[str] = [q.strip() for q in os.getenv("SPOTIFY_TRENDING_SEEDS", "top podcast,trending,news,daily").split(",") if q.strip()]
+	SPOTIFY_TRENDING_SEED_LIMIT: int = int(os.getenv("SPOTIFY_TRENDING_SEED_LIMIT", "8"))
+	SPOTIFY_TRENDING_CONCURRENCY: int = int(os.getenv("SPOTIFY_TRENDING_CONCURRENCY", "4"))
+	SPOTIFY_TRENDING_DEADLINE: float = float(os.getenv("SPOTIFY_TRENDING_DEADLINE", "5"))
 
 settings = Settings()
@@ -18,3 +18,14 @@ async def get_podcasts_collection() -> AsyncIOMotorCollection:
 	return db.get_collection("podcasts")
 
 
+
+_cache_indexes_ready = False
+
+async def get_cache_collection() -> AsyncIOMotorCollection:
+	global _cache_indexes_ready
+	db = await get_database()
+	collection = db.get_collection("provider_cache")
+	if not _cache_indexes_ready:
+		await collection.create_index("expires_at", expireAfterSeconds=0)
+		_cache_indexes_ready = True
+	return collection
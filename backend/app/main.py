@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .routers.podcasts import router as podcasts_router
@@ -5,8 +6,67 @@ from .routers.auth import router as auth_router
 from .routers.user import router as user_router
 from .routers.user_management import router as user_management_router
 from .routers.admin import router as admin_router
+from .routers.ops import router as ops_router
+from .services.http_clients import provider_clients
+from .agents.spotify_agent import token_manager
+from .services.catalog import catalog_writer, ensure_catalog_indexes
+from .db import get_podcasts_collection
+from .services.search_index import catalog_search
+from .services.similarity import catalog_similarity
+from .services.als import catalog_als
+from .services.ann_index import catalog_ann
+from .services.suggest import query_suggester
+from .services.trending import trending_snapshots
+from .services.catalog_refresh import catalog_refresher
+from .services.dedup import catalog_dedup
+from .services.recommendations import ensure_recommendation_indexes, recommendation_precomputer
+from .services.item_cf import item_cf
 
-app = FastAPI(title="Podcast Retrieval System")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	await provider_clients.start()
+	await token_manager.start()
+	await catalog_writer.start()
+	try:
+		await ensure_catalog_indexes(await get_podcasts_collection())
+	except Exception as e:
+		print(f"Error creating catalog indexes: {e}")
+	try:
+		await ensure_recommendation_indexes()
+	except Exception as e:
+		print(f"Error creating recommendation indexes: {e}")
+	await catalog_search.start(await get_podcasts_collection())
+	await catalog_similarity.start(await get_podcasts_collection())
+	await catalog_dedup.start(await get_podcasts_collection())
+	await query_suggester.start()
+	await trending_snapshots.start()
+	await catalog_refresher.start()
+	await recommendation_precomputer.start()
+	await item_cf.start()
+	try:
+		catalog_ann.load()
+	except Exception as e:
+		print(f"Error loading ANN index: {e}")
+	try:
+		catalog_als.load()
+	except Exception as e:
+		print(f"Error loading ALS model: {e}")
+	try:
+		yield
+	finally:
+		await trending_snapshots.stop()
+		await catalog_refresher.stop()
+		await recommendation_precomputer.stop()
+		await item_cf.stop()
+		await catalog_writer.stop()
+		await catalog_search.stop()
+		await catalog_similarity.stop()
+		await catalog_dedup.stop()
+		await query_suggester.stop()
+		await token_manager.stop()
+		await provider_clients.aclose()
+
+app = FastAPI(title="Podcast Retrieval System", lifespan=lifespan)
 
 app.add_middleware(	CORSMiddleware,
 	allow_origins=[
@@ -16,6 +76,7 @@ app.add_middleware(	CORSMiddleware,
 	allow_credentials=True,
 	allow_methods=["*"],
 	allow_headers=["*"],
+	expose_headers=["Server-Timing", "X-Providers", "X-Next-Cursor", "X-Snapshot-Age"],
 )
 
 app.include_router(podcasts_router, prefix="/podcasts", tags=["podcasts"])
@@ -23,3 +84,4 @@ app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(user_router, prefix="/user", tags=["user"])
 app.include_router(user_management_router, tags=["user-management"])
 app.include_router(admin_router, prefix="/admin", tags=["admin"])
+app.include_router(ops_router, prefix="/ops", tags=["ops"])
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from datetime import datetime, timedelta
 from typing import Optional
@@ -12,6 +13,7 @@ from ..config import settings
 router = APIRouter()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+optional_bearer = HTTPBearer(auto_error=False)
 
 class RegisterRequest(BaseModel):
 	email: EmailStr
@@ -31,6 +33,21 @@ async def _create_jwt(user_id: str, email: str) -> str:
 	payload = {"sub": user_id, "email": email, "exp": expires}
 	return jwt.encode(payload, settings.JWT_SECRET, algorithm="HS256")
 
+async def optional_user_email(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer)) -> Optional[str]:
+	"""Email of the user whose token is sent, or None for anonymous requests; a bad token is a 401."""
+	if credentials is None:
+		return None
+	try:
+		payload = jwt.decode(credentials.credentials, settings.JWT_SECRET, algorithms=["HS256"])
+	except jwt.ExpiredSignatureError:
+		raise HTTPException(status_code=401, detail="Token expired")
+	except jwt.InvalidTokenError:
+		raise HTTPException(status_code=401, detail="Invalid token")
+	email = payload.get("email")
+	if not email or payload.get("type") == "admin":
+		raise HTTPException(status_code=401, detail="Invalid token")
+	return str(email).lower()
+
 @router.post("/register", response_model=AuthResponse)
 async def register(req: RegisterRequest):
 	db = await get_database()
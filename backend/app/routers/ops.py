@@ -0,0 +1,107 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Any, Dict
+from ..services.http_clients import provider_clients
+from ..services.provider_cache import provider_cache
+from ..services.resilience import provider_guards
+from ..services.catalog import catalog_writer
+from ..services.search_index import catalog_search
+from ..services.similarity import catalog_similarity
+from ..services.als import catalog_als
+from ..services.ann_index import catalog_ann
+from ..services.suggest import query_suggester
+from ..services.trending import trending_snapshots
+from ..services.catalog_refresh import catalog_refresher
+from ..services.dedup import catalog_dedup
+from ..services.recommendations import recommendation_precomputer, user_recommendations
+from ..services.item_cf import item_cf
+
+router = APIRouter()
+
+@router.get("/http")
+async def http_stats() -> Dict[str, Any]:
+	return provider_clients.stats()
+
+@router.get("/providers")
+async def provider_health() -> Dict[str, Any]:
+	return {provider: guard.stats() for provider, guard in provider_guards.items()}
+
+@router.get("/cache")
+async def cache_stats() -> Dict[str, Any]:
+	return provider_cache.stats()
+
+@router.delete("/cache")
+async def invalidate_cache(prefix: str = Query("", max_length=200)) -> Dict[str, int]:
+	return await provider_cache.invalidate(prefix)
+
+@router.get("/write-behind")
+async def write_behind_metrics() -> Dict[str, Any]:
+	return catalog_writer.metrics()
+
+@router.get("/search-index")
+async def search_index_stats() -> Dict[str, Any]:
+	return catalog_search.stats()
+
+@router.get("/similarity")
+async def similarity_stats() -> Dict[str, Any]:
+	return catalog_similarity.stats()
+
+@router.get("/ann")
+async def ann_stats() -> Dict[str, Any]:
+	return catalog_ann.stats()
+
+@router.post("/ann")
+async def reload_ann() -> Dict[str, Any]:
+	catalog_ann.load()
+	return catalog_ann.stats()
+
+@router.get("/suggest")
+async def suggest_stats() -> Dict[str, Any]:
+	return query_suggester.stats()
+
+@router.get("/trending")
+async def trending_stats() -> Dict[str, Any]:
+	return trending_snapshots.stats()
+
+@router.get("/catalog-refresh")
+async def catalog_refresh_stats() -> Dict[str, Any]:
+	return catalog_refresher.stats()
+
+@router.post("/catalog-refresh")
+async def run_catalog_refresh(limit: int = Query(1000, ge=1, le=100000)) -> Dict[str, Any]:
+	if catalog_refresher.running:
+		raise HTTPException(status_code=409, detail="A catalog refresh is already running")
+	return await catalog_refresher.run_once(limit)
+
+@router.get("/dedup")
+async def dedup_stats() -> Dict[str, Any]:
+	return catalog_dedup.stats()
+
+@router.get("/recommendations")
+async def recommendation_stats() -> Dict[str, Any]:
+	return {"cache": user_recommendations.stats(), "precompute": recommendation_precomputer.stats()}
+
+@router.post("/recommendations/precompute")
+async def run_recommendation_precompute(
+	limit: int = Query(1000, ge=1, le=1000000),
+	concurrency: int = Query(8, ge=1, le=64),
+) -> Dict[str, Any]:
+	if recommendation_precomputer.running:
+		raise HTTPException(status_code=409, detail="A recommendation precompute is already running")
+	return await recommendation_precomputer.run_once(limit=limit, concurrency=concurrency)
+
+@router.get("/item-cf")
+async def item_cf_stats() -> Dict[str, Any]:
+	return item_cf.stats()
+
+@router.post("/item-cf")
+async def rebuild_item_cf(full: bool = Query(False)) -> Dict[str, Any]:
+	return await item_cf.build(full)
+
+@router.get("/als")
+async def als_stats() -> Dict[str, Any]:
+	return catalog_als.stats()
+
+@router.post("/als")
+async def reload_als() -> Dict[str, Any]:
+	catalog_als.load()
+	return catalog_als.stats()
@@ -1,53 +1,181 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional
 from ..models import Podcast
-from ..agents.listennotes_agent import fetch_trending as ln_trending, search_podcasts as ln_search
-from ..agents.spotify_agent import search_episodes as spotify_search, trending_episodes as spotify_trending
 from ..db import get_podcasts_collection
+from ..utils.responses import podcast_list_response
+from ..utils.fastjson import dumps
+from ..services.catalog import (
+	SAVED_FIELDS, InvalidSavedCursor, catalog_writer, encode_id_cursor, iter_saved, load_podcasts, saved_document, saved_query,
+)
+from ..services.search_index import catalog_search
+from ..services.similarity import catalog_similarity
+from ..services.dedup import catalog_dedup
+from ..services.ann_index import catalog_ann
+from ..services.item_cf import item_cf
+from ..services.suggest import query_suggester
+from ..services.federation import timing_headers
+from ..services.trending import trending_snapshots
+from ..services.pagination import InvalidCursor, Offsets, StreamFailed, decode_cursor, encode_cursor, fetch_page, initial_offsets, stream_pages
+from .auth import optional_user_email
 
 router = APIRouter()
 
 async def _save_podcasts(podcasts: List[Podcast]) -> None:
-	collection = await get_podcasts_collection()
-	if not podcasts:
-		return
-	docs = []
-	for p in podcasts:
-		doc = p.model_dump(exclude_none=True)
-		if doc.get("id"):
-			doc["_id"] = doc.pop("id")
-		docs.append(doc)
-	if docs:
-		for doc in docs:
-			if "_id" in doc:
-				await collection.update_one({"_id": doc["_id"]}, {"$set": doc}, upsert=True)
-			else:
-				await collection.insert_one(doc)
+	if podcasts:
+		await catalog_writer.enqueue(podcasts)
 
 @router.get("/trending", response_model=List[Podcast])
-async def get_trending(provider: str = Query("listen_notes", pattern="^(listen_notes|spotify)$")):
-	if provider == "spotify":
-		podcasts = await spotify_trending()
+async def get_trending(provider: str = Query("listen_notes", pattern="^(listen_notes|spotify|all)$")):
+	providers = ["spotify", "listen_notes"] if provider == "all" else [provider]
+	podcasts, age, timings = await trending_snapshots.get(providers)
+	if provider == "all":
+		headers = timing_headers(timings)
 	else:
-		podcasts = await ln_trending()
-	await _save_podcasts(podcasts)
-	return podcasts
+		headers = {"X-Providers": ",".join(str(t["provider"]) for t in timings if t["count"])}
+	if age is not None:
+		headers["X-Snapshot-Age"] = str(int(age))
+	return podcast_list_response(podcasts, headers)
+
+def _page_offsets(query: str, provider: str, cursor: Optional[str]) -> Offsets:
+	if not cursor:
+		return initial_offsets(provider)
+	try:
+		return decode_cursor(cursor, query, provider)
+	except InvalidCursor as e:
+		raise HTTPException(status_code=400, detail=str(e))
+
+async def _local_search(query: str, offset: int, limit: int) -> Response:
+	hits = catalog_search.search(query, offset + limit)[offset:]
+	podcasts = catalog_dedup.collapse(await load_podcasts([doc_id for doc_id, _ in hits]))
+	headers: Dict[str, str] = {}
+	if len(hits) == limit:
+		headers["X-Next-Cursor"] = encode_cursor(query, {"local": offset + limit})
+	return podcast_list_response(podcasts, headers)
 
 @router.get("/search", response_model=List[Podcast])
-async def search(query: str = Query(..., min_length=1, max_length=200), provider: str = Query("listen_notes", pattern="^(listen_notes|spotify)$")):
-	if provider == "spotify":
-		podcasts = await spotify_search(query)
-	else:
-		podcasts = await ln_search(query)
+async def search(
+	query: str = Query(..., min_length=1, max_length=200),
+	provider: str = Query("listen_notes", pattern="^(listen_notes|spotify|all|local)$"),
+	cursor: Optional[str] = Query(None, max_length=512),
+	limit: int = Query(12, ge=1, le=50),
+):
+	offsets = _page_offsets(query, provider, cursor)
+	if provider == "local":
+		if not catalog_search.ready:
+			raise HTTPException(status_code=503, detail="Search index is still building")
+		return await _local_search(query, offsets["local"] or 0, limit)
+	podcasts, next_offsets, timings = await fetch_page(query, offsets, limit)
+	headers = timing_headers(timings)
+	next_cursor = encode_cursor(query, next_offsets)
+	if next_cursor:
+		headers["X-Next-Cursor"] = next_cursor
 	await _save_podcasts(podcasts)
-	return podcasts
+	return podcast_list_response(podcasts, headers)
+
+@router.get("/suggest")
+async def suggest(
+	prefix: str = Query(..., min_length=1, max_length=200),
+	limit: int = Query(8, ge=1, le=20),
+	email: Optional[str] = Depends(optional_user_email),
+) -> Dict[str, List[str]]:
+	# Personal suggestions only for the signed-in user; anonymous callers get the global list.
+	return query_suggester.suggest(prefix, email, limit)
+
+@router.get("/search/stream")
+async def search_stream(
+	query: str = Query(..., min_length=1, max_length=200),
+	provider: str = Query("listen_notes", pattern="^(listen_notes|spotify|all)$"),
+	cursor: Optional[str] = Query(None, max_length=512),
+	limit: int = Query(12, ge=1, le=50),
+	pages: int = Query(5, ge=1, le=100),
+):
+	offsets = _page_offsets(query, provider, cursor)
+
+	async def lines():
+		try:
+			async for page in stream_pages(query, offsets, limit, pages):
+				await _save_podcasts(page)
+				for p in page:
+					yield p.model_dump_json(exclude_none=True) + "\n"
+		except StreamFailed as e:
+			# The status line is already sent, so the failure is reported as a terminal line.
+			yield dumps({"error": str(e)}).decode() + "\n"
+
+	return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def _saved_fields(fields: Optional[str]) -> Optional[List[str]]:
+	if not fields:
+		return None
+	names = [f.strip() for f in fields.split(",") if f.strip() and f.strip() != "id"]
+	unknown = [f for f in names if f not in SAVED_FIELDS]
+	if unknown:
+		raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+	return names
+
+def _saved_query(cursor: Optional[str], source: Optional[str], language: Optional[str], publisher: Optional[str], collapse: bool):
+	try:
+		return saved_query(cursor, {"source": source, "language": language, "publisher": publisher}, collapse)
+	except InvalidSavedCursor as e:
+		raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/saved", response_model=List[Podcast])
-async def get_saved():
+async def get_saved(
+	cursor: Optional[str] = Query(None, max_length=512),
+	limit: int = Query(100, ge=1, le=500),
+	fields: Optional[str] = Query(None, max_length=200),
+	source: Optional[str] = Query(None, max_length=50),
+	language: Optional[str] = Query(None, max_length=50),
+	publisher: Optional[str] = Query(None, max_length=200),
+	collapse: bool = Query(False),
+):
+	names = _saved_fields(fields)
+	query = _saved_query(cursor, source, language, publisher, collapse)
+	collection = await get_podcasts_collection()
+	docs = [doc async for doc in iter_saved(collection, query, names, limit=limit, batch_size=limit)]
+	headers: Dict[str, str] = {}
+	if len(docs) == limit:
+		headers["X-Next-Cursor"] = encode_id_cursor(docs[-1]["_id"])
+	return Response(content=dumps([saved_document(d, names) for d in docs]), media_type="application/json", headers=headers)
+
+@router.get("/saved/stream")
+async def stream_saved(
+	fields: Optional[str] = Query(None, max_length=200),
+	source: Optional[str] = Query(None, max_length=50),
+	language: Optional[str] = Query(None, max_length=50),
+	publisher: Optional[str] = Query(None, max_length=200),
+	cursor: Optional[str] = Query(None, max_length=512),
+	collapse: bool = Query(False),
+):
+	names = _saved_fields(fields)
+	query = _saved_query(cursor, source, language, publisher, collapse)
 	collection = await get_podcasts_collection()
-	cursor = collection.find({}).limit(100)
-	results: List[Podcast] = []
-	async for doc in cursor:
-		pid = str(doc.get("_id")) if doc.get("_id") else None
-		results.append(Podcast(id=pid, **{k: v for k, v in doc.items() if k != "_id"}))
-	return results
+
+	async def lines():
+		async for doc in iter_saved(collection, query, names):
+			yield dumps(saved_document(doc, names)) + b"\n"
+
+	return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/{podcast_id}/similar", response_model=List[Podcast])
+async def similar_podcasts(
+	podcast_id: str,
+	limit: int = Query(10, ge=1, le=50),
+	method: str = Query("tfidf", pattern="^(tfidf|ann|cf)$"),
+):
+	if method == "ann":
+		if catalog_ann.current() is None:
+			raise HTTPException(status_code=503, detail="ANN index has not been built")
+		neighbours = catalog_ann.similar(podcast_id, limit)
+	elif method == "cf":
+		if not item_cf.ready:
+			raise HTTPException(status_code=503, detail="Collaborative filtering model is still building")
+		neighbours = item_cf.similar(podcast_id, limit)
+	else:
+		neighbours = catalog_similarity.similar(podcast_id, limit)
+		if neighbours is None and not catalog_similarity.ready:
+			raise HTTPException(status_code=503, detail="Similarity index is still building")
+	if neighbours is None:
+		raise HTTPException(status_code=404, detail="Podcast not found in catalog")
+	podcasts = await load_podcasts([doc_id for doc_id, _ in neighbours])
+	return podcast_list_response(podcasts)
@@ -0,0 +1,243 @@
+"""Implicit-feedback ALS over listens and favorites, served from memory-mapped .npy factors.
+
+Each training run publishes a new version to an ``mmap_store`` that every worker maps read-only,
+so they share one copy in the page cache. Train or replace it with::
+
+	python -m app.services.als train [--out als_model] [--factors 64] [--iterations 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from ..config import settings
+from .mmap_store import MappedHandle, mapped, new_version, publish, resolve
+from .item_cf import interaction_matrix, load_interactions
+
+class ImplicitALS:
+	"""Hu, Koren & Volinsky implicit ALS, solved with a few warm-started conjugate gradient steps per sweep.
+
+	Confidence is ``1 + alpha * weight`` for observed pairs and preference is 1. Each half-sweep
+	updates one side's factors in row blocks of about ``block_nnz`` observed pairs, which bounds
+	the gathered factor copies: the ``Y^T Y`` term is one dense product per block and the
+	observed-pairs correction a sparse-dense product, so the work is BLAS and scipy kernels that
+	release the GIL. Blocks run on ``workers`` threads.
+	"""
+
+	def __init__(
+		self,
+		factors: int,
+		regularization: float,
+		alpha: float,
+		iterations: int,
+		cg_steps: int = 3,
+		block_nnz: int = 262144,
+		workers: Optional[int] = None,
+		seed: int = 0,
+	) -> None:
+		self.factors = factors
+		self.regularization = regularization
+		self.alpha = alpha
+		self.iterations = iterations
+		self.cg_steps = cg_steps
+		self.block_nnz = block_nnz
+		self.workers = workers or os.cpu_count() or 1
+		self.seed = seed
+		self.iteration_seconds: List[float] = []
+
+	def _solve_block(self, confidence: sparse.csr_matrix, fixed: np.ndarray, gram: np.ndarray, x: np.ndarray) -> np.ndarray:
+		"""CG on ``(gram + Y^T (C_u - I) Y) x_u = Y^T C_u p_u`` for every row of ``confidence`` at once."""
+		extra = confidence.copy()
+		extra.data = extra.data - 1
+		rows = np.repeat(np.arange(confidence.shape[0], dtype=np.int32), np.diff(confidence.indptr))
+		gathered = fixed[confidence.indices]
+
+		def apply(v: np.ndarray) -> np.ndarray:
+			weighted = extra.copy()
+			weighted.data = weighted.data * np.einsum("nf,nf->n", gathered, v[rows])
+			return v @ gram + weighted @ fixed
+
+		residual = confidence @ fixed - apply(x)
+		direction = residual.copy()
+		rs_old = np.einsum("bf,bf->b", residual, residual)
+		for _ in range(self.cg_steps):
+			product = apply(direction)
+			denom = np.einsum("bf,bf->b", direction, product)
+			step = np.divide(rs_old, denom, out=np.zeros_like(rs_old), where=denom > 0)
+			x = x + step[:, None] * direction
+			residual = residual - step[:, None] * product
+			rs_new = np.einsum("bf,bf->b", residual, residual)
+			ratio = np.divide(rs_new, rs_old, out=np.zeros_like(rs_new), where=rs_old > 0)
+			direction = residual + ratio[:, None] * direction
+			rs_old = rs_new
+		return x
+
+	def _sweep(self, confidence: sparse.csr_matrix, fixed: np.ndarray, solved: np.ndarray, pool: ThreadPoolExecutor) -> None:
+		gram = fixed.T @ fixed + self.regularization * np.eye(self.factors, dtype=np.float32)
+		n = confidence.shape[0]
+		targets = np.arange(self.block_nnz, confidence.nnz, self.block_nnz)
+		bounds = np.unique(np.concatenate([[0], np.searchsorted(confidence.indptr, targets), [n]]))
+
+		def run(block: Tuple[int, int]) -> None:
+			start, end = block
+			solved[start:end] = self._solve_block(confidence[start:end], fixed, gram, solved[start:end])
+
+		list(pool.map(run, zip(bounds[:-1].tolist(), bounds[1:].tolist())))
+
+	def fit(self, weights: sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+		"""Factorise a user x item weight matrix; returns ``(user_factors, item_factors)``."""
+		confidence = weights.astype(np.float32, copy=True)
+		confidence.data = 1 + self.alpha * confidence.data
+		by_item = confidence.T.tocsr()
+		rng = np.random.default_rng(self.seed)
+		scale = 0.01
+		users = (rng.standard_normal((weights.shape[0], self.factors)) * scale).astype(np.float32)
+		items = (rng.standard_normal((weights.shape[1], self.factors)) * scale).astype(np.float32)
+		self.iteration_seconds = []
+		with ThreadPoolExecutor(self.workers) as pool:
+			for _ in range(self.iterations):
+				start = time.perf_counter()
+				self._sweep(confidence, items, users, pool)
+				self._sweep(by_item, users, items, pool)
+				self.iteration_seconds.append(round(time.perf_counter() - start, 3))
+		return users, items
+
+def save_model(
+	path: Path,
+	user_ids: Sequence[str],
+	item_ids: Sequence[str],
+	user_factors: np.ndarray,
+	item_factors: np.ndarray,
+	seen: sparse.csr_matrix,
+	meta: Dict[str, Any],
+) -> None:
+	"""Write factors, seen items and id lookups as a new version of the store at ``path`` and publish it."""
+	version = new_version(path)
+	np.save(version / "user_factors.npy", np.ascontiguousarray(user_factors, dtype=np.float32))
+	np.save(version / "item_factors.npy", np.ascontiguousarray(item_factors, dtype=np.float32))
+	np.save(version / "seen_indptr.npy", seen.indptr.astype(np.int64))
+	np.save(version / "seen_indices.npy", seen.indices.astype(np.int32))
+	for name, ids in (("user", user_ids), ("item", item_ids)):
+		id_array = np.asarray(ids, dtype=str)
+		id_rows = np.argsort(id_array, kind="stable").astype(np.int32)
+		np.save(version / f"{name}_ids.npy", id_array)
+		np.save(version / f"sorted_{name}_ids.npy", id_array[id_rows])
+		np.save(version / f"{name}_id_rows.npy", id_rows)
+	(version / "meta.json").write_text(json.dumps({**meta, "users": len(user_ids), "items": len(item_ids), "built_at": time.time()}))
+	publish(version, path)
+
+class ALSModel:
+	"""Read-only factors mapped from a model directory, with exact batched top-k scoring."""
+
+	def __init__(self, path: Path) -> None:
+		path = resolve(path)
+		self.path = path
+		self.meta: Dict[str, Any] = json.loads((path / "meta.json").read_text())
+		self.user_factors = mapped(path / "user_factors.npy")
+		self.item_factors = mapped(path / "item_factors.npy")
+		self.seen_indptr = mapped(path / "seen_indptr.npy")
+		self.seen_indices = mapped(path / "seen_indices.npy")
+		self.user_ids = mapped(path / "user_ids.npy")
+		self.sorted_user_ids = mapped(path / "sorted_user_ids.npy")
+		self.user_id_rows = mapped(path / "user_id_rows.npy")
+		self.item_ids = mapped(path / "item_ids.npy")
+
+	def user_row(self, user_id: str) -> Optional[int]:
+		i = int(np.searchsorted(self.sorted_user_ids, user_id))
+		if i < len(self.sorted_user_ids) and self.sorted_user_ids[i] == user_id:
+			return int(self.user_id_rows[i])
+		return None
+
+	def top_k(self, rows: np.ndarray, k: int, chunk: int = 16384, block_scores: int = 1 << 22) -> Tuple[np.ndarray, np.ndarray]:
+		"""Best ``k`` unseen items for each user row, scored in row blocks of at most ``block_scores`` cells."""
+		step = max(1, block_scores // max(1, min(chunk, len(self.item_factors))))
+		parts = [self._top_k_block(rows[start:start + step], k, chunk) for start in range(0, len(rows), step)]
+		if not parts:
+			return np.empty((0, k), dtype=np.int64), np.empty((0, k), dtype=np.float32)
+		return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+	def _top_k_block(self, rows: np.ndarray, k: int, chunk: int) -> Tuple[np.ndarray, np.ndarray]:
+		"""Item chunks of one matrix product each, merged as they go."""
+		best_items = np.full((len(rows), 0), -1, dtype=np.int64)
+		best_scores = np.empty((len(rows), 0), dtype=np.float32)
+		queries = self.user_factors[rows]
+		seen = [self.seen_indices[self.seen_indptr[row]:self.seen_indptr[row + 1]] for row in rows]
+		seen_rows = np.repeat(np.arange(len(rows)), [len(s) for s in seen])
+		seen_items = np.concatenate(seen) if seen else np.empty(0, dtype=np.int32)
+		n_items = len(self.item_factors)
+		for start in range(0, n_items, chunk):
+			scores = queries @ self.item_factors[start:start + chunk].T
+			inside = (seen_items >= start) & (seen_items < start + chunk)
+			scores[seen_rows[inside], seen_items[inside] - start] = -np.inf
+			take = min(k, scores.shape[1])
+			top = np.argpartition(scores, -take, axis=1)[:, -take:]
+			best_items = np.concatenate([best_items, top + start], axis=1)
+			best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+			if best_items.shape[1] > k:
+				keep = np.argpartition(best_scores, -k, axis=1)[:, -k:]
+				best_items = np.take_along_axis(best_items, keep, axis=1)
+				best_scores = np.take_along_axis(best_scores, keep, axis=1)
+		order = np.argsort(-best_scores, axis=1, kind="stable")
+		return np.take_along_axis(best_items, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+	def recommend(self, user_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+		row = self.user_row(user_id)
+		if row is None:
+			return None
+		items, scores = self.top_k(np.array([row]), limit)
+		return [(str(self.item_ids[i]), round(float(s), 4)) for i, s in zip(items[0], scores[0]) if np.isfinite(s)]
+
+	def stats(self) -> Dict[str, Any]:
+		return {**self.meta, "bytes_mapped": int(self.user_factors.nbytes + self.item_factors.nbytes + self.seen_indices.nbytes)}
+
+class CatalogALS(MappedHandle[ALSModel]):
+	"""Process-wide handle on the trained ALS model, following retrains every ``ALS_RELOAD_INTERVAL`` seconds."""
+
+	def __init__(self) -> None:
+		super().__init__("ALS model", ALSModel, "ALS_MODEL_PATH", "ALS_RELOAD_INTERVAL")
+
+	def recommend(self, user_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+		model = self.current()
+		if model is None:
+			return None
+		return model.recommend(user_id, limit)
+
+catalog_als = CatalogALS()
+
+def encode(values: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+	ids, numbers = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+	return ids.tolist(), numbers.astype(np.int32)
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Train the implicit ALS model from MongoDB listens and favorites")
+	parser.add_argument("command", choices=["train"])
+	parser.add_argument("--out", default=settings.ALS_MODEL_PATH)
+	parser.add_argument("--factors", type=int, default=settings.ALS_FACTORS)
+	parser.add_argument("--iterations", type=int, default=settings.ALS_ITERATIONS)
+	parser.add_argument("--regularization", type=float, default=settings.ALS_REGULARIZATION)
+	parser.add_argument("--alpha", type=float, default=settings.ALS_ALPHA)
+	parser.add_argument("--workers", type=int, default=None)
+	args = parser.parse_args()
+
+	start = time.perf_counter()
+	users, items, weights, _ = asyncio.run(load_interactions({}))
+	user_ids, user_numbers = encode(users)
+	item_ids, item_numbers = encode(items)
+	matrix = interaction_matrix(user_numbers, item_numbers, np.asarray(weights, dtype=np.float32), (len(user_ids), len(item_ids)))
+	loaded = time.perf_counter()
+	trainer = ImplicitALS(args.factors, args.regularization, args.alpha, args.iterations, workers=args.workers)
+	user_factors, item_factors = trainer.fit(matrix)
+	meta = {"factors": args.factors, "iterations": args.iterations, "regularization": args.regularization, "alpha": args.alpha, "iteration_seconds": trainer.iteration_seconds}
+	save_model(Path(args.out), user_ids, item_ids, user_factors, item_factors, matrix, meta)
+	print(
+		f"trained on {matrix.nnz} interactions ({len(user_ids)} users x {len(item_ids)} podcasts) into {args.out}: "
+		f"load {loaded - start:.1f}s, {np.mean(trainer.iteration_seconds or [0]):.2f}s per iteration"
+	)
+
+if __name__ == "__main__":
+	main()
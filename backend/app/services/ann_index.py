@@ -0,0 +1,200 @@
+"""Random-projection LSH index over hashed n-gram embeddings of the catalog, stored as .npy files.
+
+Builds are published to an ``mmap_store`` and every array is opened with ``mmap_mode="r"``, so
+all workers share the same page cache and startup does no rebuild. Build or replace the on-disk
+index with::
+
+	python -m app.services.ann_index build [--out ann_index]
+"""
+import argparse
+import asyncio
+import json
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from ..config import settings
+from ..db import get_podcasts_collection
+from ..utils.text import normalize_text
+from .mmap_store import MappedHandle, mapped, new_version, publish, resolve
+
+def embed_text(text: Optional[str], dim: int) -> np.ndarray:
+	"""Signed feature hashing of words and character trigrams, L2-normalised."""
+	words = normalize_text(text).split()
+	grams: List[str] = list(words)
+	for word in words:
+		padded = f" {word} "
+		grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+	if not grams:
+		return np.zeros(dim, dtype=np.float32)
+	hashes = np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint32, count=len(grams))
+	signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+	vector = np.bincount(hashes % dim, weights=signs, minlength=dim).astype(np.float32)
+	norm = np.linalg.norm(vector)
+	return vector / norm if norm else vector
+
+def podcast_text(title: Optional[str], description: Optional[str], publisher: Optional[str]) -> str:
+	# Title twice so short titles are not drowned out by long descriptions.
+	return " ".join(filter(None, (title, title, publisher, (description or "")[:1000])))
+
+def _pack(bits: np.ndarray) -> np.ndarray:
+	return bits.astype(np.uint32) @ (np.uint32(1) << np.arange(bits.shape[-1], dtype=np.uint32))
+
+class ANNIndex:
+	"""Read-only LSH index: ``tables`` hash tables of ``bits`` hyperplanes each, with multi-probe lookup.
+
+	Each table keeps its codes sorted alongside the row order, so a bucket is a ``searchsorted``
+	range. Candidates from all probed buckets are re-ranked exactly against the stored vectors.
+	"""
+
+	def __init__(self, path: Path) -> None:
+		path = resolve(path)
+		self.path = path
+		self.meta: Dict[str, Any] = json.loads((path / "meta.json").read_text())
+		self.vectors = mapped(path / "vectors.npy")
+		self.planes = np.load(path / "planes.npy")
+		self.codes = mapped(path / "codes.npy")
+		self.order = mapped(path / "order.npy")
+		self.ids = mapped(path / "ids.npy")
+		self.sorted_ids = mapped(path / "sorted_ids.npy")
+		self.id_rows = mapped(path / "id_rows.npy")
+		self.tables = int(self.meta["tables"])
+		self.bits = int(self.meta["bits"])
+
+	def __len__(self) -> int:
+		return len(self.ids)
+
+	@classmethod
+	def build(
+		cls,
+		path: Path,
+		ids: Sequence[str],
+		vectors: np.ndarray,
+		tables: int,
+		bits: int,
+		seed: int = 0,
+		chunk: int = 65536,
+	) -> "ANNIndex":
+		"""Write vectors, sorted LSH codes and id lookups as a new version of the store at ``path`` and publish it."""
+		if not 1 <= bits <= 32:
+			raise ValueError("bits must be between 1 and 32")
+		n, dim = vectors.shape
+		rng = np.random.default_rng(seed)
+		planes = rng.standard_normal((tables, bits, dim)).astype(np.float32)
+		version = new_version(path)
+		stored = np.lib.format.open_memmap(version / "vectors.npy", mode="w+", dtype=np.float32, shape=(n, dim))
+		codes = np.empty((tables, n), dtype=np.uint32)
+		for start in range(0, n, chunk):
+			block = np.asarray(vectors[start:start + chunk], dtype=np.float32)
+			stored[start:start + chunk] = block
+			projected = (block @ planes.reshape(-1, dim).T).reshape(len(block), tables, bits).transpose(1, 0, 2) > 0
+			codes[:, start:start + chunk] = _pack(projected)
+		stored.flush()
+		del stored
+		order = np.argsort(codes, axis=1, kind="stable").astype(np.int32)
+		np.save(version / "codes.npy", np.take_along_axis(codes, order, axis=1))
+		np.save(version / "order.npy", order)
+		np.save(version / "planes.npy", planes)
+		id_array = np.asarray(ids, dtype=str)
+		id_rows = np.argsort(id_array, kind="stable").astype(np.int32)
+		np.save(version / "ids.npy", id_array)
+		np.save(version / "sorted_ids.npy", id_array[id_rows])
+		np.save(version / "id_rows.npy", id_rows)
+		meta = {"dim": dim, "tables": tables, "bits": bits, "seed": seed, "count": n, "built_at": time.time()}
+		(version / "meta.json").write_text(json.dumps(meta))
+		publish(version, path)
+		return cls(path)
+
+	def row(self, doc_id: str) -> Optional[int]:
+		i = int(np.searchsorted(self.sorted_ids, doc_id))
+		if i < len(self.sorted_ids) and self.sorted_ids[i] == doc_id:
+			return int(self.id_rows[i])
+		return None
+
+	def candidates(self, query: np.ndarray, probes: int) -> np.ndarray:
+		projected = self.planes @ query
+		codes = _pack(projected > 0).astype(np.int64)
+		# Multi-probe: also visit the buckets across the hyperplanes the query is closest to.
+		flips = np.argsort(np.abs(projected), axis=1)[:, :probes]
+		found: List[np.ndarray] = []
+		for t in range(self.tables):
+			keys = np.concatenate([[codes[t]], codes[t] ^ (1 << flips[t])]).astype(np.uint32)
+			lo = np.searchsorted(self.codes[t], keys, side="left")
+			hi = np.searchsorted(self.codes[t], keys, side="right")
+			found.extend(self.order[t][a:b] for a, b in zip(lo, hi) if b > a)
+		if not found:
+			return np.empty(0, dtype=np.int32)
+		return np.unique(np.concatenate(found))
+
+	def search(self, query: np.ndarray, k: int, probes: int = 0, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+		rows = self.candidates(query, probes)
+		if exclude is not None:
+			rows = rows[rows != exclude]
+		if not len(rows):
+			return []
+		scores = self.vectors[rows] @ query
+		if len(rows) > k:
+			top = np.argpartition(scores, -k)[-k:]
+			rows, scores = rows[top], scores[top]
+		best = np.argsort(-scores, kind="stable")
+		return [(int(rows[i]), float(scores[i])) for i in best]
+
+	def similar(self, doc_id: str, k: int, probes: int = 0) -> Optional[List[Tuple[str, float]]]:
+		row = self.row(doc_id)
+		if row is None:
+			return None
+		query = self.vectors[row]
+		return [(str(self.ids[r]), round(s, 4)) for r, s in self.search(query, k, probes, exclude=row) if s > 0]
+
+	def stats(self) -> Dict[str, Any]:
+		return {**self.meta, "bytes_mapped": int(self.vectors.nbytes + self.codes.nbytes + self.order.nbytes + self.ids.nbytes)}
+
+class CatalogANN(MappedHandle[ANNIndex]):
+	"""Process-wide handle on the on-disk ANN index, following rebuilds every ``ANN_RELOAD_INTERVAL`` seconds."""
+
+	def __init__(self) -> None:
+		super().__init__("ANN index", ANNIndex, "ANN_INDEX_PATH", "ANN_RELOAD_INTERVAL")
+
+	def similar(self, doc_id: str, k: int) -> Optional[List[Tuple[str, float]]]:
+		index = self.current()
+		if index is None:
+			return None
+		return index.similar(doc_id, k, settings.ANN_PROBES)
+
+catalog_ann = CatalogANN()
+
+def embed_documents(docs: Iterable[Tuple[Optional[str], Optional[str], Optional[str]]], count: int, dim: int) -> np.ndarray:
+	vectors = np.zeros((count, dim), dtype=np.float32)
+	for i, (title, description, publisher) in enumerate(docs):
+		vectors[i] = embed_text(podcast_text(title, description, publisher), dim)
+	return vectors
+
+async def _load_catalog() -> Tuple[List[str], List[Tuple[Optional[str], Optional[str], Optional[str]]]]:
+	collection = await get_podcasts_collection()
+	ids: List[str] = []
+	docs: List[Tuple[Optional[str], Optional[str], Optional[str]]] = []
+	async for doc in collection.find({}, {"title": 1, "description": 1, "publisher": 1}).batch_size(1000):
+		ids.append(str(doc["_id"]))
+		docs.append((doc.get("title"), doc.get("description"), doc.get("publisher")))
+	return ids, docs
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Build the catalog ANN index from MongoDB")
+	parser.add_argument("command", choices=["build"])
+	parser.add_argument("--out", default=settings.ANN_INDEX_PATH)
+	parser.add_argument("--dim", type=int, default=settings.ANN_DIM)
+	parser.add_argument("--tables", type=int, default=settings.ANN_TABLES)
+	parser.add_argument("--bits", type=int, default=settings.ANN_BITS)
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	start = time.perf_counter()
+	ids, docs = asyncio.run(_load_catalog())
+	vectors = embed_documents(docs, len(ids), args.dim)
+	embedded = time.perf_counter()
+	index = ANNIndex.build(Path(args.out), ids, vectors, args.tables, args.bits, args.seed)
+	print(f"indexed {len(index)} podcasts into {args.out}: embed {embedded - start:.1f}s, build {time.perf_counter() - embedded:.1f}s")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,25 @@
+from typing import Generic, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+class BuildReplay(Generic[T]):
+	"""Items saved while a background rebuild reads its snapshot of the catalog.
+
+	The snapshot cursor may not see writes that land after it started, so the rebuild applies
+	:meth:`drain` to the new index right before swapping it in.
+	"""
+
+	def __init__(self) -> None:
+		self._items: Optional[List[T]] = None
+
+	def begin(self) -> None:
+		self._items = []
+
+	def record(self, items: Iterable[T]) -> None:
+		if self._items is not None:
+			self._items.extend(items)
+
+	def drain(self) -> List[T]:
+		"""Everything recorded since :meth:`begin`; recording stops until the next build."""
+		items, self._items = self._items or [], None
+		return items
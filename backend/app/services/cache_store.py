@@ -0,0 +1,121 @@
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from bson import Binary
+from ..config import settings
+from ..utils.fastjson import dumps, loads
+from ..db import get_cache_collection
+
+Payload = List[dict]
+
+def encode_payload(payload: Payload) -> bytes:
+	return zlib.compress(dumps(payload), 6)
+
+def decode_payload(blob: bytes) -> Payload:
+	return loads(zlib.decompress(blob))
+
+class CacheStore(ABC):
+	"""Shared second-tier cache for provider results; entries carry their own expiry."""
+
+	@abstractmethod
+	async def get(self, key: str) -> Optional[Tuple[Payload, float]]:
+		...
+
+	@abstractmethod
+	async def set(self, key: str, payload: Payload, ttl: float) -> None:
+		...
+
+	@abstractmethod
+	async def invalidate_prefix(self, prefix: str) -> int:
+		...
+
+class MongoCacheStore(CacheStore):
+	async def get(self, key: str) -> Optional[Tuple[Payload, float]]:
+		collection = await get_cache_collection()
+		doc = await collection.find_one({"_id": key})
+		if not doc:
+			return None
+		expires_at = doc["expires_at"].replace(tzinfo=timezone.utc).timestamp()
+		# The TTL monitor only sweeps once a minute, so expiry is enforced on read as well.
+		if expires_at <= time.time():
+			return None
+		return decode_payload(doc["payload"]), expires_at
+
+	async def set(self, key: str, payload: Payload, ttl: float) -> None:
+		collection = await get_cache_collection()
+		expires_at = datetime.fromtimestamp(time.time() + ttl, tz=timezone.utc)
+		await collection.replace_one(
+			{"_id": key},
+			{"_id": key, "payload": Binary(encode_payload(payload)), "expires_at": expires_at},
+			upsert=True,
+		)
+
+	async def invalidate_prefix(self, prefix: str) -> int:
+		collection = await get_cache_collection()
+		result = await collection.delete_many({"_id": {"$regex": f"^{re.escape(prefix)}"}})
+		return result.deleted_count
+
+class FileCacheStore(CacheStore):
+	"""SQLite file shared by the workers of a single host."""
+
+	def __init__(self, path: str) -> None:
+		self.path = path
+		self._conn: Optional[sqlite3.Connection] = None
+		self._lock = threading.Lock()
+		self._writes = 0
+
+	def _connection(self) -> sqlite3.Connection:
+		if self._conn is None:
+			conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("CREATE TABLE IF NOT EXISTS provider_cache (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, payload BLOB NOT NULL)")
+			self._conn = conn
+		return self._conn
+
+	def _get(self, key: str) -> Optional[Tuple[Payload, float]]:
+		with self._lock:
+			row = self._connection().execute(
+				"SELECT payload, expires_at FROM provider_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+			).fetchone()
+		if row is None:
+			return None
+		return decode_payload(row[0]), row[1]
+
+	def _set(self, key: str, blob: bytes, ttl: float) -> None:
+		now = time.time()
+		with self._lock:
+			conn = self._connection()
+			conn.execute("INSERT OR REPLACE INTO provider_cache (key, expires_at, payload) VALUES (?, ?, ?)", (key, now + ttl, blob))
+			self._writes += 1
+			if self._writes % 500 == 0:
+				conn.execute("DELETE FROM provider_cache WHERE expires_at <= ?", (now,))
+
+	def _invalidate_prefix(self, prefix: str) -> int:
+		with self._lock:
+			cur = self._connection().execute(
+				"DELETE FROM provider_cache WHERE key >= ? AND key < ?", (prefix, prefix + "\U0010ffff")
+			)
+			return cur.rowcount
+
+	async def get(self, key: str) -> Optional[Tuple[Payload, float]]:
+		return await asyncio.to_thread(self._get, key)
+
+	async def set(self, key: str, payload: Payload, ttl: float) -> None:
+		await asyncio.to_thread(self._set, key, encode_payload(payload), ttl)
+
+	async def invalidate_prefix(self, prefix: str) -> int:
+		return await asyncio.to_thread(self._invalidate_prefix, prefix)
+
+def create_cache_store() -> Optional[CacheStore]:
+	backend = settings.CACHE_L2_BACKEND
+	if backend == "mongo":
+		return MongoCacheStore()
+	if backend == "file":
+		return FileCacheStore(settings.CACHE_L2_PATH)
+	return None
@@ -0,0 +1,185 @@
+import base64
+import binascii
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from ..models import Podcast
+from ..config import settings
+from ..db import get_podcasts_collection
+from .write_behind import WriteBehindQueue
+from .search_index import catalog_search
+from .similarity import catalog_similarity
+from .dedup import catalog_dedup
+
+_UNHASHED = ("_id", "content_hash", "updated_at", "created_at", "cluster_id", "is_canonical")
+
+def podcast_document(p: Podcast) -> Dict[str, Any]:
+	doc = p.model_dump(exclude_none=True)
+	if doc.get("id"):
+		doc["_id"] = doc.pop("id")
+	else:
+		doc.pop("id", None)
+	return doc
+
+def content_hash(doc: Dict[str, Any]) -> str:
+	body = {k: v for k, v in doc.items() if k not in _UNHASHED}
+	raw = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+	return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+	for i in range(0, len(items), size):
+		yield items[i:i + size]
+
+async def bulk_save_podcasts(
+	collection: AsyncIOMotorCollection,
+	podcasts: List[Podcast],
+	clusters: Optional[Dict[str, str]] = None,
+) -> Dict[str, int]:
+	"""Upsert podcasts with unordered bulk writes, skipping documents whose content hash is unchanged.
+
+	``clusters`` maps podcast ids to near-duplicate cluster ids stored alongside new or changed documents.
+	"""
+	result = {"inserted": 0, "modified": 0, "skipped": 0, "failed": 0}
+	if not podcasts:
+		return result
+	by_id: Dict[Any, Dict[str, Any]] = {}
+	anonymous: List[Dict[str, Any]] = []
+	for p in podcasts:
+		doc = podcast_document(p)
+		if "_id" in doc:
+			if doc["_id"] in by_id:
+				result["skipped"] += 1
+			by_id[doc["_id"]] = doc
+		else:
+			anonymous.append(doc)
+
+	batch_size = settings.CATALOG_BULK_BATCH
+	existing: Dict[Any, str] = {}
+	for ids in _chunks(list(by_id), batch_size):
+		async for row in collection.find({"_id": {"$in": ids}}, {"content_hash": 1}):
+			existing[row["_id"]] = row.get("content_hash")
+
+	now = datetime.utcnow()
+	ops: List[Any] = []
+	for _id, doc in by_id.items():
+		digest = content_hash(doc)
+		if existing.get(_id) == digest:
+			result["skipped"] += 1
+			continue
+		doc["content_hash"] = digest
+		doc["updated_at"] = now
+		if clusters and _id in clusters:
+			doc["cluster_id"] = clusters[_id]
+			doc["is_canonical"] = clusters[_id] == str(_id)
+		ops.append(UpdateOne({"_id": _id}, {"$set": doc, "$setOnInsert": {"created_at": now}}, upsert=True))
+	for doc in anonymous:
+		ops.append(InsertOne({**doc, "content_hash": content_hash(doc), "updated_at": now, "created_at": now}))
+
+	for batch in _chunks(ops, batch_size):
+		try:
+			res = await collection.bulk_write(batch, ordered=False)
+			result["inserted"] += res.upserted_count + res.inserted_count
+			result["modified"] += res.modified_count
+		except BulkWriteError as e:
+			details = e.details
+			result["inserted"] += details.get("nUpserted", 0) + details.get("nInserted", 0)
+			result["modified"] += details.get("nModified", 0)
+			result["failed"] += len(details.get("writeErrors", []))
+	return result
+
+async def save_podcasts(podcasts: List[Podcast]) -> Dict[str, int]:
+	collection = await get_podcasts_collection()
+	result = await bulk_save_podcasts(collection, podcasts, catalog_dedup.assign(podcasts))
+	catalog_search.add_podcasts(podcasts)
+	await catalog_similarity.add_podcasts(podcasts)
+	return result
+
+async def load_podcasts(ids: List[str]) -> List[Podcast]:
+	"""Fetch catalog podcasts by id, preserving the order of ``ids``."""
+	if not ids:
+		return []
+	keys: List[Any] = list(ids)
+	keys += [ObjectId(i) for i in ids if ObjectId.is_valid(i)]
+	collection = await get_podcasts_collection()
+	found: Dict[str, Podcast] = {}
+	async for doc in collection.find({"_id": {"$in": keys}}, saved_projection(None)):
+		pid = str(doc["_id"])
+		found[pid] = Podcast.model_construct(**saved_document(doc, None))
+	return [found[i] for i in ids if i in found]
+
+catalog_writer = WriteBehindQueue(
+	save_podcasts,
+	max_batch=settings.WRITE_BEHIND_BATCH,
+	flush_interval=settings.WRITE_BEHIND_INTERVAL,
+	max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+	max_wait=settings.WRITE_BEHIND_MAX_WAIT,
+)
+
+SAVED_FIELDS = tuple(f for f in Podcast.model_fields if f != "id")
+SAVED_FILTERS = ("source", "language", "publisher")
+
+async def ensure_catalog_indexes(collection: AsyncIOMotorCollection) -> None:
+	for field in SAVED_FILTERS:
+		await collection.create_index([(field, ASCENDING), ("_id", ASCENDING)])
+	await collection.create_index([("updated_at", ASCENDING)])
+	await collection.create_index([("is_canonical", ASCENDING), ("_id", ASCENDING)])
+
+class InvalidSavedCursor(ValueError):
+	pass
+
+def encode_id_cursor(_id: Any) -> str:
+	token = f"o:{_id}" if isinstance(_id, ObjectId) else f"s:{_id}"
+	return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+def _after_filter(cursor: str) -> Dict[str, Any]:
+	try:
+		token = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+		kind, _, value = token.partition(":")
+		if kind == "o":
+			return {"_id": {"$gt": ObjectId(value)}}
+	except (binascii.Error, UnicodeDecodeError, InvalidId):
+		raise InvalidSavedCursor("Malformed cursor")
+	if kind != "s":
+		raise InvalidSavedCursor("Malformed cursor")
+	# Provider ids are strings and sort before generated ObjectIds, so a string cursor still reaches them.
+	return {"$or": [{"_id": {"$gt": value, "$type": "string"}}, {"_id": {"$type": "objectId"}}]}
+
+def saved_query(cursor: Optional[str], filters: Dict[str, Optional[str]], collapse: bool = False) -> Dict[str, Any]:
+	clauses: List[Dict[str, Any]] = [{k: v} for k, v in filters.items() if v]
+	if collapse:
+		# A cluster is named after its first member, which is flagged so it can stand in for the rest;
+		# unclustered documents have no flag and are kept too.
+		clauses.append({"is_canonical": {"$ne": False}})
+	if cursor:
+		clauses.append(_after_filter(cursor))
+	if not clauses:
+		return {}
+	return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def saved_projection(fields: Optional[List[str]]) -> Dict[str, int]:
+	return {f: 1 for f in (fields or SAVED_FIELDS)}
+
+def saved_document(doc: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+	out: Dict[str, Any] = {"id": str(doc["_id"])}
+	for f in fields or SAVED_FIELDS:
+		out[f] = doc.get(f)
+	return out
+
+async def iter_saved(
+	collection: AsyncIOMotorCollection,
+	query: Dict[str, Any],
+	fields: Optional[List[str]],
+	limit: int = 0,
+	batch_size: int = 500,
+) -> AsyncIterator[Dict[str, Any]]:
+	cursor = collection.find(query, saved_projection(fields)).sort("_id", ASCENDING).batch_size(batch_size)
+	if limit:
+		cursor = cursor.limit(limit)
+	async for doc in cursor:
+		yield doc
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from ..models import Podcast
+from ..config import settings
+from ..db import get_podcasts_collection
+from ..agents.listennotes_agent import BATCH_LIMIT as LISTEN_NOTES_BATCH, fetch_by_ids as ln_fetch_by_ids
+from ..agents.spotify_agent import EPISODES_BATCH as SPOTIFY_BATCH, fetch_episodes as spotify_fetch_episodes
+from .catalog import _chunks, save_podcasts
+from .resilience import ProviderUnavailable
+
+Lookup = Callable[[List[str]], Awaitable[Dict[str, Optional[Podcast]]]]
+
+# Catalog ``source`` value -> (provider, ids per call, batch lookup)
+LOOKUPS: Dict[str, Tuple[str, int, Lookup]] = {
+	"Spotify": ("spotify", SPOTIFY_BATCH, spotify_fetch_episodes),
+	"ListenNotes": ("listen_notes", LISTEN_NOTES_BATCH, ln_fetch_by_ids),
+}
+
+def stale_query(before: datetime) -> Dict[str, Any]:
+	return {
+		"source": {"$in": list(LOOKUPS)},
+		"$and": [
+			{"$or": [{"updated_at": {"$lt": before}}, {"updated_at": {"$exists": False}}]},
+			{"$or": [{"checked_at": {"$lt": before}}, {"checked_at": {"$exists": False}}]},
+		],
+	}
+
+class CatalogRefresher:
+	"""Re-hydrates catalog entries that have not been updated or checked for ``CATALOG_STALE_AFTER_DAYS``.
+
+	Stale ids are grouped by source and looked up with the providers' multi-id endpoints, at most
+	``CATALOG_REFRESH_CONCURRENCY`` batches at a time. Requests go through the provider guards, so
+	rate limits and Retry-After are honoured; a provider whose breaker is open is skipped for the
+	rest of the run. Changed metadata is written with the catalog's bulk upsert and every id that
+	was looked up gets ``checked_at`` in one bulk update, so unchanged and vanished items are not
+	retried until they go stale again. Runs every ``CATALOG_REFRESH_INTERVAL`` seconds when that is
+	set, or on demand from ``/ops/catalog-refresh``; every worker would pick the same stale ids and
+	spend its own provider quota on them, so enable the interval in one worker only.
+	"""
+
+	def __init__(self) -> None:
+		self.running = False
+		self.last_run: Optional[Dict[str, Any]] = None
+		self._task: Optional[asyncio.Task] = None
+
+	async def _refresh_batch(
+		self,
+		collection: AsyncIOMotorCollection,
+		provider: str,
+		lookup: Lookup,
+		ids: List[Any],
+		semaphore: asyncio.Semaphore,
+		skipped: Set[str],
+		totals: Dict[str, int],
+	) -> None:
+		async with semaphore:
+			if provider in skipped:
+				totals["skipped"] += len(ids)
+				return
+			try:
+				found = await lookup([str(i) for i in ids])
+			except ProviderUnavailable:
+				skipped.add(provider)
+				totals["skipped"] += len(ids)
+				return
+			except Exception:
+				totals["failed"] += len(ids)
+				return
+		refreshed = [p for p in found.values() if p is not None]
+		totals["missing"] += len(ids) - len(refreshed)
+		if refreshed:
+			result = await save_podcasts(refreshed)
+			totals["updated"] += result["modified"]
+			totals["unchanged"] += result["skipped"]
+		await collection.update_many({"_id": {"$in": ids}}, {"$set": {"checked_at": datetime.utcnow()}})
+
+	async def run_once(self, limit: Optional[int] = None) -> Dict[str, Any]:
+		start = time.perf_counter()
+		self.running = True
+		totals = {"stale": 0, "updated": 0, "unchanged": 0, "missing": 0, "failed": 0, "skipped": 0}
+		try:
+			collection = await get_podcasts_collection()
+			before = datetime.utcnow() - timedelta(days=settings.CATALOG_STALE_AFTER_DAYS)
+			cursor = collection.find(stale_query(before), {"source": 1}).sort("updated_at", 1).limit(limit or settings.CATALOG_REFRESH_LIMIT)
+			by_source: Dict[str, List[Any]] = {}
+			async for doc in cursor:
+				# Generated ObjectIds never came from a provider, so there is nothing to look up.
+				if not isinstance(doc["_id"], ObjectId):
+					by_source.setdefault(doc["source"], []).append(doc["_id"])
+			totals["stale"] = sum(len(v) for v in by_source.values())
+			semaphore = asyncio.Semaphore(max(settings.CATALOG_REFRESH_CONCURRENCY, 1))
+			skipped: Set[str] = set()
+			jobs = []
+			for source, ids in by_source.items():
+				provider, size, lookup = LOOKUPS[source]
+				jobs.extend(
+					self._refresh_batch(collection, provider, lookup, batch, semaphore, skipped, totals)
+					for batch in _chunks(ids, size)
+				)
+			await asyncio.gather(*jobs)
+		finally:
+			self.running = False
+		self.last_run = {**totals, "seconds": round(time.perf_counter() - start, 3), "finished_at": time.time()}
+		return self.last_run
+
+	async def _run(self) -> None:
+		while True:
+			await asyncio.sleep(settings.CATALOG_REFRESH_INTERVAL)
+			if self.running:
+				continue
+			try:
+				await self.run_once()
+			except Exception as e:
+				print(f"Error refreshing catalog: {e}")
+
+	async def start(self) -> None:
+		if settings.CATALOG_REFRESH_INTERVAL > 0 and self._task is None:
+			self._task = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+			self._task = None
+
+	def stats(self) -> Dict[str, Any]:
+		return {"running": self.running, "last_run": self.last_run}
+
+catalog_refresher = CatalogRefresher()
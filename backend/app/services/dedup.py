@@ -0,0 +1,280 @@
+import argparse
+import asyncio
+import re
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from pymongo import UpdateOne
+from ..models import Podcast
+from ..config import settings
+from ..db import get_podcasts_collection
+from ..utils.text import normalize_text
+from .build_replay import BuildReplay
+
+_MERSENNE = np.uint64((1 << 31) - 1)
+_TAGS = re.compile(r"<[^>]+>")
+
+def shingles(title: Optional[str], description: Optional[str], publisher: Optional[str]) -> np.ndarray:
+	"""Hashed word bigrams of title, publisher and the start of the description."""
+	text = " ".join(filter(None, (title, publisher, _TAGS.sub(" ", (description or "")[:1000]))))
+	words = normalize_text(text).split()
+	grams = [f"{a} {b}" for a, b in zip(words, words[1:])] or words
+	return np.unique(np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams)))
+
+class BandTable:
+	"""One LSH band: sorted ``(key, doc)`` arrays plus a dict of recent additions, compacted in bulk."""
+
+	def __init__(self, compact_after: int = 50_000) -> None:
+		self.keys = np.empty(0, dtype=np.uint64)
+		self.docs = np.empty(0, dtype=np.int32)
+		self.recent: Dict[int, List[int]] = {}
+		self._recent_count = 0
+		self.compact_after = compact_after
+
+	def extend(self, keys: np.ndarray, docs: np.ndarray) -> None:
+		keys = np.concatenate([self.keys, keys])
+		docs = np.concatenate([self.docs, docs.astype(np.int32)])
+		order = np.argsort(keys, kind="stable")
+		self.keys, self.docs = keys[order], docs[order]
+
+	def add(self, key: int, doc: int) -> None:
+		self.recent.setdefault(key, []).append(doc)
+		self._recent_count += 1
+		if self._recent_count >= self.compact_after:
+			self.compact()
+
+	def compact(self) -> None:
+		if not self.recent:
+			return
+		keys = np.fromiter((k for k, docs in self.recent.items() for _ in docs), dtype=np.uint64, count=self._recent_count)
+		docs = np.fromiter((d for ds in self.recent.values() for d in ds), dtype=np.int32, count=self._recent_count)
+		self.recent, self._recent_count = {}, 0
+		self.extend(keys, docs)
+
+	def lookup(self, key: int) -> List[int]:
+		# A plain int would make numpy convert the whole uint64 array on every call.
+		needle = np.uint64(key)
+		lo = np.searchsorted(self.keys, needle, side="left")
+		hi = np.searchsorted(self.keys, needle, side="right")
+		return self.docs[lo:hi].tolist() + self.recent.get(key, [])
+
+class MinHashLSH:
+	"""MinHash signatures banded into LSH tables, mapping each document to a canonical cluster id.
+
+	A document joins the cluster of its most similar indexed candidate when the estimated Jaccard
+	similarity reaches ``threshold``; otherwise it starts a cluster named after its own id. Only
+	documents sharing a band are compared, so ingest cost does not grow with catalog size.
+	Clusters are never merged after the fact, which keeps stored cluster ids stable.
+	"""
+
+	def __init__(self, permutations: int, bands: int, threshold: float, seed: int = 1) -> None:
+		if permutations % bands:
+			raise ValueError("permutations must be a multiple of bands")
+		rng = np.random.default_rng(seed)
+		self.a = rng.integers(1, int(_MERSENNE), size=permutations, dtype=np.uint64)
+		self.b = rng.integers(0, int(_MERSENNE), size=permutations, dtype=np.uint64)
+		self.bands = bands
+		self.rows = permutations // bands
+		self.threshold = threshold
+		self._signatures = np.zeros((1024, permutations), dtype=np.uint32)
+		self._count = 0
+		self._clusters: List[str] = []
+		self._doc_number: Dict[str, int] = {}
+		self._tables = [BandTable() for _ in range(bands)]
+
+	def __len__(self) -> int:
+		return self._count
+
+	def signature(self, hashed: np.ndarray) -> Optional[np.ndarray]:
+		if not len(hashed):
+			return None
+		hashed = hashed % _MERSENNE
+		return ((np.outer(self.a, hashed) + self.b[:, None]) % _MERSENNE).min(axis=1).astype(np.uint32)
+
+	def _band_keys(self, signature: np.ndarray) -> List[int]:
+		bands = signature.reshape(self.bands, self.rows)
+		return [zlib.crc32(band.tobytes()) | (i << 32) for i, band in enumerate(bands)]
+
+	def _best_match(self, signature: np.ndarray, keys: List[int]) -> Optional[int]:
+		candidates = {doc for table, key in zip(self._tables, keys) for doc in table.lookup(key)}
+		if not candidates:
+			return None
+		rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+		similarity = (self._signatures[rows] == signature).mean(axis=1)
+		best = int(np.argmax(similarity))
+		return int(rows[best]) if similarity[best] >= self.threshold else None
+
+	def cluster_of(self, doc_id: Optional[str], hashed: np.ndarray) -> Optional[str]:
+		"""Cluster for a document without indexing it; None when it matches nothing indexed."""
+		if doc_id in self._doc_number:
+			return self._clusters[self._doc_number[doc_id]]
+		signature = self.signature(hashed)
+		if signature is None:
+			return None
+		match = self._best_match(signature, self._band_keys(signature))
+		return self._clusters[match] if match is not None else None
+
+	def add(self, doc_id: str, hashed: np.ndarray, cluster_id: Optional[str] = None) -> str:
+		"""Index a document and return its cluster id. ``cluster_id`` pins a previously stored assignment."""
+		number = self._doc_number.get(doc_id)
+		if number is not None:
+			return self._clusters[number]
+		signature = self.signature(hashed)
+		keys = self._band_keys(signature) if signature is not None else []
+		if cluster_id is None:
+			match = self._best_match(signature, keys) if signature is not None else None
+			cluster_id = self._clusters[match] if match is not None else doc_id
+		number = self._count
+		if number == len(self._signatures):
+			self._signatures = np.concatenate([self._signatures, np.zeros_like(self._signatures)])
+		if signature is not None:
+			self._signatures[number] = signature
+		self._count += 1
+		self._clusters.append(cluster_id)
+		self._doc_number[doc_id] = number
+		for table, key in zip(self._tables, keys):
+			table.add(key, number)
+		return cluster_id
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"documents": self._count,
+			"clusters": len(set(self._clusters)),
+			"permutations": len(self.a),
+			"bands": self.bands,
+			"threshold": self.threshold,
+		}
+
+def _podcast_shingles(p: Podcast) -> np.ndarray:
+	return shingles(p.title, p.description, p.publisher)
+
+class CatalogDedup:
+	"""Near-duplicate clustering for the podcasts collection: startup build, assignment on ingest, query-time collapse."""
+
+	def __init__(self) -> None:
+		self.index = self._new_index()
+		self.ready = False
+		self.build_seconds: Optional[float] = None
+		self._replay: BuildReplay[Podcast] = BuildReplay()
+		self._task: Optional[asyncio.Task] = None
+
+	@staticmethod
+	def _new_index() -> MinHashLSH:
+		return MinHashLSH(settings.DEDUP_PERMUTATIONS, settings.DEDUP_BANDS, settings.DEDUP_THRESHOLD)
+
+	async def build(self, collection: Any, batch_size: int = 1000, backfill: bool = False) -> int:
+		"""Index the catalog, keeping stored cluster ids.
+
+		With ``backfill`` the cluster ids of documents that have none (or lack ``is_canonical``) are
+		written back; returns how many documents were updated. Podcasts saved during the build are
+		always written, since their save went out without a cluster id.
+		"""
+		start = time.perf_counter()
+		index = self._new_index()
+		pending: List[Tuple[Any, ...]] = []
+		assigned: List[Tuple[Any, str]] = []
+		self._replay.begin()
+
+		def index_batch(batch: List[Tuple[Any, ...]]) -> None:
+			for _id, title, description, publisher, cluster_id, canonical in batch:
+				cluster = index.add(str(_id), shingles(title, description, publisher), cluster_id)
+				if backfill and (cluster_id is None or canonical is None):
+					assigned.append((_id, cluster))
+
+		projection = {"title": 1, "description": 1, "publisher": 1, "cluster_id": 1, "is_canonical": 1}
+		# Oldest first, so the earliest copy of an episode names its cluster. Anonymous documents
+		# (generated ObjectId, no provider id) are skipped, as in assign().
+		try:
+			async for doc in collection.find({"_id": {"$type": "string"}}, projection).sort("created_at", 1).batch_size(batch_size):
+				pending.append((
+					doc["_id"], doc.get("title"), doc.get("description"), doc.get("publisher"), doc.get("cluster_id"), doc.get("is_canonical"),
+				))
+				if len(pending) >= batch_size:
+					await asyncio.to_thread(index_batch, pending)
+					pending = []
+			await asyncio.to_thread(index_batch, pending)
+			for table in index._tables:
+				table.compact()
+		finally:
+			replay = self._replay.drain()
+		self.index = index
+		self.ready = True
+		assigned.extend(self.assign(replay).items())
+		for i in range(0, len(assigned), batch_size):
+			ops = [
+				UpdateOne({"_id": _id}, {"$set": {"cluster_id": cluster, "is_canonical": cluster == str(_id)}})
+				for _id, cluster in assigned[i:i + batch_size]
+			]
+			await collection.bulk_write(ops, ordered=False)
+		self.build_seconds = round(time.perf_counter() - start, 3)
+		return len(assigned)
+
+	async def start(self, collection: Any) -> None:
+		if settings.DEDUP_ENABLED and self._task is None:
+			self._task = asyncio.create_task(self.build(collection, backfill=settings.DEDUP_BACKFILL))
+			self._task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+			self._task = None
+
+	def assign(self, podcasts: Iterable[Podcast]) -> Dict[str, str]:
+		"""Cluster ids for podcasts being saved. Empty until the startup build finishes; those are replayed."""
+		if not settings.DEDUP_ENABLED:
+			return {}
+		podcasts = [p for p in podcasts if p.id]
+		if not self.ready:
+			self._replay.record(podcasts)
+			return {}
+		return {p.id: self.index.add(p.id, _podcast_shingles(p)) for p in podcasts}
+
+	def collapse(self, podcasts: List[Podcast]) -> List[Podcast]:
+		"""Keep the first podcast of each cluster, preserving order.
+
+		Podcasts not in the catalog yet are also compared with each other, so two fresh copies of
+		the same episode from different providers collapse too.
+		"""
+		if not settings.DEDUP_ENABLED:
+			return podcasts
+		index = self.index
+		seen = set()
+		unindexed: List[np.ndarray] = []
+		out: List[Podcast] = []
+		for p in podcasts:
+			hashed = _podcast_shingles(p)
+			cluster = index.cluster_of(p.id, hashed)
+			if cluster is None:
+				signature = index.signature(hashed)
+				if signature is not None:
+					if any((signature == other).mean() >= index.threshold for other in unindexed):
+						continue
+					unindexed.append(signature)
+			elif cluster in seen:
+				continue
+			else:
+				seen.add(cluster)
+			out.append(p)
+		return out
+
+	def stats(self) -> Dict[str, Any]:
+		return {"ready": self.ready, "build_seconds": self.build_seconds, **self.index.stats()}
+
+catalog_dedup = CatalogDedup()
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Write cluster ids for catalog podcasts that have none")
+	parser.add_argument("command", choices=["backfill"])
+	args = parser.parse_args()
+
+	async def run() -> int:
+		return await catalog_dedup.build(await get_podcasts_collection(), backfill=True)
+
+	start = time.perf_counter()
+	updated = asyncio.run(run())
+	print(f"clustered {len(catalog_dedup.index)} podcasts, wrote {updated} cluster ids in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,57 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from ..models import Podcast
+from ..utils.text import normalize_text
+from ..config import settings
+from .dedup import catalog_dedup
+
+ProviderCall = Callable[[], Awaitable[List[Podcast]]]
+
+def _budget(provider: str) -> float:
+	if provider == "spotify":
+		return settings.SPOTIFY_BUDGET
+	return settings.LISTEN_NOTES_BUDGET
+
+async def _timed(provider: str, call: ProviderCall, budget: Optional[float]) -> Tuple[List[Podcast], Dict[str, object]]:
+	start = time.perf_counter()
+	try:
+		podcasts = await asyncio.wait_for(call(), timeout=budget)
+		status = "ok" if podcasts else "empty"
+	except asyncio.TimeoutError:
+		podcasts, status = [], "timeout"
+	except Exception:
+		podcasts, status = [], "error"
+	elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+	return podcasts, {"provider": provider, "status": status, "ms": elapsed_ms, "count": len(podcasts)}
+
+def merge_results(batches: List[List[Podcast]]) -> List[Podcast]:
+	"""Interleave provider results by rank, keeping the first of each normalized title/publisher pair
+	and of each near-duplicate cluster."""
+	seen: Set[Tuple[str, str]] = set()
+	merged: List[Podcast] = []
+	for rank in range(max((len(b) for b in batches), default=0)):
+		for batch in batches:
+			if rank >= len(batch):
+				continue
+			p = batch[rank]
+			key = (normalize_text(p.title), normalize_text(p.publisher))
+			if key in seen:
+				continue
+			seen.add(key)
+			merged.append(p)
+	return catalog_dedup.collapse(merged)
+
+async def federate(calls: Dict[str, ProviderCall]) -> Tuple[List[Podcast], List[Dict[str, object]]]:
+	# Budgets only matter when there is another provider to fall back on.
+	budgeted = len(calls) > 1
+	outcomes = await asyncio.gather(*(
+		_timed(provider, call, _budget(provider) if budgeted else None) for provider, call in calls.items()
+	))
+	return merge_results([podcasts for podcasts, _ in outcomes]), [timing for _, timing in outcomes]
+
+def timing_headers(timings: List[Dict[str, object]]) -> Dict[str, str]:
+	return {
+		"Server-Timing": ", ".join(f'{t["provider"]};dur={t["ms"]};desc="{t["status"]}"' for t in timings),
+		"X-Providers": ",".join(str(t["provider"]) for t in timings if t["count"]),
+	}
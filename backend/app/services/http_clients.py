@@ -0,0 +1,88 @@
+from typing import Any, Dict
+import httpx
+from ..config import settings
+from .provider_simulator import ProviderSimulator, SimulatorProfile
+
+PROVIDERS = ("spotify", "listen_notes")
+
+class ProviderClients:
+	"""Pooled, keep-alive httpx clients shared by the provider agents, one per provider."""
+
+	def __init__(self) -> None:
+		self._clients: Dict[str, httpx.AsyncClient] = {}
+		self._stats: Dict[str, Dict[str, int]] = {}
+		self._simulators: Dict[str, ProviderSimulator] = {}
+
+	def _limits(self, provider: str) -> httpx.Limits:
+		if provider == "spotify":
+			max_connections = settings.SPOTIFY_MAX_CONNECTIONS
+			max_keepalive = settings.SPOTIFY_MAX_KEEPALIVE
+		else:
+			max_connections = settings.LISTEN_NOTES_MAX_CONNECTIONS
+			max_keepalive = settings.LISTEN_NOTES_MAX_KEEPALIVE
+		return httpx.Limits(
+			max_connections=max_connections,
+			max_keepalive_connections=max_keepalive,
+			keepalive_expiry=settings.PROVIDER_KEEPALIVE_EXPIRY,
+		)
+
+	def _create(self, provider: str) -> httpx.AsyncClient:
+		stats = self._stats.setdefault(provider, {"requests": 0, "new_connections": 0})
+
+		async def trace(event_name: str, info: Dict[str, Any]) -> None:
+			if event_name == "connection.connect_tcp.complete":
+				stats["new_connections"] += 1
+
+		async def on_request(request: httpx.Request) -> None:
+			stats["requests"] += 1
+			request.extensions["trace"] = trace
+
+		transport = None
+		if settings.PROVIDER_SIMULATOR:
+			transport = ProviderSimulator(SimulatorProfile.parse(settings.PROVIDER_SIMULATOR))
+			self._simulators[provider] = transport
+		return httpx.AsyncClient(
+			timeout=settings.PROVIDER_TIMEOUT,
+			limits=self._limits(provider),
+			http2=settings.PROVIDER_HTTP2,
+			transport=transport,
+			event_hooks={"request": [on_request]},
+		)
+
+	def get(self, provider: str) -> httpx.AsyncClient:
+		client = self._clients.get(provider)
+		if client is None or client.is_closed:
+			client = self._create(provider)
+			self._clients[provider] = client
+		return client
+
+	async def start(self) -> None:
+		for provider in PROVIDERS:
+			self.get(provider)
+
+	async def aclose(self) -> None:
+		clients, self._clients = self._clients, {}
+		for client in clients.values():
+			await client.aclose()
+
+	def stats(self) -> Dict[str, Dict[str, Any]]:
+		out: Dict[str, Dict[str, Any]] = {}
+		for provider, stats in self._stats.items():
+			requests = stats["requests"]
+			new_connections = stats["new_connections"]
+			reused = max(requests - new_connections, 0)
+			out[provider] = {
+				"requests": requests,
+				"new_connections": new_connections,
+				"reused_connections": reused,
+				"reuse_ratio": round(reused / requests, 4) if requests else None,
+				"open": provider in self._clients and not self._clients[provider].is_closed,
+			}
+			if provider in self._simulators:
+				out[provider]["simulator"] = self._simulators[provider].stats()
+		return out
+
+provider_clients = ProviderClients()
+
+def get_http_client(provider: str) -> httpx.AsyncClient:
+	return provider_clients.get(provider)
@@ -0,0 +1,303 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from ..config import settings
+from ..db import get_database
+
+# A listen counts for at least this much even when it was barely started.
+LISTEN_FLOOR = 0.1
+FAVORITE_WEIGHT = 1.0
+
+def top_k_rows(scores: sparse.csr_matrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+	"""Column indices and values of the ``k`` largest entries of every row, ``-1``-padded."""
+	n = scores.shape[0]
+	neighbors = np.full((n, k), -1, dtype=np.int32)
+	values = np.zeros((n, k), dtype=np.float32)
+	if not scores.nnz:
+		return neighbors, values
+	rows = np.repeat(np.arange(n, dtype=np.int32), np.diff(scores.indptr))
+	order = np.lexsort((-scores.data, rows))
+	ranks = np.arange(scores.nnz) - scores.indptr[rows[order]]
+	keep = order[ranks < k]
+	neighbors[rows[keep], ranks[ranks < k]] = scores.indices[keep]
+	values[rows[keep], ranks[ranks < k]] = scores.data[keep]
+	return neighbors, values
+
+def interaction_matrix(users: np.ndarray, items: np.ndarray, weights: np.ndarray, shape: Tuple[int, int]) -> sparse.csr_matrix:
+	"""User x item CSR matrix; duplicate pairs keep their maximum weight."""
+	# Sort by (pair, weight) and keep each pair's last entry.
+	pairs = users.astype(np.int64) * shape[1] + items
+	order = np.lexsort((weights, pairs))
+	pairs, weights = pairs[order], weights[order]
+	last = np.append(pairs[1:] != pairs[:-1], True)
+	pairs, weights = pairs[last], weights[last]
+	return sparse.csr_matrix(
+		(weights.astype(np.float32), ((pairs // shape[1]).astype(np.int32), (pairs % shape[1]).astype(np.int32))),
+		shape=shape,
+	)
+
+async def load_interactions(watermarks: Dict[str, Any]) -> Tuple[List[str], List[str], List[float], Dict[str, Any]]:
+	"""Listen and favorite events newer than ``watermarks`` (last ``_id`` per collection), with the new watermarks.
+
+	Listens weigh their completion fraction (at least ``LISTEN_FLOOR``), favorites ``FAVORITE_WEIGHT``.
+	"""
+	db = await get_database()
+	users: List[str] = []
+	items: List[str] = []
+	weights: List[float] = []
+	marks = dict(watermarks)
+	sources = (
+		("user_history", {"history_type": "listen"}, "podcast_id", {"podcast_id": 1, "completion_percentage": 1}),
+		("user_favorites", {"item_type": {"$in": ["podcast", "episode"]}}, "item_id", {"item_id": 1}),
+	)
+	for name, query, item_field, projection in sources:
+		if name in watermarks:
+			query = {**query, "_id": {"$gt": watermarks[name]}}
+		cursor = db.get_collection(name).find(query, {"user_id": 1, **projection}).sort("_id", 1).batch_size(5000)
+		async for doc in cursor:
+			marks[name] = doc["_id"]
+			user, item = doc.get("user_id"), doc.get(item_field)
+			if not user or not item:
+				continue
+			if name == "user_history":
+				weight = min(max(float(doc.get("completion_percentage") or 0) / 100, LISTEN_FLOOR), 1.0)
+			else:
+				weight = FAVORITE_WEIGHT
+			users.append(str(user))
+			items.append(str(item))
+			weights.append(weight)
+	return users, items, weights, marks
+
+class ItemItemModel:
+	"""Item-item cosine neighbours over a sparse user x item interaction matrix.
+
+	Interactions are implicit weights in ``(0, 1]``; repeated events for the same pair keep the
+	strongest. Each user's row is damped by ``1 / log2(1 + items)`` so heavy users do not dominate
+	co-occurrence, and only their ``max_user_items`` strongest interactions are used. Similarities
+	are computed ``block_size`` items at a time as ``R[:, block].T @ D @ R`` and reduced to the top
+	``k`` straight away, so the full item x item matrix never exists. ``update`` recomputes the
+	lists of items with new interactions and offers them to their neighbours' lists, as cosine is
+	symmetric; shifts in other pairs' scores wait for the next ``fit``.
+	"""
+
+	def __init__(self, k: int, max_user_items: int, block_size: int) -> None:
+		self.k = k
+		self.max_user_items = max_user_items
+		self.block_size = block_size
+		self.user_ids: List[str] = []
+		self.item_ids: List[str] = []
+		self.user_number: Dict[str, int] = {}
+		self.item_number: Dict[str, int] = {}
+		self.interactions = sparse.csr_matrix((0, 0), dtype=np.float32)
+		self.neighbors = np.full((0, k), -1, dtype=np.int32)
+		self.scores = np.zeros((0, k), dtype=np.float32)
+
+	@staticmethod
+	def _numbers(ids: Sequence[str], numbers: Dict[str, int], names: List[str]) -> np.ndarray:
+		out = np.empty(len(ids), dtype=np.int32)
+		for i, value in enumerate(ids):
+			number = numbers.get(value)
+			if number is None:
+				number = numbers[value] = len(names)
+				names.append(value)
+			out[i] = number
+		return out
+
+	def encode(self, user_ids: Sequence[str], item_ids: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+		return self._numbers(user_ids, self.user_number, self.user_ids), self._numbers(item_ids, self.item_number, self.item_ids)
+
+	def _cap(self, matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+		lengths = np.diff(matrix.indptr)
+		heavy = np.flatnonzero(lengths > self.max_user_items)
+		if not len(heavy):
+			return matrix
+		matrix = matrix.copy()
+		for row in heavy:
+			values = matrix.data[matrix.indptr[row]:matrix.indptr[row + 1]]
+			values[np.argsort(values, kind="stable")[:-self.max_user_items]] = 0
+		matrix.eliminate_zeros()
+		return matrix
+
+	def _similar_items(self, interactions: sparse.csr_matrix, items: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+		capped = self._cap(interactions)
+		lengths = np.diff(capped.indptr)
+		damping = (1 / np.log2(1 + np.maximum(lengths, 1))).astype(np.float32)
+		damped = sparse.diags(damping) @ capped
+		norms = np.sqrt(np.asarray(capped.multiply(damped).sum(axis=0)).ravel()).astype(np.float32)
+		norms[norms == 0] = 1
+		by_item = capped.T.tocsr()
+		neighbors = np.full((len(items), self.k), -1, dtype=np.int32)
+		scores = np.zeros((len(items), self.k), dtype=np.float32)
+		for start in range(0, len(items), self.block_size):
+			block = items[start:start + self.block_size]
+			co = (by_item[block] @ damped).tocsr()
+			rows = np.repeat(block, np.diff(co.indptr))
+			co.data /= norms[rows] * norms[co.indices]
+			co.data[co.indices == rows] = 0
+			co.eliminate_zeros()
+			neighbors[start:start + len(block)], scores[start:start + len(block)] = top_k_rows(co, self.k)
+		return neighbors, scores
+
+	def fit(self, users: np.ndarray, items: np.ndarray, weights: np.ndarray) -> None:
+		"""Build from encoded interactions, replacing everything."""
+		shape = (len(self.user_ids), len(self.item_ids))
+		self.interactions = interaction_matrix(users, items, weights, shape)
+		self.neighbors, self.scores = self._similar_items(self.interactions, np.arange(shape[1], dtype=np.int32))
+
+	def update(self, users: np.ndarray, items: np.ndarray, weights: np.ndarray) -> int:
+		"""Merge new encoded interactions and refresh the neighbour lists they affect. Returns that count."""
+		if not len(users):
+			return 0
+		shape = (len(self.user_ids), len(self.item_ids))
+		previous = self.interactions.copy()
+		previous.resize(shape)
+		merged = previous.maximum(interaction_matrix(users, items, weights, shape)).tocsr()
+		changed = np.unique(items).astype(np.int32)
+		neighbors = np.full((shape[1], self.k), -1, dtype=np.int32)
+		scores = np.zeros((shape[1], self.k), dtype=np.float32)
+		neighbors[:len(self.neighbors)], scores[:len(self.scores)] = self.neighbors, self.scores
+		neighbors[changed], scores[changed] = self._similar_items(merged, changed)
+		offered = self._offer(neighbors, scores, changed)
+		# Neighbour arrays first: readers index them with item numbers taken from the interactions.
+		self.neighbors, self.scores = neighbors, scores
+		self.interactions = merged
+		return len(changed) + len(offered)
+
+	@staticmethod
+	def _offer(neighbors: np.ndarray, scores: np.ndarray, items: np.ndarray) -> np.ndarray:
+		"""Put each item into its neighbours' lists where it now ranks; returns the other lists touched."""
+		touched = set()
+		for item in items.tolist():
+			for other, score in zip(neighbors[item].tolist(), scores[item].tolist()):
+				if other < 0:
+					break
+				row = neighbors[other]
+				present = np.flatnonzero(row == item)
+				slot = int(present[0]) if len(present) else int(np.argmin(scores[other]))
+				if len(present) or score > scores[other, slot]:
+					row[slot] = item
+					scores[other, slot] = score
+					touched.add(other)
+		rows = np.fromiter(touched.difference(items.tolist()), dtype=np.int32)
+		if len(rows):
+			order = np.argsort(-scores[rows], axis=1, kind="stable")
+			neighbors[rows] = np.take_along_axis(neighbors[rows], order, axis=1)
+			scores[rows] = np.take_along_axis(scores[rows], order, axis=1)
+		return rows
+
+	def similar(self, item_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+		number = self.item_number.get(item_id)
+		neighbors, scores = self.neighbors, self.scores
+		if number is None or number >= min(len(neighbors), len(scores)):
+			return None
+		neighbors, scores = neighbors[number], scores[number]
+		return [(self.item_ids[n], round(float(s), 4)) for n, s in zip(neighbors[:limit], scores[:limit]) if n >= 0]
+
+	def recommend(self, user_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+		"""Items scored by the user's interactions times their neighbours' similarities, excluding seen items."""
+		number = self.user_number.get(user_id)
+		interactions = self.interactions
+		if number is None or number >= interactions.shape[0]:
+			return None
+		start, end = interactions.indptr[number], interactions.indptr[number + 1]
+		seen, weights = interactions.indices[start:end], interactions.data[start:end]
+		candidates = self.neighbors[seen].ravel()
+		contributions = (self.scores[seen] * weights[:, None]).ravel()
+		valid = candidates >= 0
+		candidates, contributions = candidates[valid], contributions[valid]
+		unique, inverse = np.unique(candidates, return_inverse=True)
+		totals = np.bincount(inverse, weights=contributions)
+		totals[np.isin(unique, seen)] = 0
+		if len(unique) > limit:
+			top = np.argpartition(totals, -limit)[-limit:]
+		else:
+			top = np.arange(len(unique))
+		top = top[np.argsort(-totals[top], kind="stable")]
+		return [(self.item_ids[unique[i]], round(float(totals[i]), 4)) for i in top if totals[i] > 0]
+
+	def stats(self) -> Dict[str, Any]:
+		matrix = self.interactions
+		return {
+			"users": len(self.user_ids),
+			"items": len(self.item_ids),
+			"interactions": int(matrix.nnz),
+			"k": self.k,
+			"bytes": int(matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes + self.neighbors.nbytes + self.scores.nbytes),
+		}
+
+def _new_model() -> ItemItemModel:
+	return ItemItemModel(settings.ITEMCF_TOP_K, settings.ITEMCF_MAX_USER_ITEMS, settings.ITEMCF_BLOCK)
+
+class CollaborativeFilter:
+	"""Keeps the item-item model in memory: full fit at startup and every ``ITEMCF_REBUILD_INTERVAL``,
+	incremental updates from new ``user_history`` listens and ``user_favorites`` every ``ITEMCF_REFRESH_INTERVAL``."""
+
+	def __init__(self) -> None:
+		self.model = _new_model()
+		self.ready = False
+		self.last_build: Optional[Dict[str, Any]] = None
+		self._watermarks: Dict[str, Any] = {}
+		self._lock = asyncio.Lock()
+		self._task: Optional[asyncio.Task] = None
+
+	async def build(self, full: bool = True) -> Dict[str, Any]:
+		start = time.perf_counter()
+		async with self._lock:
+			users, items, weights, marks = await load_interactions({} if full else self._watermarks)
+			model = _new_model() if full else self.model
+
+			def run() -> int:
+				user_numbers, item_numbers = model.encode(users, items)
+				weight_array = np.asarray(weights, dtype=np.float32)
+				if full:
+					model.fit(user_numbers, item_numbers, weight_array)
+					return len(model.item_ids)
+				return model.update(user_numbers, item_numbers, weight_array)
+
+			refreshed = await asyncio.to_thread(run)
+			self.model = model
+			self._watermarks = marks
+		self.ready = True
+		self.last_build = {
+			"full": full,
+			"events": len(users),
+			"items_refreshed": refreshed,
+			"seconds": round(time.perf_counter() - start, 3),
+			"finished_at": time.time(),
+		}
+		return self.last_build
+
+	async def _run(self) -> None:
+		last_full = 0.0
+		while True:
+			full = time.time() - last_full >= settings.ITEMCF_REBUILD_INTERVAL
+			try:
+				await self.build(full)
+				if full:
+					last_full = time.time()
+			except Exception as e:
+				print(f"Error building item-item model: {e}")
+			await asyncio.sleep(settings.ITEMCF_REFRESH_INTERVAL)
+
+	async def start(self) -> None:
+		if settings.ITEMCF_ENABLED and self._task is None:
+			self._task = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+			self._task = None
+
+	def similar(self, item_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+		return self.model.similar(item_id, limit)
+
+	def recommend(self, user_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+		return self.model.recommend(user_id, limit)
+
+	def stats(self) -> Dict[str, Any]:
+		return {"ready": self.ready, "last_build": self.last_build, **self.model.stats()}
+
+item_cf = CollaborativeFilter()
@@ -0,0 +1,90 @@
+"""Versioned directories of memory-mapped .npy arrays, published by flipping a symlink.
+
+A build writes every file into :func:`new_version` and then calls :func:`publish`, which points the
+store path at it with one ``os.replace``. Readers go through :func:`resolve` once and map all files
+from that directory, so they see either the old build or the new one, never a mix, and mappings of
+a pruned version stay valid until they are dropped.
+"""
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+import numpy as np
+from ..config import settings
+
+M = TypeVar("M")
+
+def mapped(path: Path) -> np.ndarray:
+	# Plain ndarray view over the mapping: slicing np.memmap objects carries per-call subclass overhead.
+	return np.asarray(np.load(path, mmap_mode="r"))
+
+def resolve(path: Path) -> Path:
+	"""The version directory ``path`` currently points at."""
+	return Path(path).resolve()
+
+def versions(path: Path) -> List[Path]:
+	"""Version directories written for ``path``, oldest first."""
+	prefix = f"{path.name}.v"
+	found = [p for p in path.parent.glob(f"{prefix}*") if p.name[len(prefix):].isdigit() and p.is_dir()]
+	return sorted(found, key=lambda p: int(p.name[len(prefix):]))
+
+def new_version(path: Path) -> Path:
+	"""An empty directory next to ``path`` for a new build."""
+	version = path.with_name(f"{path.name}.v{time.time_ns()}")
+	version.mkdir(parents=True)
+	return version
+
+def publish(version: Path, path: Path, keep: int = 2) -> None:
+	"""Point the ``path`` symlink at ``version`` and prune all but the newest ``keep`` versions."""
+	link = path.with_name(f"{path.name}.link-{os.getpid()}")
+	link.unlink(missing_ok=True)
+	os.symlink(version.name, link)
+	os.replace(link, path)
+	for old in versions(path)[:-keep]:
+		if old != version:
+			shutil.rmtree(old, ignore_errors=True)
+
+class MappedHandle(Generic[M]):
+	"""Process-wide handle on the model mapped from a store path, if one has been published.
+
+	``opener`` maps a version directory. The path and the reload interval are read from the named
+	settings; at most every interval :meth:`current` checks where the path points and remaps it when
+	a newer version has been published, keeping the old model if that fails.
+	"""
+
+	def __init__(self, name: str, opener: Callable[[Path], M], path_setting: str, interval_setting: str) -> None:
+		self.name = name
+		self.opener = opener
+		self.path_setting = path_setting
+		self.interval_setting = interval_setting
+		self.model: Optional[M] = None
+		self.version: Optional[Path] = None
+		self.source: Optional[Path] = None
+		self._checked = 0.0
+
+	def load(self, path: Optional[str] = None) -> bool:
+		self.source = Path(path or getattr(settings, self.path_setting))
+		self._checked = time.monotonic()
+		target = resolve(self.source)
+		if not (target / "meta.json").exists():
+			self.model, self.version = None, None
+			return False
+		self.model, self.version = self.opener(target), target
+		return True
+
+	def current(self) -> Optional[M]:
+		now = time.monotonic()
+		if self.source is not None and now - self._checked >= getattr(settings, self.interval_setting):
+			self._checked = now
+			if resolve(self.source) != self.version:
+				try:
+					self.load(str(self.source))
+				except Exception as e:
+					print(f"Error reloading {self.name}: {e}")
+		return self.model
+
+	def stats(self) -> Dict[str, Any]:
+		if self.model is None:
+			return {"loaded": False, "path": getattr(settings, self.path_setting)}
+		return {"loaded": True, "path": str(self.version), **self.model.stats()}  # type: ignore[attr-defined]
@@ -0,0 +1,108 @@
+import asyncio
+import base64
+import binascii
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from ..models import Podcast
+from ..agents.listennotes_agent import search_podcasts as ln_search
+from ..agents.spotify_agent import search_episodes as spotify_search
+from ..utils.sanitize import sanitize_query
+from .federation import federate
+
+SPOTIFY_MAX_OFFSET = 1000
+
+Offsets = Dict[str, Optional[int]]
+
+class InvalidCursor(ValueError):
+	pass
+
+class StreamFailed(RuntimeError):
+	"""Raised from ``stream_pages`` when a page could not be fetched, after the pages already yielded."""
+
+def initial_offsets(provider: str) -> Offsets:
+	if provider == "all":
+		return {"spotify": 0, "listen_notes": 0}
+	return {provider: 0}
+
+def encode_cursor(query: str, offsets: Offsets) -> Optional[str]:
+	live = {p: o for p, o in offsets.items() if o is not None}
+	if not live:
+		return None
+	raw = json.dumps({"q": sanitize_query(query).casefold(), "o": live}, separators=(",", ":"))
+	return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, query: str, provider: str) -> Offsets:
+	try:
+		data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+		offsets = {str(p): int(o) for p, o in data["o"].items()}
+	except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+		raise InvalidCursor("Malformed cursor")
+	if data.get("q") != sanitize_query(query).casefold():
+		raise InvalidCursor("Cursor does not belong to this query")
+	expected = initial_offsets(provider)
+	if not set(offsets) <= set(expected):
+		raise InvalidCursor("Cursor does not belong to this provider")
+	return {p: offsets.get(p) for p in expected}
+
+def _next_offset(provider: str, offset: int, count: int, limit: int, status: str) -> Optional[int]:
+	# A failed or slow provider keeps its place, so the next page retries it instead of ending.
+	if status in ("timeout", "error"):
+		return offset
+	if provider == "spotify":
+		nxt = offset + limit
+		return nxt if count >= limit and nxt < SPOTIFY_MAX_OFFSET else None
+	return offset + count if count else None
+
+async def fetch_page(query: str, offsets: Offsets, limit: int) -> Tuple[List[Podcast], Offsets, List[Dict[str, object]]]:
+	calls = {}
+	if offsets.get("spotify") is not None:
+		calls["spotify"] = lambda o=offsets["spotify"]: spotify_search(query, limit=limit, offset=o)
+	if offsets.get("listen_notes") is not None:
+		calls["listen_notes"] = lambda o=offsets["listen_notes"]: ln_search(query, offset=o, page_size=limit)
+	if not calls:
+		return [], offsets, []
+	podcasts, timings = await federate(calls)
+	next_offsets: Offsets = {p: None for p in offsets}
+	for t in timings:
+		provider = str(t["provider"])
+		next_offsets[provider] = _next_offset(provider, offsets[provider], int(t["count"]), limit, str(t["status"]))
+	return podcasts, next_offsets, timings
+
+async def stream_pages(query: str, offsets: Offsets, limit: int, max_pages: int) -> AsyncIterator[List[Podcast]]:
+	"""Yield successive pages while the next one is fetched in the background; at most one page is buffered.
+
+	Raises ``StreamFailed`` once the buffered pages are consumed if fetching failed, including an
+	empty page on which every provider errored or timed out, so a truncated stream is not mistaken
+	for the end of the results.
+	"""
+	queue: "asyncio.Queue[Optional[List[Podcast]]]" = asyncio.Queue(maxsize=1)
+	failure: List[str] = []
+
+	async def produce() -> None:
+		current = offsets
+		try:
+			for _ in range(max_pages):
+				page, current, timings = await fetch_page(query, current, limit)
+				if page:
+					await queue.put(page)
+				elif timings and all(t["status"] in ("error", "timeout") for t in timings):
+					failure.append(", ".join(f'{t["provider"]} {t["status"]}' for t in timings))
+				if all(o is None for o in current.values()) or not page:
+					break
+		except Exception as e:
+			print(f"Error streaming search pages: {e}")
+			failure.append(str(e) or type(e).__name__)
+		await queue.put(None)
+
+	producer = asyncio.create_task(produce())
+	try:
+		while True:
+			page = await queue.get()
+			if page is None:
+				break
+			yield page
+		if failure:
+			raise StreamFailed(failure[0])
+	finally:
+		producer.cancel()
+		await asyncio.gather(producer, return_exceptions=True)
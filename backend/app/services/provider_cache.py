@@ -0,0 +1,138 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from ..models import Podcast
+from ..utils.sanitize import sanitize_query
+from ..config import settings
+from .cache_store import CacheStore, create_cache_store
+
+Fetcher = Callable[[], Awaitable[List[Podcast]]]
+
+class _Entry:
+	__slots__ = ("value", "expires_at", "stale_until")
+
+	def __init__(self, value: List[Podcast], expires_at: float, stale_until: float) -> None:
+		self.value = value
+		self.expires_at = expires_at
+		self.stale_until = stale_until
+
+def search_key(provider: str, query: str, limit: Optional[int] = None, offset: int = 0) -> str:
+	q = sanitize_query(query).casefold()
+	return f"{provider}:search:{limit if limit is not None else '-'}:{offset}:{q}"
+
+class ProviderCache:
+	"""Bounded LRU of provider results with per-provider TTLs, miss coalescing and stale-while-revalidate."""
+
+	def __init__(self, max_entries: int, store: Optional[CacheStore] = None) -> None:
+		self.max_entries = max_entries
+		self.store = store
+		self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+		self._inflight: Dict[str, asyncio.Task] = {}
+		self._stats = {
+			"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "refreshes": 0,
+			"l2_hits": 0, "l2_errors": 0,
+		}
+
+	def _ttl(self, provider: str, value: List[Podcast]) -> float:
+		if not value:
+			return settings.CACHE_NEGATIVE_TTL
+		if provider == "spotify":
+			return settings.CACHE_TTL_SPOTIFY
+		return settings.CACHE_TTL_LISTEN_NOTES
+
+	def _store(self, key: str, provider: str, value: List[Podcast], ttl: Optional[float] = None) -> List[Podcast]:
+		now = time.time()
+		if ttl is None or not value:
+			ttl = self._ttl(provider, value)
+		self._entries[key] = _Entry(value, now + ttl, now + ttl + settings.CACHE_STALE_TTL)
+		self._entries.move_to_end(key)
+		while len(self._entries) > self.max_entries:
+			self._entries.popitem(last=False)
+			self._stats["evictions"] += 1
+		return value
+
+	async def _load_shared(self, key: str) -> Optional[Tuple[List[Podcast], float]]:
+		if self.store is None:
+			return None
+		try:
+			found = await self.store.get(key)
+		except Exception:
+			self._stats["l2_errors"] += 1
+			return None
+		if found is None:
+			return None
+		payload, expires_at = found
+		self._stats["l2_hits"] += 1
+		return [Podcast.model_construct(**d) for d in payload], expires_at - time.time()
+
+	async def _save_shared(self, key: str, value: List[Podcast], ttl: float) -> None:
+		if self.store is None:
+			return
+		try:
+			await self.store.set(key, [p.model_dump(exclude_none=True) for p in value], ttl)
+		except Exception:
+			self._stats["l2_errors"] += 1
+
+	def _fetch(self, key: str, provider: str, fetch: Fetcher, ttl: Optional[float]) -> asyncio.Task:
+		task = self._inflight.get(key)
+		if task is not None:
+			self._stats["coalesced"] += 1
+			return task
+
+		async def run() -> List[Podcast]:
+			try:
+				shared = await self._load_shared(key)
+				if shared is not None:
+					return self._store(key, provider, shared[0], shared[1])
+				# Provider errors propagate from fetch() here, so a failure is never stored in either tier.
+				value = self._store(key, provider, await fetch(), ttl)
+				entry = self._entries.get(key)
+				if entry is not None:
+					await self._save_shared(key, value, entry.expires_at - time.time())
+				return value
+			finally:
+				self._inflight.pop(key, None)
+
+		task = asyncio.create_task(run())
+		task.add_done_callback(lambda t: t.cancelled() or t.exception())
+		self._inflight[key] = task
+		return task
+
+	async def get_or_fetch(
+		self, key: str, provider: str, fetch: Fetcher, ttl: Optional[float] = None, allow_stale: bool = True
+	) -> List[Podcast]:
+		"""Cached result for ``key``; with ``allow_stale=False`` an expired entry waits for a refresh instead."""
+		now = time.time()
+		entry = self._entries.get(key)
+		if entry is not None and now < (entry.stale_until if allow_stale else entry.expires_at):
+			self._entries.move_to_end(key)
+			if now < entry.expires_at:
+				self._stats["hits"] += 1
+			else:
+				self._stats["stale_hits"] += 1
+				if key not in self._inflight:
+					self._stats["refreshes"] += 1
+				self._fetch(key, provider, fetch, ttl)
+			return list(entry.value)
+		self._stats["misses"] += 1
+		return list(await asyncio.shield(self._fetch(key, provider, fetch, ttl)))
+
+	async def invalidate(self, prefix: str = "") -> Dict[str, int]:
+		keys = [k for k in self._entries if k.startswith(prefix)]
+		for k in keys:
+			del self._entries[k]
+		shared = await self.store.invalidate_prefix(prefix) if self.store is not None else 0
+		return {"local": len(keys), "shared": shared}
+
+	def stats(self) -> Dict[str, Any]:
+		lookups = self._stats["hits"] + self._stats["stale_hits"] + self._stats["misses"]
+		return {
+			**self._stats,
+			"entries": len(self._entries),
+			"max_entries": self.max_entries,
+			"inflight": len(self._inflight),
+			"hit_ratio": round((self._stats["hits"] + self._stats["stale_hits"]) / lookups, 4) if lookups else None,
+		}
+
+provider_cache = ProviderCache(settings.CACHE_MAX_ENTRIES, create_cache_store())
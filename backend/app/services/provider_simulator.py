@@ -0,0 +1,182 @@
+import asyncio
+import copy
+import json
+import random
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import httpx
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures"
+
+class SimulatorProfile:
+	"""Latency, error and throttling behaviour of the simulated providers.
+
+	Parsed from a comma-separated spec such as
+	``latency=lognormal:80:0.5,error_rate=0.02,timeout_rate=0.01,throttle_every=100,throttle_burst=5,retry_after=1,seed=7``.
+	Latency distributions: ``fixed:<ms>``, ``uniform:<min_ms>:<max_ms>``, ``lognormal:<median_ms>:<sigma>``.
+	"""
+
+	def __init__(
+		self,
+		latency: str = "fixed:0",
+		error_rate: float = 0.0,
+		timeout_rate: float = 0.0,
+		timeout_after: float = 15.0,
+		throttle_every: int = 0,
+		throttle_burst: int = 0,
+		retry_after: int = 1,
+		seed: Optional[int] = None,
+	) -> None:
+		self.latency = latency
+		self.error_rate = error_rate
+		self.timeout_rate = timeout_rate
+		self.timeout_after = timeout_after
+		self.throttle_every = throttle_every
+		self.throttle_burst = throttle_burst
+		self.retry_after = retry_after
+		self.seed = seed
+
+	@classmethod
+	def parse(cls, spec: str) -> "SimulatorProfile":
+		kwargs: Dict[str, Any] = {}
+		casts = {
+			"latency": str, "error_rate": float, "timeout_rate": float, "timeout_after": float,
+			"throttle_every": int, "throttle_burst": int, "retry_after": int, "seed": int,
+		}
+		for part in filter(None, (p.strip() for p in spec.split(","))):
+			key, _, value = part.partition("=")
+			if key not in casts:
+				raise ValueError(f"Unknown simulator option: {key}")
+			kwargs[key] = casts[key](value)
+		return cls(**kwargs)
+
+	def sample_latency(self, rng: random.Random) -> float:
+		kind, *params = self.latency.split(":")
+		values = [float(p) for p in params]
+		if kind == "fixed":
+			ms = values[0] if values else 0.0
+		elif kind == "uniform":
+			ms = rng.uniform(values[0], values[1])
+		elif kind == "lognormal":
+			ms = rng.lognormvariate(0, values[1] if len(values) > 1 else 0.5) * values[0]
+		else:
+			raise ValueError(f"Unknown latency distribution: {kind}")
+		return ms / 1000
+
+def _load(name: str) -> Dict[str, Any]:
+	return json.loads((FIXTURES / name).read_text())
+
+class ProviderSimulator(httpx.AsyncBaseTransport):
+	"""httpx transport that replays recorded Spotify and ListenNotes payloads offline."""
+
+	def __init__(self, profile: Optional[SimulatorProfile] = None) -> None:
+		self.profile = profile or SimulatorProfile()
+		self.rng = random.Random(self.profile.seed)
+		self.fixtures = {
+			"spotify_token": _load("spotify_token.json"),
+			"spotify_search": _load("spotify_search.json"),
+			"listennotes_search": _load("listennotes_search.json"),
+			"listennotes_curated": _load("listennotes_curated_podcasts.json"),
+		}
+		self.requests = 0
+		self.counters: Dict[str, int] = {"ok": 0, "errors": 0, "throttled": 0, "timeouts": 0, "not_found": 0}
+		self.routes: Dict[str, int] = {}
+
+	def _throttled(self) -> bool:
+		every, burst = self.profile.throttle_every, self.profile.throttle_burst
+		return every > 0 and burst > 0 and (self.requests - 1) % every >= every - burst
+
+	async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+		self.requests += 1
+		route = f"{request.url.host}{request.url.path}"
+		self.routes[route] = self.routes.get(route, 0) + 1
+		await asyncio.sleep(self.profile.sample_latency(self.rng))
+		if self.profile.timeout_rate and self.rng.random() < self.profile.timeout_rate:
+			self.counters["timeouts"] += 1
+			await asyncio.sleep(self.profile.timeout_after)
+			raise httpx.ReadTimeout("simulated timeout", request=request)
+		if self._throttled():
+			self.counters["throttled"] += 1
+			return httpx.Response(429, headers={"Retry-After": str(self.profile.retry_after)}, request=request)
+		if self.profile.error_rate and self.rng.random() < self.profile.error_rate:
+			self.counters["errors"] += 1
+			return httpx.Response(503, json={"error": "simulated failure"}, request=request)
+		payload = self._route(request)
+		if payload is None:
+			self.counters["not_found"] += 1
+			return httpx.Response(404, json={"error": "not simulated"}, request=request)
+		self.counters["ok"] += 1
+		return httpx.Response(200, json=payload, request=request)
+
+	def _route(self, request: httpx.Request) -> Optional[Dict[str, Any]]:
+		host, path, params = request.url.host, request.url.path, request.url.params
+		if host == "accounts.spotify.com" and path == "/api/token":
+			return self.fixtures["spotify_token"]
+		if host == "api.spotify.com" and path == "/v1/search":
+			return self._spotify_search(int(params.get("limit", 20)), int(params.get("offset", 0)))
+		if host == "listen-api.listennotes.com" and path == "/api/v2/search":
+			return self._listennotes_search(int(params.get("offset", 0)), int(params.get("page_size", 10)))
+		if host == "listen-api.listennotes.com" and path == "/api/v2/curated_podcasts":
+			return self.fixtures["listennotes_curated"]
+		if host == "api.spotify.com" and path == "/v1/episodes":
+			return self._spotify_episodes(params.get("ids", "").split(","))
+		if host == "listen-api.listennotes.com" and path in ("/api/v2/episodes", "/api/v2/podcasts"):
+			form = httpx.QueryParams(request.content.decode())
+			return self._listennotes_batch(path.rsplit("/", 1)[1], form.get("ids", "").split(","))
+		return None
+
+	def _spotify_search(self, limit: int, offset: int) -> Dict[str, Any]:
+		recorded = self.fixtures["spotify_search"]["episodes"]
+		pool = recorded["items"]
+		total = recorded["total"]
+		items = []
+		for i in range(offset, min(offset + limit, total)):
+			item = copy.copy(pool[i % len(pool)])
+			# Keep ids unique across pages so pagination and dedup behave like the real API.
+			item["id"] = f"{item['id'][:16]}{i:06d}"
+			items.append(item)
+		return {"episodes": {**recorded, "items": items, "limit": limit, "offset": offset}}
+
+	def _listennotes_search(self, offset: int, page_size: int) -> Dict[str, Any]:
+		recorded = self.fixtures["listennotes_search"]
+		pool = recorded["results"]
+		total = recorded["total"]
+		results = []
+		for i in range(offset, min(offset + page_size, total)):
+			item = copy.copy(pool[i % len(pool)])
+			item["id"] = f"{item['id'][:24]}{i:08d}"
+			results.append(item)
+		next_offset = offset + len(results)
+		return {**recorded, "results": results, "count": len(results), "next_offset": next_offset if next_offset < total else None}
+
+	def _spotify_episodes(self, ids: List[str]) -> Dict[str, Any]:
+		pool = self.fixtures["spotify_search"]["episodes"]["items"]
+		episodes = []
+		for i in filter(None, ids):
+			# Ids ending in "x" play the part of episodes that were taken down.
+			if i.endswith("x"):
+				episodes.append(None)
+				continue
+			item = copy.copy(pool[zlib.crc32(i.encode()) % len(pool)])
+			item["id"] = i
+			episodes.append(item)
+		return {"episodes": episodes}
+
+	def _listennotes_batch(self, kind: str, ids: List[str]) -> Dict[str, Any]:
+		if kind == "episodes":
+			pool = self.fixtures["listennotes_search"]["results"]
+		else:
+			pool = [p for curated in self.fixtures["listennotes_curated"]["curated_lists"] for p in curated["podcasts"]]
+		items = []
+		for i in filter(None, ids):
+			# Split ids deterministically between episodes and podcasts so callers exercise both lookups.
+			if i.endswith("x") or (zlib.crc32(i.encode()) % 2 == 0) != (kind == "episodes"):
+				continue
+			item = copy.copy(pool[zlib.crc32(i.encode()) % len(pool)])
+			item["id"] = i
+			items.append(item)
+		return {kind: items}
+
+	def stats(self) -> Dict[str, Any]:
+		return {"requests": self.requests, **self.counters, "routes": dict(self.routes)}
@@ -0,0 +1,363 @@
+"""Dashboard recommendations: live computation, a per-user memory cache and offline precomputation.
+
+Precompute recommendations for recently active users into ``user_recommendations`` with::
+
+	python -m app.services.recommendations precompute [--active-days 7] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from pymongo import ASCENDING, DESCENDING
+from ..models import Podcast
+from ..config import settings
+from ..db import get_database
+from ..agents.spotify_agent import search_episodes as spotify_search
+from .http_clients import provider_clients
+
+Results = List[Dict[str, Any]]
+
+async def top_queries(email: str, days: int, limit: int = 3) -> List[str]:
+	db = await get_database()
+	since = datetime.utcnow() - timedelta(days=days)
+	cursor = db.get_collection("search_logs").aggregate([
+		{"$match": {"email": email, "ts": {"$gte": since}}},
+		{"$group": {"_id": "$query", "count": {"$sum": 1}}},
+		{"$sort": {"count": -1}},
+		{"$limit": limit},
+	])
+	return [row["_id"] async for row in cursor if row.get("_id")]
+
+async def search_all(queries: List[str], deadline: float) -> Tuple[List[Tuple[str, List[Podcast]]], bool]:
+	"""Run one provider search per query concurrently; queries still pending at ``deadline`` are dropped.
+
+	Returns the finished ``(query, podcasts)`` pairs in query order and whether every query finished.
+	"""
+	tasks = {q: asyncio.create_task(spotify_search(q, limit=6)) for q in queries}
+	_, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+	for task in pending:
+		task.cancel()
+	finished: List[Tuple[str, List[Podcast]]] = []
+	for q, task in tasks.items():
+		if task in pending or task.exception() is not None:
+			continue
+		finished.append((q, task.result()))
+	return finished, not pending and len(finished) == len(tasks)
+
+def recommendation_records(email: str, days: int, queries: List[str], found: List[Tuple[str, List[Podcast]]]) -> Tuple[Results, Results]:
+	"""Dashboard results and the ``user_recommendations`` records describing them."""
+	results: Results = []
+	records: Results = []
+	frequency = {q: queries.count(q) for q in set(queries)}
+	for query, items in found:
+		for p in items:
+			podcast_data = p.model_dump(exclude_none=True)
+			results.append(podcast_data)
+			records.append({
+				"rank": len(records),
+				"podcast": podcast_data,
+				"recommendation_id": str(uuid.uuid4()),
+				"user_id": email,  # Using email as user_id for now
+				"user_email": email,
+				"podcast_id": podcast_data.get("id", ""),
+				"podcast_title": podcast_data.get("title", ""),
+				"podcast_description": podcast_data.get("description", ""),
+				"podcast_thumbnail": podcast_data.get("thumbnail", ""),
+				"podcast_duration": podcast_data.get("duration", 0),
+				"podcast_source": podcast_data.get("source", "Spotify"),
+				"recommendation_reason": f"Based on your frequent searches for '{query}' - you searched this {frequency[query]} times recently",
+				"confidence_score": 0.85,  # High confidence based on search frequency
+				"created_at": datetime.utcnow().isoformat(),
+				"user_preferences_used": {
+					"search_queries": queries,
+					"days_analyzed": days,
+					"query_frequency": frequency,
+				},
+			})
+	return results, records
+
+async def compute(email: str, days: int) -> Tuple[Results, Results, bool]:
+	"""Live recommendations for ``email``: ``(results, records, complete)``."""
+	queries = await top_queries(email, days)
+	if not queries:
+		return [], [], True
+	found, complete = await search_all(queries, settings.RECOMMENDATIONS_DEADLINE)
+	results, records = recommendation_records(email, days, queries, found)
+	return results, records, complete
+
+async def load_saved(email: str, days: int) -> Optional[Results]:
+	"""The stored recommendation set, if it was built for ``days`` and is newer than the user's last search."""
+	db = await get_database()
+	max_age = timedelta(seconds=settings.RECOMMENDATIONS_PRECOMPUTE_MAX_AGE)
+	records, last_search = await asyncio.gather(
+		db.get_collection("user_recommendations").find(
+			{"user_id": email, "rank": {"$exists": True}}, {"_id": 0, "podcast": 1, "created_at": 1, "user_preferences_used.days_analyzed": 1}
+		).sort("rank", ASCENDING).to_list(None),
+		db.get_collection("search_logs").find_one({"email": email}, {"ts": 1}, sort=[("ts", DESCENDING)]),
+	)
+	if not records or records[0].get("user_preferences_used", {}).get("days_analyzed") != days:
+		return None
+	try:
+		created_at = datetime.fromisoformat(records[0]["created_at"])
+	except (KeyError, TypeError, ValueError):
+		return None
+	if datetime.utcnow() - created_at > max_age:
+		return None
+	if last_search is not None and last_search["ts"] > created_at:
+		return None
+	return [r["podcast"] for r in records if "podcast" in r]
+
+async def ensure_recommendation_indexes() -> None:
+	db = await get_database()
+	await db.get_collection("user_recommendations").create_index([("user_id", ASCENDING), ("rank", ASCENDING)])
+	await db.get_collection("search_logs").create_index([("email", ASCENDING), ("ts", DESCENDING)])
+	await db.get_collection("search_logs").create_index([("ts", ASCENDING)])
+
+async def save_records(email: str, records: Results) -> None:
+	if not records:
+		return
+	db = await get_database()
+	user_recommendations = db.get_collection("user_recommendations")
+	try:
+		await user_recommendations.delete_many({"user_id": email})
+		await user_recommendations.insert_many(records)
+	except Exception as e:
+		print(f"Error saving recommendations: {e}")
+
+class _Entry:
+	__slots__ = ("results", "expires_at")
+
+	def __init__(self, results: Results, expires_at: float) -> None:
+		self.results = results
+		self.expires_at = expires_at
+
+class UserRecommendations:
+	"""Per-user dashboard recommendations, assembled once and served from memory.
+
+	Entries live for ``RECOMMENDATIONS_CACHE_TTL`` seconds (``CACHE_NEGATIVE_TTL`` when a search
+	missed the deadline) in an LRU bounded to ``RECOMMENDATIONS_CACHE_USERS`` users, and are
+	dropped when the user logs a new search. Concurrent loads for the same user share one build.
+	A miss first tries the set stored in ``user_recommendations`` by the precompute job (or by
+	another worker) and only computes live when that is missing or stale.
+	"""
+
+	def __init__(self, max_users: int) -> None:
+		self.max_users = max_users
+		self._entries: "OrderedDict[str, Dict[int, _Entry]]" = OrderedDict()
+		self._generation: Dict[str, int] = {}
+		self._inflight: Dict[Tuple[str, int], asyncio.Task] = {}
+		self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "stored": 0, "live": 0, "partial": 0, "invalidations": 0, "evictions": 0}
+
+	def _cached(self, email: str, days: int) -> Optional[Results]:
+		entry = self._entries.get(email, {}).get(days)
+		if entry is None or entry.expires_at <= time.time():
+			return None
+		self._entries.move_to_end(email)
+		return entry.results
+
+	def _store(self, email: str, days: int, results: Results, ttl: float) -> None:
+		self._entries.setdefault(email, {})[days] = _Entry(results, time.time() + ttl)
+		self._entries.move_to_end(email)
+		while len(self._entries) > self.max_users:
+			self._entries.popitem(last=False)
+			self._stats["evictions"] += 1
+
+	async def _build(self, email: str, days: int) -> Results:
+		generation = self._generation.get(email, 0)
+		try:
+			stored = await load_saved(email, days)
+			if stored is not None:
+				self._stats["stored"] += 1
+				results, complete = stored, True
+			else:
+				self._stats["live"] += 1
+				results, records, complete = await compute(email, days)
+				# load_saved treats stored sets as complete, so a deadline-truncated one is never persisted.
+				if complete:
+					await save_records(email, records)
+			if not complete:
+				self._stats["partial"] += 1
+			# A search logged while this was running makes the result stale before it is stored.
+			if self._generation.get(email, 0) == generation:
+				ttl = settings.RECOMMENDATIONS_CACHE_TTL if complete else min(settings.CACHE_NEGATIVE_TTL, settings.RECOMMENDATIONS_CACHE_TTL)
+				self._store(email, days, results, ttl)
+			return results
+		finally:
+			self._inflight.pop((email, days), None)
+			if not any(user == email for user, _ in self._inflight):
+				self._generation.pop(email, None)
+
+	async def get(self, email: str, days: int) -> Results:
+		email = email.lower()
+		cached = self._cached(email, days)
+		if cached is not None:
+			self._stats["hits"] += 1
+			return cached
+		key = (email, days)
+		task = self._inflight.get(key)
+		if task is None:
+			self._stats["misses"] += 1
+			task = asyncio.create_task(self._build(email, days))
+			task.add_done_callback(lambda t: t.cancelled() or t.exception())
+			self._inflight[key] = task
+		else:
+			self._stats["coalesced"] += 1
+		return await asyncio.shield(task)
+
+	def invalidate(self, email: str) -> None:
+		email = email.lower()
+		if any(user == email for user, _ in self._inflight):
+			self._generation[email] = self._generation.get(email, 0) + 1
+		if self._entries.pop(email, None) is not None:
+			self._stats["invalidations"] += 1
+
+	def stats(self) -> Dict[str, Any]:
+		lookups = self._stats["hits"] + self._stats["misses"] + self._stats["coalesced"]
+		return {
+			**self._stats,
+			"users": len(self._entries),
+			"max_users": self.max_users,
+			"inflight": len(self._inflight),
+			"hit_ratio": round(self._stats["hits"] / lookups, 4) if lookups else None,
+		}
+
+user_recommendations = UserRecommendations(settings.RECOMMENDATIONS_CACHE_USERS)
+
+async def active_users(active_days: int) -> AsyncIterator[str]:
+	"""Emails with a search in ``search_logs`` or any ``user_history`` event in the last ``active_days``."""
+	db = await get_database()
+	since = datetime.utcnow() - timedelta(days=active_days)
+	seen: Set[str] = set()
+	async for row in db.get_collection("search_logs").aggregate([
+		{"$match": {"ts": {"$gte": since}}},
+		{"$group": {"_id": "$email"}},
+	], allowDiskUse=True):
+		if row["_id"] and row["_id"] not in seen:
+			seen.add(row["_id"])
+			yield row["_id"]
+	# History timestamps are ISO strings from the user management API or datetimes from the agents.
+	user_ids = [
+		row["_id"] async for row in db.get_collection("user_history").aggregate([
+			{"$match": {"$or": [{"timestamp": {"$gte": since}}, {"timestamp": {"$gte": since.isoformat()}}]}},
+			{"$group": {"_id": "$user_id"}},
+		], allowDiskUse=True)
+	]
+	for i in range(0, len(user_ids), 1000):
+		async for profile in db.get_collection("user_profiles").find({"user_id": {"$in": user_ids[i:i + 1000]}}, {"email": 1}):
+			email = (profile.get("email") or "").lower()
+			if email and email not in seen:
+				seen.add(email)
+				yield email
+
+class RecommendationPrecomputer:
+	"""Writes recommendations for recently active users to ``user_recommendations`` ahead of their next visit.
+
+	Users are streamed from ``active_users`` to ``concurrency`` workers, so provider load stays
+	bounded and the provider guards pace the searches. Runs every ``RECOMMENDATIONS_PRECOMPUTE_INTERVAL``
+	seconds when that is set, or on demand from the CLI and ``/ops/recommendations/precompute``.
+	"""
+
+	def __init__(self) -> None:
+		self.running = False
+		self.last_run: Optional[Dict[str, Any]] = None
+		self._task: Optional[asyncio.Task] = None
+
+	async def run_once(self, days: int = 14, active_days: Optional[int] = None, concurrency: Optional[int] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+		start = time.perf_counter()
+		self.running = True
+		totals = {"users": 0, "saved": 0, "empty": 0, "partial": 0, "failed": 0}
+		queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=256)
+		workers_count = max(concurrency or settings.RECOMMENDATIONS_PRECOMPUTE_CONCURRENCY, 1)
+
+		async def worker() -> None:
+			while True:
+				email = await queue.get()
+				if email is None:
+					return
+				try:
+					_, records, complete = await compute(email, days)
+				except Exception:
+					totals["failed"] += 1
+					continue
+				if not complete:
+					totals["partial"] += 1
+				elif records:
+					await save_records(email, records)
+					totals["saved"] += 1
+				else:
+					totals["empty"] += 1
+
+		workers = [asyncio.create_task(worker()) for _ in range(workers_count)]
+		try:
+			async for email in active_users(active_days or settings.RECOMMENDATIONS_ACTIVE_DAYS):
+				if limit is not None and totals["users"] >= limit:
+					break
+				totals["users"] += 1
+				await queue.put(email)
+			for _ in workers:
+				await queue.put(None)
+			await asyncio.gather(*workers)
+		finally:
+			for task in workers:
+				task.cancel()
+			self.running = False
+		seconds = time.perf_counter() - start
+		self.last_run = {
+			**totals,
+			"seconds": round(seconds, 3),
+			"users_per_second": round(totals["users"] / seconds, 2) if seconds else None,
+			"finished_at": time.time(),
+		}
+		return self.last_run
+
+	async def _run(self) -> None:
+		while True:
+			await asyncio.sleep(settings.RECOMMENDATIONS_PRECOMPUTE_INTERVAL)
+			if self.running:
+				continue
+			try:
+				await self.run_once()
+			except Exception as e:
+				print(f"Error precomputing recommendations: {e}")
+
+	async def start(self) -> None:
+		if settings.RECOMMENDATIONS_PRECOMPUTE_INTERVAL > 0 and self._task is None:
+			self._task = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+			self._task = None
+
+	def stats(self) -> Dict[str, Any]:
+		return {"running": self.running, "last_run": self.last_run}
+
+recommendation_precomputer = RecommendationPrecomputer()
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Precompute dashboard recommendations for active users")
+	parser.add_argument("command", choices=["precompute"])
+	parser.add_argument("--days", type=int, default=14, help="search history analysed per user")
+	parser.add_argument("--active-days", type=int, default=settings.RECOMMENDATIONS_ACTIVE_DAYS)
+	parser.add_argument("--concurrency", type=int, default=settings.RECOMMENDATIONS_PRECOMPUTE_CONCURRENCY)
+	parser.add_argument("--limit", type=int, default=None)
+	args = parser.parse_args()
+
+	async def run() -> Dict[str, Any]:
+		try:
+			return await recommendation_precomputer.run_once(args.days, args.active_days, args.concurrency, args.limit)
+		finally:
+			await provider_clients.aclose()
+
+	result = asyncio.run(run())
+	print(
+		f"precomputed {result['saved']} of {result['users']} active users in {result['seconds']:.1f}s "
+		f"({result['users_per_second']} users/s; empty {result['empty']}, partial {result['partial']}, failed {result['failed']})"
+	)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,161 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+import httpx
+from ..config import settings
+from .http_clients import PROVIDERS, get_http_client
+
+class ProviderUnavailable(Exception):
+	def __init__(self, provider: str, reason: str, retry_after: Optional[float] = None) -> None:
+		super().__init__(f"{provider} unavailable: {reason}")
+		self.provider = provider
+		self.reason = reason
+		self.retry_after = retry_after
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+	if not value:
+		return None
+	value = value.strip()
+	if value.isdigit():
+		return float(value)
+	try:
+		return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+	except (TypeError, ValueError):
+		return None
+
+class TokenBucket:
+	def __init__(self, rate: float, capacity: float) -> None:
+		self.rate = rate
+		self.capacity = capacity
+		self.tokens = capacity
+		self.updated = time.monotonic()
+
+	def _refill(self) -> None:
+		now = time.monotonic()
+		self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+		self.updated = now
+
+	async def acquire(self, max_wait: float) -> bool:
+		deadline = time.monotonic() + max_wait
+		while True:
+			self._refill()
+			if self.tokens >= 1:
+				self.tokens -= 1
+				return True
+			wait = (1 - self.tokens) / self.rate
+			if time.monotonic() + wait > deadline:
+				return False
+			await asyncio.sleep(wait)
+
+class CircuitBreaker:
+	CLOSED = "closed"
+	OPEN = "open"
+	HALF_OPEN = "half_open"
+
+	def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+		self.failure_threshold = failure_threshold
+		self.reset_timeout = reset_timeout
+		self.state = self.CLOSED
+		self.failures = 0
+		self.opened_at = 0.0
+		self.probe_inflight = False
+
+	def allow(self) -> bool:
+		if self.state == self.CLOSED:
+			return True
+		if self.state == self.OPEN:
+			if time.monotonic() - self.opened_at < self.reset_timeout:
+				return False
+			self.state = self.HALF_OPEN
+		if self.probe_inflight:
+			return False
+		self.probe_inflight = True
+		return True
+
+	def release_probe(self) -> None:
+		self.probe_inflight = False
+
+	def record_success(self) -> None:
+		self.state = self.CLOSED
+		self.failures = 0
+		self.probe_inflight = False
+
+	def record_failure(self) -> None:
+		self.failures += 1
+		self.probe_inflight = False
+		if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+			self.state = self.OPEN
+			self.opened_at = time.monotonic()
+
+class ProviderGuard:
+	"""Per-provider token bucket, Retry-After backoff and circuit breaker around outgoing requests."""
+
+	def __init__(self, provider: str, rate: float, burst: float) -> None:
+		self.provider = provider
+		self.bucket = TokenBucket(rate, burst)
+		self.breaker = CircuitBreaker(settings.BREAKER_FAILURE_THRESHOLD, settings.BREAKER_RESET_TIMEOUT)
+		self.blocked_until = 0.0
+		self.counters = {
+			"requests": 0, "successes": 0, "failures": 0,
+			"throttled_local": 0, "throttled_remote": 0, "rejected_retry_after": 0, "rejected_open": 0,
+		}
+
+	def _admit(self) -> None:
+		remaining = self.blocked_until - time.time()
+		if remaining > 0:
+			self.counters["rejected_retry_after"] += 1
+			raise ProviderUnavailable(self.provider, "retry-after", remaining)
+		if not self.breaker.allow():
+			self.counters["rejected_open"] += 1
+			raise ProviderUnavailable(self.provider, "circuit open")
+
+	async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+		self._admit()
+		if not await self.bucket.acquire(settings.PROVIDER_MAX_QUEUE_WAIT):
+			self.breaker.release_probe()
+			self.counters["throttled_local"] += 1
+			raise ProviderUnavailable(self.provider, "rate limited")
+		self.counters["requests"] += 1
+		try:
+			resp = await get_http_client(self.provider).request(method, url, **kwargs)
+		except httpx.TransportError:
+			self.counters["failures"] += 1
+			self.breaker.record_failure()
+			raise
+		except BaseException:
+			self.breaker.release_probe()
+			raise
+		if resp.status_code == 429:
+			self.counters["throttled_remote"] += 1
+			retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+			delay = min(retry_after if retry_after is not None else settings.RETRY_AFTER_DEFAULT, settings.RETRY_AFTER_MAX)
+			self.blocked_until = max(self.blocked_until, time.time() + delay)
+			self.breaker.release_probe()
+		elif resp.status_code >= 500:
+			self.counters["failures"] += 1
+			self.breaker.record_failure()
+		else:
+			self.counters["successes"] += 1
+			self.breaker.record_success()
+		return resp
+
+	def stats(self) -> Dict[str, Any]:
+		self.bucket._refill()
+		return {
+			**self.counters,
+			"breaker": self.breaker.state,
+			"consecutive_failures": self.breaker.failures,
+			"retry_after_remaining": round(max(self.blocked_until - time.time(), 0.0), 1),
+			"tokens_available": round(self.bucket.tokens, 2),
+		}
+
+def _create_guard(provider: str) -> ProviderGuard:
+	if provider == "spotify":
+		return ProviderGuard(provider, settings.SPOTIFY_RATE, settings.SPOTIFY_BURST)
+	return ProviderGuard(provider, settings.LISTEN_NOTES_RATE, settings.LISTEN_NOTES_BURST)
+
+provider_guards: Dict[str, ProviderGuard] = {provider: _create_guard(provider) for provider in PROVIDERS}
+
+async def provider_request(provider: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+	return await provider_guards[provider].request(method, url, **kwargs)
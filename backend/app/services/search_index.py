@@ -0,0 +1,188 @@
+import asyncio
+import math
+import time
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from ..models import Podcast
+from ..utils.text import normalize_text
+from ..config import settings
+from .build_replay import BuildReplay
+
+STOPWORDS = frozenset(
+	"a an and are as at be by for from has have in is it its of on or our that the this to was we with you your".split()
+)
+
+def tokenize(text: Optional[str]) -> List[str]:
+	return [t for t in normalize_text(text).split() if len(t) > 1 and t not in STOPWORDS]
+
+class BM25Index:
+	"""In-memory BM25 inverted index over podcast title, description and publisher.
+
+	Postings are packed ``array('I')`` doc numbers with ``array('H')`` term frequencies and are
+	scored with NumPy views over the same buffers. Re-adding a document tombstones its old
+	postings; they are dropped the next time the index is rebuilt.
+	"""
+
+	def __init__(self, k1: float = 1.2, b: float = 0.75, title_weight: int = 2) -> None:
+		self.k1 = k1
+		self.b = b
+		self.title_weight = title_weight
+		self._doc_ids: List[str] = []
+		self._doc_number: Dict[str, int] = {}
+		self._doc_len = array("I")
+		self._fingerprint = array("q")
+		self._live = bytearray()
+		self._postings: Dict[str, Tuple[array, array]] = {}
+		self._live_count = 0
+		self._live_len = 0
+
+	def __len__(self) -> int:
+		return self._live_count
+
+	def add(self, doc_id: str, title: Optional[str], description: Optional[str], publisher: Optional[str]) -> None:
+		fingerprint = hash((title, description, publisher))
+		old = self._doc_number.get(doc_id)
+		if old is not None and self._live[old] and self._fingerprint[old] == fingerprint:
+			return
+		if old is not None and self._live[old]:
+			self._live[old] = 0
+			self._live_count -= 1
+			self._live_len -= self._doc_len[old]
+		terms: Counter = Counter()
+		for _ in range(self.title_weight):
+			terms.update(tokenize(title))
+		terms.update(tokenize(publisher))
+		terms.update(tokenize(description))
+		number = len(self._doc_ids)
+		self._doc_ids.append(doc_id)
+		self._doc_number[doc_id] = number
+		length = sum(terms.values())
+		self._doc_len.append(length)
+		self._fingerprint.append(fingerprint)
+		self._live.append(1)
+		self._live_count += 1
+		self._live_len += length
+		for term, tf in terms.items():
+			posting = self._postings.get(term)
+			if posting is None:
+				posting = (array("I"), array("H"))
+				self._postings[term] = posting
+			posting[0].append(number)
+			posting[1].append(min(tf, 65535))
+
+	def add_podcasts(self, podcasts: Iterable[Podcast]) -> None:
+		for p in podcasts:
+			if p.id:
+				self.add(p.id, p.title, p.description, p.publisher)
+
+	def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+		terms = list(dict.fromkeys(tokenize(query)))
+		if not terms or not self._live_count or k <= 0:
+			return []
+		n = self._live_count
+		avgdl = self._live_len / n or 1.0
+		doc_len = np.frombuffer(self._doc_len, dtype=np.uint32)
+		scores = np.zeros(len(self._doc_ids), dtype=np.float32)
+		touched = False
+		for term in terms:
+			posting = self._postings.get(term)
+			if posting is None:
+				continue
+			docs = np.frombuffer(posting[0], dtype=np.uint32)
+			tf = np.frombuffer(posting[1], dtype=np.uint16).astype(np.float32)
+			df = len(docs)
+			idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+			norm = self.k1 * (1 - self.b + self.b * doc_len[docs] / avgdl)
+			# Doc numbers are unique within a posting list, so fancy-index accumulation is safe.
+			scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+			touched = True
+		if not touched:
+			return []
+		scores *= np.frombuffer(self._live, dtype=np.uint8)
+		hits = np.flatnonzero(scores)
+		if len(hits) > k:
+			hits = hits[np.argpartition(scores[hits], -k)[-k:]]
+		hits = hits[np.argsort(-scores[hits], kind="stable")]
+		return [(self._doc_ids[i], float(scores[i])) for i in hits]
+
+	def stats(self) -> Dict[str, Any]:
+		postings = sum(len(p[0]) for p in self._postings.values())
+		return {
+			"documents": self._live_count,
+			"tombstoned": len(self._doc_ids) - self._live_count,
+			"terms": len(self._postings),
+			"postings": postings,
+			"posting_bytes": postings * 6,
+		}
+
+class CatalogSearch:
+	"""Owns the BM25 index for the podcasts collection: periodic rebuild, incremental adds on save.
+
+	Rebuilds pick up podcasts saved by other workers and drop tombstoned postings. A failed build
+	is retried after ``SEARCH_INDEX_RETRY_INTERVAL`` seconds.
+	"""
+
+	def __init__(self) -> None:
+		self.index = BM25Index()
+		self.ready = False
+		self.build_seconds: Optional[float] = None
+		self.built_at: Optional[float] = None
+		self._replay: BuildReplay[Podcast] = BuildReplay()
+		self._task: Optional[asyncio.Task] = None
+
+	async def build(self, collection: Any, batch_size: int = 1000) -> None:
+		start = time.perf_counter()
+		index = BM25Index()
+		self._replay.begin()
+		try:
+			cursor = collection.find({}, {"title": 1, "description": 1, "publisher": 1}).batch_size(batch_size)
+			count = 0
+			async for doc in cursor:
+				index.add(str(doc["_id"]), doc.get("title"), doc.get("description"), doc.get("publisher"))
+				count += 1
+				if count % batch_size == 0:
+					await asyncio.sleep(0)
+			index.add_podcasts(self._replay.drain())
+			self.index = index
+		finally:
+			self._replay.drain()
+		self.ready = True
+		self.build_seconds = round(time.perf_counter() - start, 3)
+		self.built_at = time.time()
+
+	async def _run(self, collection: Any) -> None:
+		while True:
+			try:
+				await self.build(collection)
+				delay = settings.SEARCH_INDEX_REBUILD_INTERVAL
+			except Exception as e:
+				print(f"Error building search index: {e}")
+				delay = settings.SEARCH_INDEX_RETRY_INTERVAL
+			await asyncio.sleep(delay)
+
+	async def start(self, collection: Any) -> None:
+		if settings.SEARCH_INDEX_ENABLED and self._task is None:
+			self._task = asyncio.create_task(self._run(collection))
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+			self._task = None
+
+	def add_podcasts(self, podcasts: List[Podcast]) -> None:
+		if not settings.SEARCH_INDEX_ENABLED:
+			return
+		self._replay.record(podcasts)
+		self.index.add_podcasts(podcasts)
+
+	def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+		return self.index.search(query, k)
+
+	def stats(self) -> Dict[str, Any]:
+		age = round(time.time() - self.built_at, 1) if self.built_at else None
+		return {"ready": self.ready, "build_seconds": self.build_seconds, "age_seconds": age, **self.index.stats()}
+
+catalog_search = CatalogSearch()
@@ -0,0 +1,300 @@
+import asyncio
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from ..models import Podcast
+from ..config import settings
+from .build_replay import BuildReplay
+from .search_index import tokenize
+
+Document = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+class SimilarityIndex:
+	"""Hashed TF-IDF vectors over the catalog with precomputed top-k cosine neighbours.
+
+	Rows are sublinear term frequencies hashed into ``n_features`` columns, weighted by smoothed
+	IDF and L2-normalised. Neighbour candidates come from each document's ``query_terms`` highest
+	weighted features, as in a "more like this" query, which keeps the sparse products bounded.
+	New documents are appended as extra row blocks: they get their own neighbours and are offered
+	to existing documents' lists. IDF for older rows and replaced documents are only refreshed by
+	a rebuild.
+	"""
+
+	def __init__(self, n_features: int, k: int, max_df: float, query_terms: int, batch_size: int) -> None:
+		self.n_features = n_features
+		self.k = k
+		self.max_df = max_df
+		self.query_terms = query_terms
+		self.batch_size = batch_size
+		self._doc_ids: List[str] = []
+		self._doc_number: Dict[str, int] = {}
+		self._fingerprint: List[int] = []
+		self._live = np.zeros(0, dtype=bool)
+		self._df = np.zeros(n_features, dtype=np.int64)
+		self._blocks: List[sparse.csr_matrix] = []
+		self._neighbors = np.full((0, k), -1, dtype=np.int32)
+		self._scores = np.zeros((0, k), dtype=np.float32)
+
+	def __len__(self) -> int:
+		return int(self._live.sum())
+
+	def _features(self, title: Optional[str], description: Optional[str], publisher: Optional[str]) -> Dict[int, float]:
+		title_tokens = tokenize(title)
+		counts: Counter = Counter(title_tokens * 2)
+		counts.update(f"{a} {b}" for a, b in zip(title_tokens, title_tokens[1:]))
+		counts.update(tokenize(publisher))
+		counts.update(tokenize(description))
+		features: Dict[int, float] = {}
+		for token, tf in counts.items():
+			h = zlib.crc32(token.encode()) % self.n_features
+			features[h] = features.get(h, 0) + tf
+		return features
+
+	def _raw_matrix(self, docs: Sequence[Document]) -> sparse.csr_matrix:
+		indptr = [0]
+		indices: List[int] = []
+		data: List[float] = []
+		for _, title, description, publisher in docs:
+			features = self._features(title, description, publisher)
+			indices.extend(features)
+			data.extend(features.values())
+			indptr.append(len(indices))
+		raw = sparse.csr_matrix(
+			(np.log1p(np.asarray(data, dtype=np.float32)), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+			shape=(len(docs), self.n_features),
+		)
+		raw.sort_indices()
+		return raw
+
+	def _weight(self, raw: sparse.csr_matrix, live: np.ndarray, df: np.ndarray) -> sparse.csr_matrix:
+		n = max(int(live.sum()), 1)
+		idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+		if n >= 100:
+			idf[df > self.max_df * n] = 0
+		weighted = (raw @ sparse.diags(idf)).tocsr()
+		weighted.eliminate_zeros()
+		norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+		norms[norms == 0] = 1
+		return (sparse.diags(1 / norms) @ weighted).tocsr().astype(np.float32)
+
+	def _query_rows(self, rows: sparse.csr_matrix) -> sparse.csr_matrix:
+		rows = rows.copy()
+		for r in range(rows.shape[0]):
+			start, end = rows.indptr[r], rows.indptr[r + 1]
+			if end - start > self.query_terms:
+				values = rows.data[start:end]
+				values[np.argsort(values)[:-self.query_terms]] = 0
+		rows.eliminate_zeros()
+		return rows
+
+	def _similarities(self, rows: sparse.csr_matrix, blocks: List[sparse.csr_matrix]) -> sparse.csr_matrix:
+		query = self._query_rows(rows)
+		return sparse.hstack([query @ block.T for block in blocks], format="csr")
+
+	def _top_k(self, scores: sparse.csr_matrix, numbers: np.ndarray, live: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+		neighbors = np.full((len(numbers), self.k), -1, dtype=np.int32)
+		values = np.zeros((len(numbers), self.k), dtype=np.float32)
+		for r, number in enumerate(numbers):
+			start, end = scores.indptr[r], scores.indptr[r + 1]
+			cols = scores.indices[start:end]
+			sims = scores.data[start:end]
+			keep = (cols != number) & live[cols]
+			cols, sims = cols[keep], sims[keep]
+			if len(cols) > self.k:
+				top = np.argpartition(sims, -self.k)[-self.k:]
+				cols, sims = cols[top], sims[top]
+			neighbors[r, :len(cols)] = cols
+			values[r, :len(cols)] = sims
+		return neighbors, values
+
+	def _changes(self, docs: Sequence[Document]) -> Tuple[List[Document], List[int], np.ndarray]:
+		"""New or changed documents, their fingerprints and the liveness mask once they are appended.
+
+		Nothing on the index is modified, so a failure further along leaves it as it was.
+		"""
+		fresh: List[Document] = []
+		fingerprints: List[int] = []
+		live = self._live.copy()
+		for doc in {doc[0]: doc for doc in docs}.values():
+			fingerprint = hash(doc[1:])
+			old = self._doc_number.get(doc[0])
+			if old is not None and live[old]:
+				if self._fingerprint[old] == fingerprint:
+					continue
+				live[old] = False
+			fresh.append(doc)
+			fingerprints.append(fingerprint)
+		return fresh, fingerprints, np.concatenate([live, np.ones(len(fresh), dtype=bool)])
+
+	def _append(self, fresh: List[Document], fingerprints: List[int], live: np.ndarray) -> None:
+		for doc in fresh:
+			self._doc_number[doc[0]] = len(self._doc_ids)
+			self._doc_ids.append(doc[0])
+		self._fingerprint.extend(fingerprints)
+		self._live = live
+
+	def fit(self, docs: Sequence[Document]) -> None:
+		"""Vectorise ``docs`` from scratch and precompute every neighbour list in batches."""
+		fresh, fingerprints, live = self._changes(docs)
+		numbers = np.arange(len(self._doc_ids), len(self._doc_ids) + len(fresh), dtype=np.int32)
+		raw = self._raw_matrix(fresh)
+		df = np.bincount(raw.indices, minlength=self.n_features).astype(np.int64)
+		blocks = [self._weight(raw, live, df)]
+		neighbors = np.full((len(numbers), self.k), -1, dtype=np.int32)
+		scores = np.zeros((len(numbers), self.k), dtype=np.float32)
+		for start in range(0, len(numbers), self.batch_size):
+			batch = slice(start, start + self.batch_size)
+			neighbors[batch], scores[batch] = self._top_k(self._similarities(blocks[0][batch], blocks), numbers[batch], live)
+		self._append(fresh, fingerprints, live)
+		self._df, self._blocks = df, blocks
+		self._neighbors, self._scores = neighbors, scores
+
+	def add(self, docs: Sequence[Document]) -> int:
+		"""Vectorise new or changed documents and merge them into the neighbour lists.
+
+		Everything is computed before the index is touched, so a failed add changes nothing.
+		"""
+		fresh, fingerprints, live = self._changes(docs)
+		if not fresh:
+			return 0
+		first = len(self._doc_ids)
+		numbers = np.arange(first, first + len(fresh), dtype=np.int32)
+		raw = self._raw_matrix(fresh)
+		df = self._df + np.bincount(raw.indices, minlength=self.n_features)
+		weighted = self._weight(raw, live, df)
+		blocks = self._blocks + [weighted]
+		if len(blocks) > 16:
+			blocks = [sparse.vstack(blocks, format="csr")]
+		neighbors = np.concatenate([self._neighbors, np.full((len(numbers), self.k), -1, dtype=np.int32)])
+		scores = np.concatenate([self._scores, np.zeros((len(numbers), self.k), dtype=np.float32)])
+		thresholds = scores[:first].min(axis=1)
+		for start in range(0, len(numbers), self.batch_size):
+			batch = slice(start, start + self.batch_size)
+			sims = self._similarities(weighted[batch], blocks)
+			rows = numbers[batch]
+			neighbors[rows], scores[rows] = self._top_k(sims, rows, live)
+			if not first:
+				continue
+			# Offer each new document to the existing lists it would now rank in.
+			coo = sims.tocoo()
+			existing = (coo.col < first) & live[coo.col]
+			cols, values = coo.col[existing], coo.data[existing]
+			better = values > thresholds[cols]
+			for r, col, value in sorted(zip(coo.row[existing][better], cols[better], values[better]), key=lambda t: -t[2]):
+				slot = int(np.argmin(scores[col]))
+				if value > scores[col, slot]:
+					neighbors[col, slot] = rows[r]
+					scores[col, slot] = value
+		self._append(fresh, fingerprints, live)
+		self._df, self._blocks = df, blocks
+		self._neighbors, self._scores = neighbors, scores
+		return len(fresh)
+
+	def similar(self, doc_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+		number = self._doc_number.get(doc_id)
+		if number is None or number >= len(self._neighbors):
+			return None
+		neighbors, scores, live = self._neighbors[number], self._scores[number], self._live
+		order = np.argsort(-scores, kind="stable")
+		hits = [(int(neighbors[i]), float(scores[i])) for i in order if neighbors[i] >= 0 and scores[i] > 0]
+		seen = {doc_id}
+		out: List[Tuple[str, float]] = []
+		for n, score in hits:
+			other = self._doc_ids[n]
+			if live[n] and other not in seen:
+				seen.add(other)
+				out.append((other, round(score, 4)))
+		return out[:limit]
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"documents": len(self),
+			"rows": len(self._doc_ids),
+			"blocks": len(self._blocks),
+			"nnz": sum(block.nnz for block in self._blocks),
+			"k": self.k,
+		}
+
+def _new_index() -> SimilarityIndex:
+	return SimilarityIndex(
+		n_features=settings.SIMILAR_FEATURES,
+		k=settings.SIMILAR_TOP_K,
+		max_df=settings.SIMILAR_MAX_DF,
+		query_terms=settings.SIMILAR_QUERY_TERMS,
+		batch_size=settings.SIMILAR_BATCH,
+	)
+
+class CatalogSimilarity:
+	"""Owns the similarity index: background build and periodic rebuild, incremental adds on save."""
+
+	def __init__(self) -> None:
+		self.index = _new_index()
+		self.ready = False
+		self.build_seconds: Optional[float] = None
+		self.built_at: Optional[float] = None
+		self._replay: BuildReplay[Document] = BuildReplay()
+		self._lock = asyncio.Lock()
+		self._task: Optional[asyncio.Task] = None
+
+	async def build(self, collection: Any, batch_size: int = 1000) -> None:
+		start = time.perf_counter()
+		self._replay.begin()
+		try:
+			docs: List[Document] = []
+			cursor = collection.find({}, {"title": 1, "description": 1, "publisher": 1}).batch_size(batch_size)
+			async for doc in cursor:
+				docs.append((str(doc["_id"]), doc.get("title"), doc.get("description"), doc.get("publisher")))
+			index = _new_index()
+			await asyncio.to_thread(index.fit, docs)
+			async with self._lock:
+				await asyncio.to_thread(index.add, self._replay.drain())
+				self.index = index
+		finally:
+			self._replay.drain()
+		self.ready = True
+		self.build_seconds = round(time.perf_counter() - start, 3)
+		self.built_at = time.time()
+
+	async def _run(self, collection: Any) -> None:
+		while True:
+			try:
+				await self.build(collection)
+			except Exception as e:
+				print(f"Error building similarity index: {e}")
+			await asyncio.sleep(settings.SIMILAR_REBUILD_INTERVAL)
+
+	async def start(self, collection: Any) -> None:
+		if settings.SIMILAR_ENABLED and self._task is None:
+			self._task = asyncio.create_task(self._run(collection))
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+			self._task = None
+
+	async def add_podcasts(self, podcasts: List[Podcast]) -> None:
+		if not settings.SIMILAR_ENABLED:
+			return
+		docs = [(p.id, p.title, p.description, p.publisher) for p in podcasts if p.id]
+		if not docs:
+			return
+		self._replay.record(docs)
+		try:
+			async with self._lock:
+				await asyncio.to_thread(self.index.add, docs)
+		except Exception as e:
+			# The index is only a derived view; the next rebuild picks these podcasts up.
+			print(f"Error adding podcasts to similarity index: {e}")
+
+	def similar(self, doc_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+		return self.index.similar(doc_id, limit)
+
+	def stats(self) -> Dict[str, Any]:
+		age = round(time.time() - self.built_at, 1) if self.built_at else None
+		return {"ready": self.ready, "build_seconds": self.build_seconds, "age_seconds": age, **self.index.stats()}
+
+catalog_similarity = CatalogSimilarity()
@@ -0,0 +1,169 @@
+import asyncio
+import heapq
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from ..config import settings
+from ..db import get_database
+
+_END = "\U0010ffff"
+
+def normalize_query(query: str) -> str:
+	return " ".join(query.casefold().split())
+
+class PrefixIndex:
+	"""Frequency-weighted completions over a sorted array of normalised queries.
+
+	A prefix maps to a contiguous ``bisect`` range. Short prefixes cover huge ranges, so the top
+	completions of every range wider than ``precompute_over`` entries are stored at build time;
+	narrower ranges are ranked on the fly.
+	"""
+
+	def __init__(self, entries: Dict[str, Tuple[str, float]], limit: int, precompute_over: int = 128, max_prefix: int = 3) -> None:
+		self.limit = limit
+		self.keys: List[str] = sorted(entries)
+		self.display: List[str] = [entries[k][0] for k in self.keys]
+		self.weights = np.fromiter((entries[k][1] for k in self.keys), dtype=np.float64, count=len(self.keys))
+		self._top: Dict[str, List[int]] = {}
+		for length in range(1, max_prefix + 1):
+			i = 0
+			while i < len(self.keys):
+				if len(self.keys[i]) < length:
+					i += 1
+					continue
+				prefix = self.keys[i][:length]
+				j = bisect_left(self.keys, prefix + _END, i)
+				if j - i > precompute_over:
+					self._top[prefix] = self._rank(i, j, limit)
+				i = j
+
+	def __len__(self) -> int:
+		return len(self.keys)
+
+	def _rank(self, lo: int, hi: int, limit: int) -> List[int]:
+		window = self.weights[lo:hi]
+		if hi - lo > limit:
+			top = np.argpartition(window, -limit)[-limit:]
+			top = top[np.argsort(-window[top], kind="stable")]
+		else:
+			top = np.argsort(-window, kind="stable")
+		return [lo + int(i) for i in top]
+
+	def complete(self, prefix: str, limit: int) -> List[Tuple[str, float]]:
+		rows = self._top.get(prefix)
+		if rows is None or limit > self.limit:
+			lo = bisect_left(self.keys, prefix)
+			hi = bisect_left(self.keys, prefix + _END, lo)
+			rows = self._rank(lo, hi, limit) if hi > lo else []
+		return [(self.display[i], float(self.weights[i])) for i in rows[:limit]]
+
+class QuerySuggester:
+	"""Global and per-user typeahead built from ``search_logs``, rebuilt every ``SUGGEST_REFRESH_INTERVAL``.
+
+	Global completions only include queries searched by at least ``SUGGEST_MIN_USERS`` distinct
+	users, so one person's searches never surface for someone else. Weights decay with age.
+	"""
+
+	def __init__(self) -> None:
+		self.index = PrefixIndex({}, settings.SUGGEST_LIMIT * 2)
+		self.personal: Dict[str, Dict[str, Tuple[str, float]]] = {}
+		self.ready = False
+		self.build_seconds: Optional[float] = None
+		self.built_at: Optional[float] = None
+		self._task: Optional[asyncio.Task] = None
+
+	async def build(self) -> None:
+		start = time.perf_counter()
+		db = await get_database()
+		now = datetime.utcnow()
+		half_life_ms = settings.SUGGEST_HALF_LIFE_DAYS * 86400 * 1000
+		pipeline = [
+			{"$match": {"ts": {"$gte": now - timedelta(days=settings.SUGGEST_WINDOW_DAYS)}}},
+			{"$group": {
+				"_id": {"q": {"$toLower": {"$trim": {"input": "$query"}}}, "e": "$email"},
+				"display": {"$last": "$query"},
+				"weight": {"$sum": {"$pow": [0.5, {"$divide": [{"$subtract": [now, "$ts"]}, half_life_ms]}]}},
+			}},
+		]
+		totals: Dict[str, List[Any]] = {}
+		personal: Dict[str, Dict[str, Tuple[str, float]]] = {}
+		async for row in db.get_collection("search_logs").aggregate(pipeline, allowDiskUse=True):
+			key = normalize_query(row["_id"]["q"] or "")
+			if not key:
+				continue
+			display = " ".join((row.get("display") or key).split())
+			weight = float(row.get("weight") or 0)
+			total = totals.setdefault(key, [display, 0.0, 0])
+			total[1] += weight
+			total[2] += 1
+			email = row["_id"].get("e")
+			if email:
+				mine = personal.setdefault(email, {})
+				prev = mine.get(key)
+				mine[key] = (display, weight + (prev[1] if prev else 0.0))
+		entries = {k: (d, w) for k, (d, w, users) in totals.items() if users >= settings.SUGGEST_MIN_USERS}
+		# Precompute twice the limit: global results are over-fetched by up to the user's own count.
+		index = await asyncio.to_thread(PrefixIndex, entries, settings.SUGGEST_LIMIT * 2)
+		for email, mine in personal.items():
+			if len(mine) > settings.SUGGEST_USER_MAX:
+				personal[email] = dict(heapq.nlargest(settings.SUGGEST_USER_MAX, mine.items(), key=lambda kv: kv[1][1]))
+		self.index = index
+		self.personal = personal
+		self.ready = True
+		self.build_seconds = round(time.perf_counter() - start, 3)
+		self.built_at = time.time()
+
+	async def _run(self) -> None:
+		while True:
+			try:
+				await self.build()
+			except Exception as e:
+				print(f"Error building query suggestions: {e}")
+			await asyncio.sleep(settings.SUGGEST_REFRESH_INTERVAL)
+
+	async def start(self) -> None:
+		if self._task is None:
+			self._task = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+			self._task = None
+
+	def record(self, email: str, query: str) -> None:
+		"""Make a fresh search show up in that user's suggestions before the next rebuild."""
+		key = normalize_query(query)
+		if not key:
+			return
+		mine = self.personal.setdefault(email.lower(), {})
+		prev = mine.get(key)
+		mine[key] = (" ".join(query.split()), 1.0 + (prev[1] if prev else 0.0))
+
+	def suggest(self, prefix: str, email: Optional[str], limit: int) -> Dict[str, List[str]]:
+		key = normalize_query(prefix)
+		if not key:
+			return {"user": [], "global": []}
+		user: List[str] = []
+		if email:
+			mine = self.personal.get(email.lower(), {})
+			matches = [(w, d) for k, (d, w) in mine.items() if k.startswith(key)]
+			user = [d for _, d in heapq.nlargest(limit, matches)]
+		seen = {normalize_query(d) for d in user}
+		# Over-fetch so global results still fill the list after removing the user's own queries.
+		completions = self.index.complete(key, limit + len(user))
+		return {"user": user, "global": [d for d, _ in completions if normalize_query(d) not in seen][:limit]}
+
+	def stats(self) -> Dict[str, Any]:
+		age = round(time.time() - self.built_at, 1) if self.built_at else None
+		return {
+			"ready": self.ready,
+			"global_queries": len(self.index),
+			"users": len(self.personal),
+			"build_seconds": self.build_seconds,
+			"age_seconds": age,
+		}
+
+query_suggester = QuerySuggester()
@@ -0,0 +1,127 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from ..models import Podcast
+from ..config import settings
+from ..agents.listennotes_agent import fetch_trending as ln_fetch_trending
+from ..agents.spotify_agent import trending_episodes as spotify_fetch_trending
+from .catalog import catalog_writer
+from .federation import merge_results
+
+Fetcher = Callable[[], Awaitable[List[Podcast]]]
+
+class TrendingSnapshots:
+	"""Per-provider trending lists refreshed in the background and served from memory.
+
+	Each provider refreshes every ``interval`` seconds (plus or minus ``jitter`` as a fraction) and
+	retries after ``retry_interval`` when a refresh fails or comes back empty; the last good
+	snapshot keeps being served meanwhile. Refreshed lists are saved to the catalog once per refresh.
+	Fetchers go through the provider cache without accepting stale entries, so workers sharing the
+	L2 store make one provider request per ``CACHE_TTL_TRENDING`` between them.
+	"""
+
+	def __init__(self, fetchers: Dict[str, Fetcher], interval: float, jitter: float, retry_interval: float) -> None:
+		self.fetchers = fetchers
+		self.interval = interval
+		self.jitter = jitter
+		self.retry_interval = retry_interval
+		self._snapshots: Dict[str, Tuple[List[Podcast], float]] = {}
+		self._inflight: Dict[str, asyncio.Task] = {}
+		self._tasks: List[asyncio.Task] = []
+		self._stats: Dict[str, Dict[str, Any]] = {
+			p: {"refreshes": 0, "failures": 0, "last_error": None, "last_ms": None} for p in fetchers
+		}
+
+	async def _fetch(self, provider: str) -> bool:
+		stats = self._stats[provider]
+		start = time.perf_counter()
+		try:
+			podcasts = await self.fetchers[provider]()
+			error = None if podcasts else "empty response"
+		except Exception as e:
+			podcasts, error = [], str(e) or type(e).__name__
+		stats["last_ms"] = round((time.perf_counter() - start) * 1000, 1)
+		if error:
+			stats["failures"] += 1
+			stats["last_error"] = error
+			return False
+		stats["refreshes"] += 1
+		self._snapshots[provider] = (podcasts, time.time())
+		await catalog_writer.enqueue(podcasts)
+		return True
+
+	async def refresh(self, provider: str) -> bool:
+		"""Refresh one provider now; concurrent callers share the same request."""
+		task = self._inflight.get(provider)
+		if task is None:
+			task = asyncio.create_task(self._fetch(provider))
+			self._inflight[provider] = task
+			task.add_done_callback(lambda _: self._inflight.pop(provider, None))
+		return await asyncio.shield(task)
+
+	def _delay(self, ok: bool) -> float:
+		base = self.interval if ok else min(self.retry_interval, self.interval)
+		return max(base * (1 + random.uniform(-self.jitter, self.jitter)), 1.0)
+
+	async def _run(self, provider: str) -> None:
+		while True:
+			ok = await self.refresh(provider)
+			await asyncio.sleep(self._delay(ok))
+
+	async def start(self) -> None:
+		if not self._tasks:
+			self._tasks = [asyncio.create_task(self._run(p)) for p in self.fetchers]
+
+	async def stop(self) -> None:
+		for task in [*self._tasks, *self._inflight.values()]:
+			task.cancel()
+		await asyncio.gather(*self._tasks, *self._inflight.values(), return_exceptions=True)
+		self._tasks = []
+		self._inflight.clear()
+
+	async def get(self, providers: List[str]) -> Tuple[List[Podcast], Optional[float], List[Dict[str, object]]]:
+		"""Merged trending for ``providers``, the oldest snapshot's age and per-provider timings.
+
+		Timings have the shape ``federation.timing_headers`` expects: status ``snapshot`` when served
+		from memory, ``ok`` or ``error`` when a provider never loaded had to be fetched inline.
+		"""
+		timings: Dict[str, Dict[str, object]] = {p: {"provider": p, "status": "snapshot", "ms": 0.0, "count": 0} for p in providers}
+
+		async def load(provider: str) -> None:
+			start = time.perf_counter()
+			ok = await self.refresh(provider)
+			timings[provider].update(status="ok" if ok else "error", ms=round((time.perf_counter() - start) * 1000, 1))
+
+		missing = [p for p in providers if p not in self._snapshots]
+		if missing:
+			await asyncio.gather(*(load(p) for p in missing))
+		now = time.time()
+		batches: List[List[Podcast]] = []
+		ages: List[float] = []
+		for p in providers:
+			snapshot = self._snapshots.get(p)
+			if snapshot and snapshot[0]:
+				batches.append(snapshot[0])
+				ages.append(now - snapshot[1])
+				timings[p]["count"] = len(snapshot[0])
+		podcasts = batches[0] if len(batches) == 1 else merge_results(batches)
+		return podcasts, (max(ages) if ages else None), list(timings.values())
+
+	def stats(self) -> Dict[str, Any]:
+		now = time.time()
+		return {
+			p: {
+				**self._stats[p],
+				"items": len(self._snapshots[p][0]) if p in self._snapshots else 0,
+				"age_seconds": round(now - self._snapshots[p][1], 1) if p in self._snapshots else None,
+			}
+			for p in self.fetchers
+		}
+
+trending_snapshots = TrendingSnapshots(
+	{"listen_notes": lambda: ln_fetch_trending(allow_stale=False), "spotify": lambda: spotify_fetch_trending(18, allow_stale=False)},
+	interval=settings.TRENDING_REFRESH_INTERVAL,
+	jitter=settings.TRENDING_JITTER,
+	retry_interval=settings.TRENDING_RETRY_INTERVAL,
+)
@@ -0,0 +1,127 @@
+import asyncio
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from ..models import Podcast
+
+Writer = Callable[[List[Podcast]], Awaitable[Any]]
+
+class WriteBehindQueue:
+	"""Buffers podcasts for persistence off the request path.
+
+	Repeated podcasts within a flush window are merged (last write wins). A flush runs when
+	``max_batch`` podcasts are pending or ``flush_interval`` seconds pass; ``enqueue`` waits up to
+	``max_wait`` seconds once ``max_pending`` are buffered, then drops the oldest buffered podcasts
+	to make room, so request handlers never block on a database that is down.
+	"""
+
+	def __init__(self, writer: Writer, max_batch: int, flush_interval: float, max_pending: int, max_wait: float) -> None:
+		self.writer = writer
+		self.max_batch = max_batch
+		self.flush_interval = flush_interval
+		self.max_pending = max(max_pending, max_batch)
+		self.max_wait = max_wait
+		self._pending: Dict[Any, Podcast] = {}
+		self._anonymous = itertools.count()
+		self._wakeup = asyncio.Event()
+		self._space = asyncio.Event()
+		self._space.set()
+		self._task: Optional[asyncio.Task] = None
+		self._stopping = False
+		self._flush_lock = asyncio.Lock()
+		self._metrics = {
+			"enqueued": 0, "merged": 0, "written": 0, "flushes": 0, "flush_errors": 0,
+			"backpressure_waits": 0, "dropped": 0, "max_depth": 0,
+		}
+		self._last_flush_ms = 0.0
+		self._avg_flush_ms = 0.0
+
+	@property
+	def running(self) -> bool:
+		return self._task is not None and not self._task.done()
+
+	async def enqueue(self, podcasts: List[Podcast]) -> None:
+		if not self.running:
+			await self.writer(podcasts)
+			return
+		for p in podcasts:
+			if len(self._pending) >= self.max_pending:
+				self._metrics["backpressure_waits"] += 1
+				self._space.clear()
+				self._wakeup.set()
+				try:
+					await asyncio.wait_for(self._space.wait(), timeout=self.max_wait)
+				except asyncio.TimeoutError:
+					pass
+				while len(self._pending) >= self.max_pending:
+					# Still full (flushes failing or too slow): drop the oldest podcast instead of blocking.
+					del self._pending[next(iter(self._pending))]
+					self._metrics["dropped"] += 1
+			key = p.id if p.id else ("anonymous", next(self._anonymous))
+			if key in self._pending:
+				self._metrics["merged"] += 1
+			self._pending[key] = p
+			self._metrics["enqueued"] += 1
+		self._metrics["max_depth"] = max(self._metrics["max_depth"], len(self._pending))
+		if len(self._pending) >= self.max_batch:
+			self._wakeup.set()
+
+	async def flush(self) -> None:
+		async with self._flush_lock:
+			while self._pending:
+				keys = list(itertools.islice(self._pending, self.max_batch))
+				batch = {k: self._pending.pop(k) for k in keys}
+				self._space.set()
+				start = time.perf_counter()
+				try:
+					await self.writer(list(batch.values()))
+					self._metrics["written"] += len(batch)
+				except Exception:
+					self._metrics["flush_errors"] += 1
+					# Put the batch back unless a newer copy arrived meanwhile, then retry next interval.
+					for k, p in batch.items():
+						self._pending.setdefault(k, p)
+					break
+				finally:
+					self._metrics["flushes"] += 1
+					self._last_flush_ms = (time.perf_counter() - start) * 1000
+					self._avg_flush_ms = self._last_flush_ms if self._metrics["flushes"] == 1 else 0.9 * self._avg_flush_ms + 0.1 * self._last_flush_ms
+
+	async def _run(self) -> None:
+		while not self._stopping:
+			try:
+				await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+			except asyncio.TimeoutError:
+				pass
+			self._wakeup.clear()
+			await self.flush()
+
+	async def start(self) -> None:
+		if not self.running:
+			self._stopping = False
+			self._task = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		"""Stop the flush loop and drain everything still buffered."""
+		if self._task is not None:
+			self._stopping = True
+			self._wakeup.set()
+			await asyncio.gather(self._task, return_exceptions=True)
+			self._task = None
+		await self.flush()
+		if self._pending:
+			# The final flush failed and nothing will retry it: these writes are lost.
+			print(f"Error flushing write-behind queue on shutdown: dropping {len(self._pending)} podcasts")
+			self._metrics["dropped"] += len(self._pending)
+			self._pending.clear()
+		self._space.set()
+
+	def metrics(self) -> Dict[str, Any]:
+		return {
+			**self._metrics,
+			"depth": len(self._pending),
+			"max_pending": self.max_pending,
+			"last_flush_ms": round(self._last_flush_ms, 2),
+			"avg_flush_ms": round(self._avg_flush_ms, 2),
+			"running": self.running,
+		}
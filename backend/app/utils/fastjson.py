@@ -0,0 +1,17 @@
+import json
+from typing import Any
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+def loads(data: bytes | str) -> Any:
+	if orjson is not None:
+		return orjson.loads(data)
+	return json.loads(data)
+
+def dumps(value: Any) -> bytes:
+	if orjson is not None:
+		return orjson.dumps(value)
+	return json.dumps(value, separators=(",", ":")).encode()
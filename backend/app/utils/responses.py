@@ -0,0 +1,10 @@
+from typing import Dict, List, Optional
+from fastapi import Response
+from pydantic import TypeAdapter
+from ..models import Podcast
+
+_podcast_list = TypeAdapter(List[Podcast])
+
+def podcast_list_response(podcasts: List[Podcast], headers: Optional[Dict[str, str]] = None) -> Response:
+	"""Serialize already-trusted podcasts directly, bypassing FastAPI's response_model re-validation."""
+	return Response(content=_podcast_list.dump_json(podcasts), media_type="application/json", headers=headers)
@@ -0,0 +1,13 @@
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+def normalize_text(value: str | None) -> str:
+	if not value:
+		return ""
+	# ASCII has nothing to decompose, and long descriptions are mostly ASCII.
+	if not value.isascii():
+		value = unicodedata.normalize("NFKD", value)
+		value = "".join(ch for ch in value if not unicodedata.combining(ch))
+	return _NON_WORD.sub(" ", value.casefold()).strip()
@@ -0,0 +1,78 @@
+"""Training time, mmapped load and batched top-k throughput of the implicit ALS model.
+
+Uses the same clustered synthetic listens as bench_item_cf. As a sanity check that the factors
+learned something, the share of top-10 recommendations that fall in each sampled user's own taste
+cluster is compared against recommending the most popular unseen podcasts.
+
+Run from backend/: python -m benchmarks.bench_als [--users 200000] [--items 50000] [--factors 64] [--iterations 10]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from app.services.als import ALSModel, ImplicitALS, save_model
+from app.services.item_cf import interaction_matrix
+from benchmarks.bench_item_cf import _latency, _peak_mib, synthetic
+
+def _unseen_top(ranked: np.ndarray, matrix, user: int, k: int) -> np.ndarray:
+	seen = matrix.indices[matrix.indptr[user]:matrix.indptr[user + 1]]
+	return ranked[:k + len(seen)][~np.isin(ranked[:k + len(seen)], seen)][:k]
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--users", type=int, default=200_000)
+	parser.add_argument("--items", type=int, default=50_000)
+	parser.add_argument("--mean-items", type=float, default=15)
+	parser.add_argument("--cluster-size", type=int, default=1000)
+	parser.add_argument("--factors", type=int, default=64)
+	parser.add_argument("--iterations", type=int, default=10)
+	parser.add_argument("--regularization", type=float, default=0.05)
+	parser.add_argument("--alpha", type=float, default=20)
+	parser.add_argument("--workers", type=int, default=None)
+	parser.add_argument("--sample", type=int, default=2000)
+	parser.add_argument("--seed", type=int, default=7)
+	args = parser.parse_args()
+
+	rng = np.random.default_rng(args.seed)
+	users, items, weights = synthetic(rng, args.users, args.items, args.mean_items, args.cluster_size)
+	matrix = interaction_matrix(users, items, weights, (args.users, args.items))
+	print(f"{args.users:,} users x {args.items:,} podcasts, {matrix.nnz:,} interactions")
+
+	trainer = ImplicitALS(args.factors, args.regularization, args.alpha, args.iterations, workers=args.workers)
+	start = time.perf_counter()
+	user_factors, item_factors = trainer.fit(matrix)
+	print(
+		f"fit: {time.perf_counter() - start:.1f}s, per iteration {', '.join(f'{s:.2f}' for s in trainer.iteration_seconds)}s; "
+		f"peak RSS {_peak_mib():,.0f} MiB"
+	)
+
+	with tempfile.TemporaryDirectory() as tmp:
+		path = Path(tmp) / "als_model"
+		start = time.perf_counter()
+		save_model(
+			path, [str(u) for u in range(args.users)], [str(i) for i in range(args.items)],
+			user_factors, item_factors, matrix, {"factors": args.factors},
+		)
+		saved = time.perf_counter()
+		model = ALSModel(path)
+		print(f"save {saved - start:.2f}s, load {(time.perf_counter() - saved) * 1000:.1f} ms (mmapped), {model.stats()['bytes_mapped'] / 2**20:,.0f} MiB mapped")
+
+		sample = rng.integers(0, args.users, size=args.sample)
+		taste = np.array([np.bincount(matrix.indices[matrix.indptr[u]:matrix.indptr[u + 1]] // args.cluster_size).argmax() for u in sample])
+		top_items, _ = model.top_k(sample, 10)
+		popular = np.argsort(-np.bincount(matrix.indices, minlength=args.items))
+		baseline = np.array([_unseen_top(popular, matrix, u, 10) for u in sample])
+		print(
+			f"top-10 in the user's taste cluster: ALS {np.mean(top_items // args.cluster_size == taste[:, None]):.2%}, "
+			f"most popular {np.mean(baseline // args.cluster_size == taste[:, None]):.2%}"
+		)
+
+		print("recommend:", _latency(model.recommend, [str(u) for u in rng.integers(0, args.users, size=2000)]))
+		rows = rng.integers(0, args.users, size=min(args.users, 50_000))
+		start = time.perf_counter()
+		model.top_k(rows, 10)
+		print(f"batched top_k: {len(rows) / (time.perf_counter() - start):,.0f} users/s")
+
+if __name__ == "__main__":
+	main()
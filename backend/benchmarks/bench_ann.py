@@ -0,0 +1,71 @@
+"""Recall and throughput of the LSH catalog index against exact brute-force search.
+
+Run from backend/: python -m benchmarks.bench_ann [--docs 200000] [--queries 200] [--tables 32] [--bits 12]
+"""
+import argparse
+import itertools
+import random
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from app.config import settings
+from app.services.ann_index import ANNIndex, embed_documents
+
+def _exact(vectors: np.ndarray, query: np.ndarray, k: int, exclude: int) -> np.ndarray:
+	scores = vectors @ query
+	scores[exclude] = -np.inf
+	top = np.argpartition(scores, -k)[-k:]
+	return top[np.argsort(-scores[top])]
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--docs", type=int, default=200_000)
+	parser.add_argument("--queries", type=int, default=200)
+	parser.add_argument("--dim", type=int, default=settings.ANN_DIM)
+	parser.add_argument("--tables", type=int, default=settings.ANN_TABLES)
+	parser.add_argument("--bits", type=int, default=settings.ANN_BITS)
+	parser.add_argument("--k", type=int, default=10)
+	parser.add_argument("--seed", type=int, default=7)
+	args = parser.parse_args()
+
+	rng = random.Random(args.seed)
+	letters = "abcdefghijklmnopqrstuvwxyz"
+	vocab = sorted({"".join(rng.choices(letters, k=rng.randint(4, 9))) for _ in range(20_000)})
+	# Documents draw most words from one of a few hundred topics so true neighbours exist.
+	topics = [rng.sample(vocab, 40) for _ in range(500)]
+	cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(len(vocab))))
+
+	def doc():
+		topic = rng.choice(topics)
+		title = " ".join(rng.choices(topic, k=4))
+		description = " ".join(rng.choices(topic, k=20) + rng.choices(vocab, cum_weights=cum_weights, k=10))
+		return title, description, None
+
+	start = time.perf_counter()
+	vectors = embed_documents((doc() for _ in range(args.docs)), args.docs, args.dim)
+	print(f"embed: {args.docs} docs in {time.perf_counter() - start:.1f}s")
+
+	with tempfile.TemporaryDirectory() as tmp:
+		start = time.perf_counter()
+		index = ANNIndex.build(Path(tmp) / "ann", [f"d{i}" for i in range(args.docs)], vectors, args.tables, args.bits)
+		print(f"build: {time.perf_counter() - start:.1f}s, {index.stats()['bytes_mapped'] / 2**20:.0f} MiB on disk")
+		queries = rng.sample(range(args.docs), args.queries)
+
+		dense = np.array(index.vectors)
+		start = time.perf_counter()
+		truth = [set(_exact(dense, dense[q], args.k, q).tolist()) for q in queries]
+		exact_qps = len(queries) / (time.perf_counter() - start)
+		print(f"exact: {exact_qps:,.1f} QPS, mean top-{args.k} cosine {np.mean([np.sort(dense[list(t)] @ dense[q]).mean() for q, t in zip(queries, truth)]):.2f}")
+
+		for probes in (0, 2, 4, 8):
+			hits = 0
+			start = time.perf_counter()
+			for q, expected in zip(queries, truth):
+				found = index.search(dense[q], args.k, probes, exclude=q)
+				hits += len(expected & {r for r, _ in found})
+			qps = len(queries) / (time.perf_counter() - start)
+			print(f"lsh probes={probes}: recall@{args.k} {hits / (len(queries) * args.k):.3f}, {qps:,.0f} QPS ({qps / exact_qps:.0f}x exact)")
+
+if __name__ == "__main__":
+	main()
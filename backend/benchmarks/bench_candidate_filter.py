@@ -0,0 +1,124 @@
+"""Preference filtering and ranking of a large candidate list: the batch engine vs the per-podcast loop.
+
+Two preference profiles are timed: a selective one (one language, two genres) and a broad one
+that lets most rows through to topic matching. The candidate columns are built once and reused,
+as /recommend/batch/ does; then ``--users`` random preference sets are ranked against the same
+candidates to show how the build amortizes. The loop is the baseline filter verbatim. It ran title
+and description together, so a topic could match across the seam. The engine does not do that, and
+the comparison reports those matches separately. Any other difference is a mismatch.
+
+Run from backend/: python -m benchmarks.bench_candidate_filter [--candidates 100000] [--topics 5] [--users 20]
+"""
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+from app.services.candidate_filter import CandidateBatch
+from benchmarks.bench_search_index import _vocab
+
+LANGUAGES = ["English", "english", "Spanish", "German", "French", "Portuguese"]
+GENRES = ["Technology", "Science", "Comedy", "News", "History", "Sports", "Business", "Health", "Music", "Education"]
+
+def _loop(podcasts: List[Dict[str, Any]], preferences: Dict[str, Any]) -> List[Dict[str, Any]]:
+	# Verbatim copy of the filter in recommendation_agent.recommend at the baseline commit.
+	filtered = []
+	for podcast in podcasts:
+		if preferences["language"].lower() != podcast["language"].lower():
+			continue
+		if podcast["genre"] not in preferences["genres"]:
+			continue
+		if podcast["duration"] > preferences["max_duration"]:
+			continue
+
+		# Simple topic match in description/title
+		if not any(topic.lower() in (podcast["title"] + podcast["description"]).lower()
+				for topic in preferences["topics"]):
+			continue
+
+		filtered.append(podcast)
+	return filtered
+
+def _seam_only(podcast: Dict[str, Any], topics: List[str]) -> bool:
+	"""True if the baseline matched only because a topic ran across the title/description seam."""
+	title, description = podcast["title"].lower(), podcast["description"].lower()
+	return not any(t.lower() in title or t.lower() in description for t in topics)
+
+def _compare(expected: List[Dict[str, Any]], batch: CandidateBatch, ranked: List[Any], topics: List[str]) -> str:
+	got = {id(batch.podcasts[row]) for row, _ in ranked}
+	missing = [p for p in expected if id(p) not in got]
+	extra = len(got) - (len(expected) - len(missing))
+	seam = sum(_seam_only(p, topics) for p in missing)
+	if extra or seam != len(missing):
+		return f"MISMATCH: {len(missing) - seam} missing, {extra} extra"
+	return f"same matches except {seam} seam-only" if seam else "same matches"
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--candidates", type=int, default=100_000)
+	parser.add_argument("--topics", type=int, default=5)
+	parser.add_argument("--users", type=int, default=20)
+	parser.add_argument("--description-words", type=int, default=60)
+	parser.add_argument("--seed", type=int, default=7)
+	args = parser.parse_args()
+
+	rng = random.Random(args.seed)
+	vocab = _vocab(rng, 20_000)
+	common = vocab[:2000]
+	podcasts = [
+		{
+			"title": " ".join(rng.choices(common, k=6)).title(),
+			"description": " ".join(rng.choices(common, k=args.description_words)).capitalize(),
+			"genre": rng.choice(GENRES),
+			"duration": rng.randint(5, 180),
+			"language": rng.choice(LANGUAGES),
+		}
+		for _ in range(args.candidates)
+	]
+	topics = rng.sample(common[:200], args.topics)
+	profiles = {
+		"selective": {"language": "English", "genres": ["Technology", "Science"], "max_duration": 60, "topics": topics},
+		"broad": {"language": "English", "genres": GENRES, "max_duration": 1000, "topics": topics},
+	}
+	start = time.perf_counter()
+	batch = CandidateBatch(podcasts)
+	columns = time.perf_counter() - start
+	print(f"{args.candidates:,} candidates, {args.topics} topics; columns built once in {columns * 1000:,.0f} ms")
+
+	for name, preferences in profiles.items():
+		start = time.perf_counter()
+		expected = _loop(podcasts, preferences)
+		loop = time.perf_counter() - start
+		start = time.perf_counter()
+		masked = int(batch.mask(preferences["language"], preferences["genres"], preferences["max_duration"]).sum())
+		masked_at = time.perf_counter()
+		ranked = batch.rank(preferences)
+		ranked_at = time.perf_counter()
+		print(
+			f"{name:>9}: {len(ranked):,} matches ({_compare(expected, batch, ranked, preferences['topics'])}); loop {loop * 1000:,.0f} ms, "
+			f"batch {(ranked_at - masked_at) * 1000:,.0f} ms (masks {(masked_at - start) * 1000:,.1f} ms -> {masked:,} rows)"
+		)
+
+	users = [
+		{
+			"language": rng.choice(LANGUAGES),
+			"genres": rng.sample(GENRES, rng.randint(1, 3)),
+			"max_duration": rng.choice([30, 60, 90]),
+			"topics": rng.sample(common[:200], args.topics),
+		}
+		for _ in range(args.users)
+	]
+	start = time.perf_counter()
+	for preferences in users:
+		_loop(podcasts, preferences)
+	loop = time.perf_counter() - start
+	start = time.perf_counter()
+	for preferences in users:
+		batch.rank(preferences)
+	ranked = time.perf_counter() - start
+	print(
+		f"{args.users} users: loop {loop * 1000:,.0f} ms, batch {(columns + ranked) * 1000:,.0f} ms "
+		f"including the column build ({ranked / max(args.users, 1) * 1000:,.1f} ms per user)"
+	)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,69 @@
+"""Compare the per-document update_one loop with bulk_save_podcasts on a real MongoDB.
+
+Uses a throwaway database (dropped afterwards). Run from backend/:
+	BENCH_DATABASE_URL=mongodb://localhost:27017 python -m benchmarks.bench_catalog_upsert --sizes 100,1000,10000,100000
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import List
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from app.models import Podcast
+from app.services.catalog import bulk_save_podcasts, podcast_document
+
+def _catalog(n: int, revision: int = 0, changed_every: int = 0) -> List[Podcast]:
+	podcasts = []
+	for i in range(n):
+		rev = revision if changed_every and i % changed_every == 0 else 0
+		podcasts.append(Podcast(
+			id=f"bench-{i:08d}",
+			title=f"Episode {i} rev {rev}",
+			description=f"Synthetic description for episode {i}. " * 4,
+			thumbnail=f"https://img.example.com/{i}.jpg",
+			duration=600 + i % 3600,
+			source="Spotify" if i % 2 else "ListenNotes",
+			publisher=f"Publisher {i % 500}",
+		))
+	return podcasts
+
+async def _loop_save(collection: AsyncIOMotorCollection, podcasts: List[Podcast]) -> None:
+	# The previous _save_podcasts: one awaited round trip per document.
+	for p in podcasts:
+		doc = podcast_document(p)
+		await collection.update_one({"_id": doc["_id"]}, {"$set": doc}, upsert=True)
+
+async def _timed(coro) -> float:
+	start = time.perf_counter()
+	await coro
+	return time.perf_counter() - start
+
+async def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--sizes", default="100,1000,10000,100000")
+	parser.add_argument("--max-loop", type=int, default=100000, help="skip the slow loop above this size")
+	args = parser.parse_args()
+	client = AsyncIOMotorClient(os.getenv("BENCH_DATABASE_URL", "mongodb://localhost:27017"))
+	db = client.get_database("podcast_bench")
+	print(f"{'size':>8}{'loop s':>10}{'bulk new s':>12}{'bulk same s':>13}{'bulk 10% s':>12}   last bulk result")
+	try:
+		for n in (int(s) for s in args.sizes.split(",")):
+			loop_s = float("nan")
+			if n <= args.max_loop:
+				await db.drop_collection("loop")
+				loop_s = await _timed(_loop_save(db.get_collection("loop"), _catalog(n)))
+			await db.drop_collection("bulk")
+			bulk = db.get_collection("bulk")
+			new_s = await _timed(bulk_save_podcasts(bulk, _catalog(n)))
+			same_s = await _timed(bulk_save_podcasts(bulk, _catalog(n)))
+			changed = _catalog(n, revision=1, changed_every=10)
+			start = time.perf_counter()
+			result = await bulk_save_podcasts(bulk, changed)
+			changed_s = time.perf_counter() - start
+			print(f"{n:>8}{loop_s:>10.2f}{new_s:>12.2f}{same_s:>13.2f}{changed_s:>12.2f}   {result}")
+	finally:
+		await client.drop_database("podcast_bench")
+		client.close()
+
+if __name__ == "__main__":
+	asyncio.run(main())
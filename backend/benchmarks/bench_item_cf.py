@@ -0,0 +1,84 @@
+"""Build time, memory and serving latency of the item-item collaborative filtering model.
+
+Synthetic users each follow one taste cluster of contiguous podcasts and mix in globally popular
+ones, so neighbour lists have structure to find. Defaults are 1M users x 100k podcasts.
+
+Run from backend/: python -m benchmarks.bench_item_cf [--users 1000000] [--items 100000] [--mean-items 15]
+"""
+import argparse
+import resource
+import statistics
+import time
+import numpy as np
+from app.services.item_cf import ItemItemModel
+
+def synthetic(rng: np.random.Generator, users: int, items: int, mean_items: float, cluster_size: int):
+	degrees = np.minimum(rng.geometric(1 / mean_items, size=users), 2000)
+	user_numbers = np.repeat(np.arange(users, dtype=np.int32), degrees)
+	clusters = rng.integers(0, items // cluster_size, size=users)
+	in_cluster = rng.integers(0, cluster_size, size=len(user_numbers)) + np.repeat(clusters, degrees) * cluster_size
+	popular = np.minimum(rng.zipf(1.3, size=len(user_numbers)) - 1, items - 1)
+	item_numbers = np.where(rng.random(len(user_numbers)) < 0.8, in_cluster, popular).astype(np.int32)
+	weights = rng.uniform(0.1, 1.0, size=len(user_numbers)).astype(np.float32)
+	return user_numbers, item_numbers, weights
+
+def _peak_mib() -> float:
+	return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _latency(fn, keys) -> str:
+	times = []
+	for key in keys:
+		t = time.perf_counter()
+		fn(key, 10)
+		times.append((time.perf_counter() - t) * 1000)
+	times.sort()
+	return f"p50 {statistics.median(times):.3f} ms, p95 {times[int(len(times) * 0.95) - 1]:.3f} ms"
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--users", type=int, default=1_000_000)
+	parser.add_argument("--items", type=int, default=100_000)
+	parser.add_argument("--mean-items", type=float, default=15)
+	parser.add_argument("--cluster-size", type=int, default=1000)
+	parser.add_argument("--k", type=int, default=20)
+	parser.add_argument("--block", type=int, default=2048)
+	parser.add_argument("--update-users", type=int, default=1000)
+	parser.add_argument("--seed", type=int, default=7)
+	args = parser.parse_args()
+
+	rng = np.random.default_rng(args.seed)
+	users, items, weights = synthetic(rng, args.users, args.items, args.mean_items, args.cluster_size)
+	print(f"{args.users:,} users x {args.items:,} podcasts, {len(users):,} interactions; peak RSS {_peak_mib():,.0f} MiB after generation")
+
+	model = ItemItemModel(args.k, 500, args.block)
+	# Synthetic ids are the row numbers as strings, registered up front instead of through encode().
+	model.user_ids = [str(u) for u in range(args.users)]
+	model.item_ids = [str(i) for i in range(args.items)]
+	model.user_number = {u: n for n, u in enumerate(model.user_ids)}
+	model.item_number = {i: n for n, i in enumerate(model.item_ids)}
+	start = time.perf_counter()
+	model.fit(users, items, weights)
+	fit = time.perf_counter() - start
+	stats = model.stats()
+	print(f"fit: {fit:.1f}s, model {stats['bytes'] / 2**20:,.0f} MiB, peak RSS {_peak_mib():,.0f} MiB")
+
+	same = 0
+	sample = rng.integers(0, args.items, size=1000)
+	for item in sample:
+		neighbors = model.neighbors[item]
+		neighbors = neighbors[neighbors >= 0]
+		same += int(np.sum(neighbors // args.cluster_size == item // args.cluster_size))
+	print(f"neighbours in the same taste cluster: {same / max(len(sample) * args.k, 1):.2%}")
+
+	sample_ids = [str(i) for i in rng.integers(0, args.users, size=args.update_users)]
+	new_items = [str(i) for i in rng.integers(0, args.items, size=args.update_users)]
+	start = time.perf_counter()
+	update_users, update_items = model.encode(sample_ids, new_items)
+	affected = model.update(update_users, update_items, np.ones(len(update_users), dtype=np.float32))
+	print(f"update: {args.update_users} new interactions refreshed {affected:,} lists in {time.perf_counter() - start:.2f}s")
+
+	print("similar:", _latency(model.similar, [str(i) for i in rng.integers(0, args.items, size=2000)]))
+	print("recommend:", _latency(model.recommend, [str(i) for i in rng.integers(0, args.users, size=2000)]))
+
+if __name__ == "__main__":
+	main()
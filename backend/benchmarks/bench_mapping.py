@@ -0,0 +1,97 @@
+"""Per-item cost of turning recorded provider payloads into Podcast responses.
+
+Run from backend/: python -m benchmarks.bench_mapping [--rounds 200]
+"""
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+from pydantic import TypeAdapter
+from app.models import Podcast
+from app.agents import listennotes_agent, spotify_agent
+from app.utils.fastjson import loads
+
+FIXTURES = Path(__file__).resolve().parent.parent / "app" / "fixtures"
+_podcast_list = TypeAdapter(List[Podcast])
+
+# Validated mapping as it was before the trusted model_construct path.
+async def _legacy_spotify(data: Dict[str, Any]) -> List[Podcast]:
+	podcasts = []
+	for item in data.get("episodes", {}).get("items", []):
+		pid = item.get("id")
+		podcasts.append(Podcast(
+			id=pid,
+			title=item.get("name") or "Untitled",
+			description=item.get("description"),
+			audio_url=item.get("audio_preview_url") or None,
+			thumbnail=(item.get("images", [{}])[0].get("url") if item.get("images") else None),
+			duration=int(item.get("duration_ms", 0) / 1000) if item.get("duration_ms") else None,
+			source="Spotify",
+			publisher=(item.get("show", {}).get("publisher")),
+			language=None,
+			external_url=(f"https://open.spotify.com/episode/{pid}" if pid else None),
+		))
+	return podcasts
+
+async def _legacy_ln_item(item: Dict[str, Any]) -> Podcast:
+	# Verbatim copy of listennotes_agent._map_episode_to_podcast at the baseline commit.
+	return Podcast(
+		id=str(item.get("id")),
+		title=item.get("title") or item.get("podcast", {}).get("title", "Untitled"),
+		description=item.get("description") or item.get("podcast", {}).get("description"),
+		audio_url=item.get("audio"),
+		thumbnail=(item.get("thumbnail") or item.get("image") or item.get("podcast", {}).get("thumbnail")),
+		duration=item.get("audio_length_sec"),
+		source="ListenNotes",
+		publisher=item.get("podcast", {}).get("publisher"),
+		language=item.get("podcast", {}).get("language"),
+	)
+
+async def _legacy_ln(data: Dict[str, Any]) -> List[Podcast]:
+	return [await _legacy_ln_item(item) for item in data.get("results", [])]
+
+def _legacy_response(podcasts: List[Podcast]) -> bytes:
+	# FastAPI dumps, re-validates against response_model, then encodes.
+	dumped = [p.model_dump() for p in podcasts]
+	return json.dumps([p.model_dump() for p in _podcast_list.validate_python(dumped)]).encode()
+
+def _time(fn: Callable[[], int], rounds: int) -> float:
+	items = 0
+	start = time.perf_counter()
+	for _ in range(rounds):
+		items += fn()
+	return (time.perf_counter() - start) / items * 1e6
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--rounds", type=int, default=200)
+	args = parser.parse_args()
+	loop = asyncio.new_event_loop()
+	cases = [
+		("spotify_search.json", _legacy_spotify, spotify_agent.map_search),
+		("listennotes_search.json", _legacy_ln, listennotes_agent.map_search),
+	]
+	print(f"{'payload':<28}{'items':>7}{'before us/item':>17}{'after us/item':>16}{'speedup':>10}")
+	for name, legacy, fast in cases:
+		raw = (FIXTURES / name).read_bytes()
+
+		def before() -> int:
+			podcasts = loop.run_until_complete(legacy(json.loads(raw)))
+			_legacy_response(podcasts)
+			return len(podcasts)
+
+		def after() -> int:
+			podcasts = fast(loads(raw))
+			_podcast_list.dump_json(podcasts)
+			return len(podcasts)
+
+		n = after()
+		b = _time(before, args.rounds)
+		a = _time(after, args.rounds)
+		print(f"{name:<28}{n:>7}{b:>17.2f}{a:>16.2f}{b / a:>9.1f}x")
+	loop.close()
+
+if __name__ == "__main__":
+	main()
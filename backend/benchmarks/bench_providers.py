@@ -0,0 +1,70 @@
+"""Load-test the provider agents against the bundled simulator, fully offline.
+
+Run from backend/, e.g.:
+	PROVIDER_SIMULATOR="latency=lognormal:120:0.4,error_rate=0.01,seed=7" CACHE_L2_BACKEND=none \\
+		python -m benchmarks.bench_providers --requests 500 --concurrency 50 --queries 40
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import Awaitable, Callable, List
+
+if not os.getenv("PROVIDER_SIMULATOR"):
+	os.environ["PROVIDER_SIMULATOR"] = "latency=lognormal:100:0.5,seed=7"
+os.environ.setdefault("CACHE_L2_BACKEND", "none")
+
+from app.agents import listennotes_agent, spotify_agent
+from app.services.http_clients import provider_clients
+from app.services.provider_cache import provider_cache
+from app.services.resilience import provider_guards
+
+def _percentile(values: List[float], pct: float) -> float:
+	ordered = sorted(values)
+	return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] if ordered else 0.0
+
+async def _run(name: str, make_call: Callable[[int], Awaitable[object]], requests: int, concurrency: int) -> None:
+	semaphore = asyncio.Semaphore(concurrency)
+	latencies: List[float] = []
+
+	async def one(i: int) -> None:
+		async with semaphore:
+			start = time.perf_counter()
+			await make_call(i)
+			latencies.append((time.perf_counter() - start) * 1000)
+
+	start = time.perf_counter()
+	await asyncio.gather(*(one(i) for i in range(requests)))
+	elapsed = time.perf_counter() - start
+	print(
+		f"{name:<22} {requests / elapsed:>8.1f} req/s  p50 {_percentile(latencies, 0.5):>7.1f} ms"
+		f"  p95 {_percentile(latencies, 0.95):>7.1f} ms  p99 {_percentile(latencies, 0.99):>7.1f} ms"
+	)
+
+async def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--requests", type=int, default=300)
+	parser.add_argument("--concurrency", type=int, default=30)
+	parser.add_argument("--queries", type=int, default=30, help="distinct search queries (controls cache hit rate)")
+	parser.add_argument("--seed", type=int, default=1)
+	args = parser.parse_args()
+	rng = random.Random(args.seed)
+	queries = [f"topic {i}" for i in range(args.queries)]
+	picks = [rng.choice(queries) for _ in range(args.requests)]
+
+	await provider_clients.start()
+	try:
+		print(f"simulator: {os.environ['PROVIDER_SIMULATOR']}")
+		await _run("spotify search", lambda i: spotify_agent.search_episodes(picks[i]), args.requests, args.concurrency)
+		await _run("listennotes search", lambda i: listennotes_agent.search_podcasts(picks[i]), args.requests, args.concurrency)
+		await _run("spotify trending", lambda i: spotify_agent.trending_episodes(), args.requests, args.concurrency)
+		await _run("listennotes trending", lambda i: listennotes_agent.fetch_trending(), args.requests, args.concurrency)
+		print("cache:", provider_cache.stats())
+		for provider, stats in provider_clients.stats().items():
+			print(f"{provider}:", stats.get("simulator"), "guard:", provider_guards[provider].stats())
+	finally:
+		await provider_clients.aclose()
+
+if __name__ == "__main__":
+	asyncio.run(main())
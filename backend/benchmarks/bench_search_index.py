@@ -0,0 +1,65 @@
+"""Build time, posting memory and query latency of the local BM25 catalog index.
+
+Run from backend/: python -m benchmarks.bench_search_index [--docs 1000000] [--queries 500]
+"""
+import argparse
+import itertools
+import random
+import statistics
+import time
+from typing import List
+from app.services.search_index import BM25Index
+
+WORDS = (
+	"history science comedy news daily true crime politics tech startup football music interview "
+	"health fitness business money investing culture film books philosophy climate space "
+	"gaming parenting education language travel food wine design coding mystery"
+).split()
+
+def _vocab(rng: random.Random, size: int) -> List[str]:
+	syllables = ["ka", "lo", "mi", "ra", "ten", "vo", "zu", "pe", "dra", "sin", "qua", "lex", "bor", "nie", "tu", "gar"]
+	vocab = list(WORDS)
+	seen = set(vocab)
+	while len(vocab) < size:
+		word = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 5)))
+		if word not in seen:
+			seen.add(word)
+			vocab.append(word)
+	return vocab
+
+def main() -> None:
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--docs", type=int, default=1_000_000)
+	parser.add_argument("--queries", type=int, default=500)
+	parser.add_argument("--vocab", type=int, default=50_000)
+	parser.add_argument("--seed", type=int, default=7)
+	args = parser.parse_args()
+
+	rng = random.Random(args.seed)
+	vocab = _vocab(rng, args.vocab)
+	# Zipf-like term draw so common words get long posting lists, as in a real catalog.
+	cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(len(vocab))))
+
+	index = BM25Index()
+	start = time.perf_counter()
+	for n in range(args.docs):
+		title = " ".join(rng.choices(vocab, cum_weights=cum_weights, k=6))
+		description = " ".join(rng.choices(vocab, cum_weights=cum_weights, k=30))
+		index.add(f"doc{n:08d}", title, description, rng.choice(vocab))
+	build = time.perf_counter() - start
+	stats = index.stats()
+	print(f"docs={stats['documents']} terms={stats['terms']} postings={stats['postings']}")
+	print(f"build: {build:.1f}s ({stats['documents'] / build:,.0f} docs/s), posting memory {stats['posting_bytes'] / 2**20:.1f} MiB")
+
+	latencies = []
+	for _ in range(args.queries):
+		query = " ".join(rng.choices(vocab, cum_weights=cum_weights, k=rng.randint(1, 3)))
+		t = time.perf_counter()
+		index.search(query, 12)
+		latencies.append((time.perf_counter() - t) * 1000)
+	latencies.sort()
+	p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+	print(f"query: p50 {statistics.median(latencies):.2f} ms, p95 {p95:.2f} ms over {len(latencies)} queries")
+
+if __name__ == "__main__":
+	main()
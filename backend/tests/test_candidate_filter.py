@@ -0,0 +1,68 @@
+import random
+from typing import Any, Dict, List
+from app.services.candidate_filter import CandidateBatch, rank_candidates
+
+def _baseline(podcasts: List[Dict[str, Any]], preferences: Dict[str, Any]) -> List[Dict[str, Any]]:
+	# The filter recommendation_agent.recommend used before the batch engine.
+	filtered = []
+	for podcast in podcasts:
+		if preferences["language"].lower() != podcast["language"].lower():
+			continue
+		if podcast["genre"] not in preferences["genres"]:
+			continue
+		if podcast["duration"] > preferences["max_duration"]:
+			continue
+		if not any(topic.lower() in (podcast["title"] + podcast["description"]).lower() for topic in preferences["topics"]):
+			continue
+		filtered.append(podcast)
+	return filtered
+
+WORDS = ["ai", "Data", "music", "jazz", "history", "rome", "cooking", "Soup", "news", "market"]
+
+def _podcast(rng: random.Random) -> Dict[str, Any]:
+	return {
+		"title": " ".join(rng.choices(WORDS, k=3)),
+		"description": " ".join(rng.choices(WORDS, k=8)),
+		"genre": rng.choice(["Technology", "Music", "History", "Food"]),
+		"duration": rng.randint(5, 120),
+		"language": rng.choice(["English", "english", "Spanish"]),
+	}
+
+def test_matches_baseline_filter():
+	rng = random.Random(5)
+	podcasts = [_podcast(rng) for _ in range(2000)]
+	batch = CandidateBatch(podcasts)
+	for _ in range(30):
+		preferences = {
+			"language": rng.choice(["English", "SPANISH"]),
+			"genres": rng.sample(["Technology", "Music", "History", "Food"], rng.randint(1, 3)),
+			"max_duration": rng.choice([30, 60, 90]),
+			"topics": [w.upper() for w in rng.sample(WORDS, 2)],
+		}
+		expected = {id(p) for p in _baseline(podcasts, preferences)}
+		assert {id(batch.podcasts[row]) for row, _ in batch.rank(preferences)} == expected
+
+def test_scores_rank_title_over_description():
+	podcasts = [
+		{"title": "weekly news", "description": "jazz", "genre": "Music", "duration": 30, "language": "English"},
+		{"title": "jazz hour", "description": "news", "genre": "Music", "duration": 30, "language": "English"},
+		{"title": "jazz news", "description": "", "genre": "Music", "duration": 30, "language": "English"},
+	]
+	preferences = {"language": "english", "genres": ["Music"], "max_duration": 60, "topics": ["jazz", "news"]}
+	ranked = rank_candidates(podcasts, preferences)
+	assert [p["title"] for p in ranked] == ["jazz news", "weekly news", "jazz hour"]
+	assert [p["score"] for p in ranked] == [1.0, 0.75, 0.75]
+	assert rank_candidates(podcasts, preferences, limit=1)[0]["title"] == "jazz news"
+
+def test_empty_genres_or_topics_match_nothing():
+	podcasts = [{"title": "jazz", "description": "", "genre": "Music", "duration": 30, "language": "English"}]
+	preferences = {"language": "English", "genres": ["Music"], "max_duration": 60, "topics": ["jazz"]}
+	assert rank_candidates(podcasts, preferences)
+	assert rank_candidates(podcasts, {**preferences, "genres": []}) == []
+	assert rank_candidates(podcasts, {**preferences, "topics": []}) == []
+
+def test_topic_does_not_match_across_title_and_description():
+	podcasts = [{"title": "the ja", "description": "zz age", "genre": "Music", "duration": 30, "language": "English"}]
+	preferences = {"language": "English", "genres": ["Music"], "max_duration": 60, "topics": ["jazz"]}
+	assert _baseline(podcasts, preferences)
+	assert rank_candidates(podcasts, preferences) == []
@@ -0,0 +1,75 @@
+import pytest
+from app.models import Podcast
+from app.services.dedup import BandTable, CatalogDedup, MinHashLSH, shingles
+
+DESCRIPTION = (
+	"This week we talk with the maintainers of a popular open source database about query planning, "
+	"index selection, write amplification and what they learned from ten years of production incidents."
+)
+
+def _podcast(pid, title, description=DESCRIPTION, publisher="Data Talk"):
+	return Podcast.model_construct(id=pid, title=title, description=description, publisher=publisher)
+
+def _index():
+	return MinHashLSH(permutations=64, bands=16, threshold=0.7)
+
+def test_shingles_ignore_markup_and_case():
+	plain = shingles("Episode 12", DESCRIPTION, "Data Talk")
+	marked_up = shingles("EPISODE 12", f"<p>{DESCRIPTION}</p>", "data talk")
+	assert plain.tolist() == marked_up.tolist()
+	assert len(shingles(None, None, None)) == 0
+
+def test_near_duplicates_join_the_first_cluster():
+	index = _index()
+	assert index.add("spotify:1", shingles("Episode 12: Databases", DESCRIPTION, "Data Talk")) == "spotify:1"
+	assert index.add("ln:1", shingles("Episode 12 - Databases", DESCRIPTION, "Data Talk")) == "spotify:1"
+	assert index.add("ln:2", shingles("Gardening basics", "How to start a vegetable garden on a balcony.", "Green")) == "ln:2"
+	assert len(index) == 3
+	assert index.stats()["clusters"] == 2
+
+def test_add_is_idempotent_and_honours_pinned_clusters():
+	index = _index()
+	hashed = shingles("Episode 12", DESCRIPTION, "Data Talk")
+	assert index.add("a", hashed, cluster_id="stored") == "stored"
+	assert index.add("a", hashed) == "stored"
+	assert index.add("b", hashed) == "stored"
+
+def test_cluster_of_does_not_index():
+	index = _index()
+	index.add("a", shingles("Episode 12", DESCRIPTION, "Data Talk"))
+	assert index.cluster_of("b", shingles("Episode 12!", DESCRIPTION, "Data Talk")) == "a"
+	assert index.cluster_of("c", shingles("Unrelated", "Something else entirely here.", None)) is None
+	assert len(index) == 1
+
+def test_empty_documents_start_their_own_cluster():
+	index = _index()
+	assert index.add("a", shingles(None, None, None)) == "a"
+	assert index.add("b", shingles(None, None, None)) == "b"
+
+def test_permutations_must_split_into_bands():
+	with pytest.raises(ValueError):
+		MinHashLSH(permutations=30, bands=8, threshold=0.7)
+
+def test_band_table_lookup_spans_compacted_and_recent_entries():
+	table = BandTable(compact_after=3)
+	for doc, key in enumerate([5, 1, 5, 9, 5]):
+		table.add(key, doc)
+	assert sorted(table.lookup(5)) == [0, 2, 4]
+	assert table.lookup(1) == [1]
+	assert table.lookup(7) == []
+	table.compact()
+	assert sorted(table.lookup(5)) == [0, 2, 4]
+
+def test_collapse_keeps_first_of_each_cluster_in_order():
+	dedup = CatalogDedup()
+	dedup.index = _index()
+	dedup.ready = True
+	dedup.assign([_podcast("spotify:1", "Episode 12: Databases")])
+	podcasts = [
+		_podcast("new:1", "Gardening basics", "How to start a vegetable garden on a small balcony.", "Green"),
+		_podcast("ln:1", "Episode 12 - Databases"),
+		_podcast("spotify:1", "Episode 12: Databases"),
+		_podcast("new:2", "Gardening basics!", "How to start a vegetable garden on a small balcony.", "Green"),
+		_podcast(None, "Cooking", "Weeknight dinners in twenty minutes or less, every single week.", "Kitchen"),
+	]
+	assert [p.title for p in dedup.collapse(podcasts)] == ["Gardening basics", "Episode 12 - Databases", "Cooking"]
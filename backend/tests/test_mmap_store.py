@@ -0,0 +1,49 @@
+import json
+from pathlib import Path
+import numpy as np
+from app.config import settings
+from app.services import mmap_store
+from app.services.mmap_store import MappedHandle, mapped, new_version, publish
+
+class _Model:
+	def __init__(self, path: Path) -> None:
+		self.meta = json.loads((path / "meta.json").read_text())
+		self.values = mapped(path / "values.npy")
+
+	def stats(self):
+		return self.meta
+
+def _build(path: Path, n: int) -> Path:
+	version = new_version(path)
+	np.save(version / "values.npy", np.arange(n))
+	(version / "meta.json").write_text(json.dumps({"n": n}))
+	publish(version, path)
+	return version
+
+def test_publish_flips_symlink_and_prunes(tmp_path):
+	store = tmp_path / "model"
+	first = _build(store, 1)
+	assert store.is_symlink() and store.resolve() == first
+	_build(store, 2)
+	third = _build(store, 3)
+	assert store.resolve() == third
+	assert len(mmap_store.versions(store)) == 2
+	assert not first.exists()
+
+def test_handle_follows_new_versions(tmp_path, monkeypatch):
+	store = tmp_path / "model"
+	monkeypatch.setattr(settings, "ALS_MODEL_PATH", str(store), raising=False)
+	monkeypatch.setattr(settings, "ALS_RELOAD_INTERVAL", 0, raising=False)
+	handle = MappedHandle("test model", _Model, "ALS_MODEL_PATH", "ALS_RELOAD_INTERVAL")
+	assert handle.load() is False
+	assert handle.current() is None
+	_build(store, 3)
+	old = handle.current()
+	assert len(old.values) == 3
+	_build(store, 5)
+	assert len(handle.current().values) == 5
+	# The replaced mapping stays readable after its version is pruned.
+	_build(store, 7)
+	assert old.values.tolist() == [0, 1, 2]
+	handle.current()
+	assert handle.stats()["n"] == 7
@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+from app.services import pagination
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor, fetch_page, initial_offsets
+
+def test_cursor_round_trip():
+	cursor = encode_cursor("Deep Learning", {"spotify": 24, "listen_notes": 10})
+	assert decode_cursor(cursor, "  deep   LEARNING ", "all") == {"spotify": 24, "listen_notes": 10}
+
+def test_cursor_for_finished_provider_decodes_to_none():
+	cursor = encode_cursor("ai", {"spotify": None, "listen_notes": 10})
+	assert decode_cursor(cursor, "ai", "all") == {"spotify": None, "listen_notes": 10}
+	assert encode_cursor("ai", {"spotify": None, "listen_notes": None}) is None
+
+@pytest.mark.parametrize("cursor, query, provider", [
+	("not base64!", "ai", "all"),
+	(encode_cursor("ai", {"spotify": 12}), "history", "spotify"),
+	(encode_cursor("ai", {"spotify": 12}), "ai", "listen_notes"),
+])
+def test_invalid_cursors(cursor, query, provider):
+	with pytest.raises(InvalidCursor):
+		decode_cursor(cursor, query, provider)
+
+def _fake_federate(results):
+	async def federate(calls):
+		timings, podcasts = [], []
+		for provider, call in calls.items():
+			status, count = results[provider]
+			timings.append({"provider": provider, "status": status, "ms": 1, "count": count})
+		return podcasts, timings
+	return federate
+
+@pytest.mark.parametrize("status", ["error", "timeout"])
+def test_failed_provider_keeps_its_offset(monkeypatch, status):
+	monkeypatch.setattr(pagination, "federate", _fake_federate({"spotify": (status, 0), "listen_notes": ("ok", 4)}))
+	_, offsets, _ = asyncio.run(fetch_page("ai", {"spotify": 12, "listen_notes": 8}, 4))
+	assert offsets == {"spotify": 12, "listen_notes": 12}
+	assert encode_cursor("ai", offsets) is not None
+
+def test_exhausted_providers_end_the_cursor(monkeypatch):
+	monkeypatch.setattr(pagination, "federate", _fake_federate({"spotify": ("ok", 3), "listen_notes": ("ok", 0)}))
+	_, offsets, _ = asyncio.run(fetch_page("ai", initial_offsets("all"), 4))
+	assert offsets == {"spotify": None, "listen_notes": None}
+
+def test_spotify_stops_at_max_offset(monkeypatch):
+	monkeypatch.setattr(pagination, "federate", _fake_federate({"spotify": ("ok", 50)}))
+	_, offsets, _ = asyncio.run(fetch_page("ai", {"spotify": pagination.SPOTIFY_MAX_OFFSET - 50}, 50))
+	assert offsets == {"spotify": None}
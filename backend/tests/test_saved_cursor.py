@@ -0,0 +1,39 @@
+import base64
+import pytest
+from bson import ObjectId
+from app.services.catalog import InvalidSavedCursor, _after_filter, encode_id_cursor, saved_query
+
+def test_object_id_cursor_resumes_after_that_id():
+	_id = ObjectId()
+	assert _after_filter(encode_id_cursor(_id)) == {"_id": {"$gt": _id}}
+
+def test_string_cursor_resumes_after_it_and_still_reaches_object_ids():
+	assert _after_filter(encode_id_cursor("spotify:abc")) == {
+		"$or": [{"_id": {"$gt": "spotify:abc", "$type": "string"}}, {"_id": {"$type": "objectId"}}],
+	}
+
+@pytest.mark.parametrize("cursor", [
+	"!!!",
+	base64.urlsafe_b64encode(b"o:not-an-object-id").decode(),
+	base64.urlsafe_b64encode(b"x:123").decode(),
+	base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_malformed_cursors(cursor):
+	with pytest.raises(InvalidSavedCursor):
+		_after_filter(cursor)
+
+def test_saved_query_without_clauses_matches_everything():
+	assert saved_query(None, {"source": None, "language": ""}) == {}
+
+def test_saved_query_single_clause_is_not_wrapped():
+	assert saved_query(None, {"source": "Spotify", "language": None}) == {"source": "Spotify"}
+
+def test_saved_query_combines_filters_collapse_and_cursor():
+	_id = ObjectId()
+	query = saved_query(encode_id_cursor(_id), {"source": "Spotify", "language": "en"}, collapse=True)
+	assert query == {"$and": [
+		{"source": "Spotify"},
+		{"language": "en"},
+		{"is_canonical": {"$ne": False}},
+		{"_id": {"$gt": _id}},
+	]}
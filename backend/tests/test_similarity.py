@@ -0,0 +1,55 @@
+import random
+import pytest
+from app.services.similarity import SimilarityIndex
+
+WORDS = [f"w{i}" for i in range(300)]
+
+def _doc(rng: random.Random, i: int):
+	return (f"d{i}", " ".join(rng.choices(WORDS, k=5)), " ".join(rng.choices(WORDS, k=30)), "pub")
+
+def _index() -> SimilarityIndex:
+	return SimilarityIndex(n_features=2 ** 12, k=5, max_df=0.5, query_terms=10, batch_size=8)
+
+def test_incremental_adds_past_block_compaction():
+	rng = random.Random(1)
+	index = _index()
+	index.fit([_doc(rng, i) for i in range(20)])
+	n = 20
+	for _ in range(40):
+		twin = _doc(rng, n)
+		assert index.add([twin, (f"d{n + 1}", *twin[1:])]) == 2
+		# The two new documents are identical, so each must be the other's best neighbour.
+		assert index.similar(f"d{n}", 1)[0][0] == f"d{n + 1}"
+		assert index.similar(f"d{n + 1}", 1)[0][0] == f"d{n}"
+		n += 2
+	assert len(index) == n
+	assert index.stats()["blocks"] <= 17
+
+def test_changed_document_replaces_old_row():
+	rng = random.Random(2)
+	index = _index()
+	docs = [_doc(rng, i) for i in range(10)]
+	index.fit(docs)
+	assert index.add(docs[:3]) == 0
+	assert index.add([("d0", docs[5][1], docs[5][2], "pub")]) == 1
+	assert len(index) == 10
+	assert index.stats()["rows"] == 11
+	assert index.similar("d0", 1)[0][0] == "d5"
+
+def test_failed_add_leaves_index_unchanged(monkeypatch):
+	rng = random.Random(3)
+	index = _index()
+	index.fit([_doc(rng, i) for i in range(10)])
+	before = index.stats()
+
+	def boom(*args, **kwargs):
+		raise RuntimeError("boom")
+
+	monkeypatch.setattr(index, "_top_k", boom)
+	with pytest.raises(RuntimeError):
+		index.add([_doc(rng, 10), _doc(rng, 11)])
+	monkeypatch.undo()
+	assert index.stats() == before
+	assert index.similar("d10", 1) is None
+	assert index.add([_doc(rng, 10)]) == 1
+	assert index.similar("d10", 3)
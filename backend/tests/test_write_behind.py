@@ -0,0 +1,66 @@
+import asyncio
+from app.models import Podcast
+from app.services.write_behind import WriteBehindQueue
+
+def _podcast(pid, title="t"):
+	return Podcast.model_construct(id=pid, title=title)
+
+class Writer:
+	def __init__(self, fail=False):
+		self.fail = fail
+		self.batches = []
+
+	async def __call__(self, podcasts):
+		if self.fail:
+			raise RuntimeError("database down")
+		self.batches.append([(p.id, p.title) for p in podcasts])
+
+def test_repeated_podcasts_merge_last_write_wins():
+	async def run():
+		writer = Writer()
+		queue = WriteBehindQueue(writer, max_batch=10, flush_interval=60, max_pending=10, max_wait=0.01)
+		await queue.start()
+		await queue.enqueue([_podcast("a", "old"), _podcast("b"), _podcast(None), _podcast(None)])
+		await queue.enqueue([_podcast("a", "new")])
+		await queue.stop()
+		return writer, queue.metrics()
+
+	writer, metrics = asyncio.run(run())
+	assert writer.batches == [[("a", "new"), ("b", "t"), (None, "t"), (None, "t")]]
+	assert metrics["merged"] == 1
+	assert metrics["written"] == 4
+
+def test_full_queue_drops_oldest_when_flushes_fail():
+	async def run():
+		queue = WriteBehindQueue(Writer(fail=True), max_batch=2, flush_interval=60, max_pending=2, max_wait=0.01)
+		await queue.start()
+		await queue.enqueue([_podcast("a"), _podcast("b"), _podcast("c")])
+		pending = list(queue._pending)
+		metrics = queue.metrics()
+		await queue.stop()
+		return pending, metrics
+
+	pending, metrics = asyncio.run(run())
+	assert pending == ["b", "c"]
+	assert metrics["backpressure_waits"] == 1
+	assert metrics["dropped"] == 1
+	assert metrics["flush_errors"] >= 1
+
+def test_stop_counts_podcasts_lost_when_final_flush_fails(capsys):
+	async def run():
+		queue = WriteBehindQueue(Writer(fail=True), max_batch=10, flush_interval=60, max_pending=10, max_wait=0.01)
+		await queue.start()
+		await queue.enqueue([_podcast("a"), _podcast("b"), _podcast("c")])
+		await queue.stop()
+		return queue.metrics()
+
+	metrics = asyncio.run(run())
+	assert metrics["dropped"] == 3
+	assert metrics["depth"] == 0
+	assert "dropping 3 podcasts" in capsys.readouterr().out
+
+def test_enqueue_writes_through_when_not_running():
+	writer = Writer()
+	queue = WriteBehindQueue(writer, max_batch=10, flush_interval=60, max_pending=10, max_wait=0.01)
+	asyncio.run(queue.enqueue([_podcast("a")]))
+	assert writer.batches == [[("a", "t")]]